@@ -0,0 +1,60 @@
+import time
+from array import array
+from PySide6.QtCore import QObject, QTimer, Signal
+from lineStore import receiveTimestamp
+
+
+class AppendCoalescer(QObject):
+    flushRequested = Signal(list, object)
+
+    def __init__(self, maxFlushRate=30, parent=None):
+        super().__init__(parent)
+        self.pendingLines = []
+        self.pendingTimestamps = array('q')
+        self.minFlushInterval = 0.0
+        self.lastFlushTimestamp = 0.0
+
+        self.flushCount = 0
+        self.flushedCharacters = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+        self.setMaxFlushRate(maxFlushRate)
+
+    def setMaxFlushRate(self, flushesPerSecond):
+        self.minFlushInterval = 1.0 / max(1, int(flushesPerSecond))
+
+    def append(self, lines, timestamps=None):
+        self.pendingLines.extend(lines)
+        if timestamps is None:
+            self.pendingTimestamps.extend([receiveTimestamp()] * len(lines))
+        else:
+            self.pendingTimestamps.extend(timestamps)
+        if not self.timer.isActive():
+            # flush at most once per interval, but without delay after an idle period
+            wait = self.lastFlushTimestamp + self.minFlushInterval - time.monotonic()
+            self.timer.start(max(0, int(wait * 1000)))
+
+    def flush(self):
+        self.timer.stop()
+        if len(self.pendingLines) == 0:
+            return
+
+        lines, timestamps = self.pendingLines, self.pendingTimestamps
+        self.pendingLines = []
+        self.pendingTimestamps = array('q')
+        self.lastFlushTimestamp = time.monotonic()
+
+        self.flushCount += 1
+        self.flushedCharacters += sum(map(len, lines)) + len(lines)
+        self.flushRequested.emit(lines, timestamps)
+
+    def clear(self):
+        self.timer.stop()
+        self.pendingLines = []
+        self.pendingTimestamps = array('q')
+
+    def charactersPerFlush(self):
+        return self.flushedCharacters / self.flushCount if self.flushCount > 0 else 0.0
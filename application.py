@@ -1,12 +1,17 @@
 from PySide6.QtWidgets import QApplication, QProxyStyle, QStyle
 from PySide6.QtGui import QColor
-from PySide6.QtCore import Qt, QSettings, QSize, QPoint, Slot
+from PySide6.QtCore import Qt, QSettings, QSize, QPoint, QTimer, Slot
 from typing import List
 import copy
+import csv
 
 from mainWindow import MainWindow
 from debugOutputController import DebugOutputController
 from debugOutput import DebugOutput, SerialConnectionSettings
+from debugOutputWindow import DebugOutputWindowSettings
+from serialIoLoop import SerialIoLoop
+from portStatistics import StatisticsExporter
+from latencyTrace import LatencyTrace
 from text_highlighter.textHighlighterConfig import TextHighlighterConfig
 
 
@@ -24,7 +29,14 @@ class Application(QApplication):
         super().__init__(arguments)
 
         self.controller = {}
+        self.connectingPorts = set()  # not opened yet, one that fails stops all
+        self.logFileViews = []
+        self.mergedViews = []
         self.highlighterSettings: List[TextHighlighterConfig] = []
+        self.ioEngine = 'threads'
+        self.ioLoop: SerialIoLoop = None
+        self.statisticsExporter: StatisticsExporter = None
+        self.latencyTracing = False
 
         self.mainWindow = MainWindow()
         self.mainWindow.signal_showDebugOutputCreateDialog.connect(self.showCreateDebugOutputDialog)
@@ -36,10 +48,22 @@ class Application(QApplication):
         self.mainWindow.signal_aboutToBeClosed.connect(self.stopAllDebugOutputs)
         self.mainWindow.signal_editHighlighterSettings.connect(self.showHighlighterSettingsDialog)
         self.mainWindow.signal_applyHighlighterSettings.connect(self.setHighlighterSettings)
+        self.mainWindow.signal_openLogFile.connect(self.openLogFile)
+        self.mainWindow.signal_showMergedViewDialog.connect(self.showMergedViewDialog)
+        self.mainWindow.signal_createMergedView.connect(self.createMergedView)
+        self.mainWindow.signal_exportStatistics.connect(self.exportStatistics)
+        self.mainWindow.signal_latencyTracingChanged.connect(self.setLatencyTracing)
+        self.mainWindow.signal_dumpLatencyTrace.connect(self.dumpLatencyTrace)
 
         self.loadHighlighterSettings()
+        self.loadIoEngineSettings()
+        self.loadLatencyTracingSettings()
         self.loadDebugOutputSettings()
 
+        self.statisticsTimer = QTimer(self)
+        self.statisticsTimer.timeout.connect(self.sampleStatistics)
+        self.statisticsTimer.start(1000)
+
         self.setStyle(ProxyStyle())
         self.mainWindow.show()
 
@@ -68,28 +92,114 @@ class Application(QApplication):
         cfg.font_size = QApplication.font().pointSize()
         self.highlighterSettings.append(cfg)
 
+        # repeat counters of collapsed lines
+        cfg = TextHighlighterConfig()
+        cfg.pattern = r' ×\d+$|<DBGVREP: ×\d+ :PERVGBD>'
+        cfg.color_foreground = 'darkblue'
+        cfg.color_background = 'white'
+        cfg.italic = False
+        cfg.bold = True
+        cfg.font_size = QApplication.font().pointSize()
+        self.highlighterSettings.append(cfg)
+
     @Slot(object)
     def setHighlighterSettings(self, settings: List[TextHighlighterConfig]):
         self.highlighterSettings = settings
         for ctrl in self.controller.values():
             ctrl.view.setHighlighterSettings(self.highlighterSettings)
+        for view in self.logFileViews + self.mergedViews:
+            view.setHighlighterSettings(self.highlighterSettings)
+
+    @Slot(str)
+    def openLogFile(self, file_name):
+        view = self.mainWindow.createLogFileView(file_name)
+        if view:
+            view.setHighlighterSettings(self.highlighterSettings)
+            view.closed.connect(lambda: self.logFileViews.remove(view))
+            self.logFileViews.append(view)
+
+    @Slot()
+    def showMergedViewDialog(self):
+        self.mainWindow.showMergedViewDialog(list(self.controller.keys()))
+
+    @Slot(list, float)
+    def createMergedView(self, port_names, reorder_window):
+        view = self.mainWindow.createMergedView(port_names, reorder_window)
+        for source, port_name in enumerate(port_names):
+            view.addSource(source, self.controller[port_name].debugOutput.linesAvailable)
+        view.setHighlighterSettings(self.highlighterSettings)
+        view.closed.connect(lambda: self.mergedViews.remove(view))
+        self.mergedViews.append(view)
+
+    @Slot()
+    def sampleStatistics(self):
+        snapshots = [ctrl.sampleStatistics() for ctrl in self.controller.values()]
+        self.mainWindow.showPortStatistics(snapshots)
+        if self.latencyTracing:
+            self.mainWindow.showLatencyTrace([(port_name, *stage) for port_name, ctrl in self.controller.items()
+                                              if ctrl.view.tracer for stage in ctrl.view.tracer.summary()])
+        if self.statisticsExporter:
+            try:
+                self.statisticsExporter.write(snapshots)
+            except OSError as e:
+                self.exportStatistics('')
+                self.mainWindow.stopStatisticsExport(str(e))
+
+    @Slot(str)
+    def exportStatistics(self, file_name):
+        # '' stops the export
+        if self.statisticsExporter:
+            self.statisticsExporter.close()
+            self.statisticsExporter = None
+        if file_name:
+            try:
+                self.statisticsExporter = StatisticsExporter(file_name)
+            except OSError as e:
+                self.mainWindow.stopStatisticsExport(str(e))
+
+    @Slot(bool)
+    def setLatencyTracing(self, enabled):
+        # tracing starts over with every switch on
+        self.latencyTracing = enabled
+        for ctrl in self.controller.values():
+            ctrl.setLatencyTracing(enabled)
+
+    @Slot(str)
+    def dumpLatencyTrace(self, file_name):
+        try:
+            with open(file_name, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(LatencyTrace.csvHeader())
+                for port_name, ctrl in self.controller.items():
+                    if ctrl.view.tracer:
+                        ctrl.view.tracer.writeCsv(writer, port_name)
+        except OSError as e:
+            self.mainWindow.showTraceDumpError(str(e))
 
     @Slot()
     def showCreateDebugOutputDialog(self):
         already_used_ports = list(self.controller.keys())
         self.mainWindow.showDebugOutputCreateDialog(already_used_ports)
 
-    @Slot(str, SerialConnectionSettings)
-    def createDebugOutput(self, window_title: str, settings: SerialConnectionSettings, size: QSize = None):
+    @Slot(str, SerialConnectionSettings, DebugOutputWindowSettings)
+    def createDebugOutput(self, window_title: str, settings: SerialConnectionSettings,
+                          view_settings: DebugOutputWindowSettings = None, size: QSize = None):
         if settings.portName in self.controller:
             raise Exception(f"DebugOutput {settings.portName} exists already")
 
-        debug_output = DebugOutput(settings)
-        view = self.mainWindow.createDebugOutputView(window_title, size)
+        if self.ioEngine == 'processes':
+            # multiprocessing and shared memory are only imported with this engine
+            from ingestionProcess import DebugOutputProcess
+            debug_output = DebugOutputProcess(settings)
+        else:
+            debug_output = DebugOutput(settings, self.ioLoop)
+        view = self.mainWindow.createDebugOutputView(window_title, view_settings, size)
         view.setHighlighterSettings(self.highlighterSettings)
         ctrl = DebugOutputController(debug_output, view)
 
+        ctrl.setLatencyTracing(self.latencyTracing)
         ctrl.terminated.connect(self.deleteDebugOutput)
+        ctrl.opened.connect(self.portOpened)
         self.controller[settings.portName] = ctrl
 
         if self.mainWindow.getConnectionState():
@@ -107,30 +217,51 @@ class Application(QApplication):
     def clearAll(self):
         for ctrl in self.controller.values():
             ctrl.view.clear()
+        for view in self.mergedViews:
+            view.clear()
 
     @Slot(bool)
     def changeConnectionState(self, state):
         if len(self.controller.values()) > 0:
             if state:
-                failed_to_connect = False
-
-                # try to connect all ports
-                for ctrl in self.controller.values():
+                # try to connect all ports, worker processes report whether they opened later on
+                self.connectingPorts = set(self.controller.keys())
+                self.mainWindow.setConnectionState(True)
+                for ctrl in list(self.controller.values()):
                     if not ctrl.start():
-                        failed_to_connect = True
-
-                if failed_to_connect:
-                    # cleanup if connect failed
-                    for ctrl in self.controller.values():
-                        ctrl.stop()
-                    self.mainWindow.setConnectionState(False)
-                else:
-                    self.mainWindow.setConnectionState(True)
+                        break  # portOpened stopped all ports already
             else:
+                self.connectingPorts = set()
                 for ctrl in self.controller.values():
                     ctrl.stop()
                 self.mainWindow.setConnectionState(False)
 
+    @Slot(str, bool)
+    def portOpened(self, portName, opened):
+        if portName not in self.connectingPorts:
+            return
+        self.connectingPorts.discard(portName)
+        if not opened:
+            # cleanup if connect failed
+            self.connectingPorts = set()
+            for ctrl in self.controller.values():
+                ctrl.stop()
+            self.mainWindow.setConnectionState(False)
+
+    def loadIoEngineSettings(self):
+        # threads: two threads per port, selectors: one loop for all ports (posix only),
+        # processes: receiving and framing in a worker process per port
+        settings = QSettings('settings.ini', QSettings.Format.IniFormat)
+        self.ioEngine = settings.value("ioEngine", 'threads')
+        if self.ioEngine == 'selectors' and SerialIoLoop.isSupported():
+            self.ioLoop = SerialIoLoop()
+            self.ioLoop.start()
+
+    def loadLatencyTracingSettings(self):
+        settings = QSettings('settings.ini', QSettings.Format.IniFormat)
+        self.latencyTracing = settings.value("latencyTracing", False, type=bool)
+        self.mainWindow.setLatencyTracing(self.latencyTracing)
+
     def loadDebugOutputSettings(self):
         settings = QSettings('settings.ini', QSettings.Format.IniFormat)
 
@@ -141,12 +272,14 @@ class Application(QApplication):
             # check if all needed keys exist
             if all(elem in settings.allKeys() for elem in ['debugOutput', 'view/size', 'view/title']):
                 self.createDebugOutput(settings.value("view/title"), settings.value("debugOutput"),
-                                       settings.value("view/size"))
+                                       settings.value("view/settings"), settings.value("view/size"))
         settings.endArray()
 
     @Slot()
     def saveDebugOutputSettings(self):
         settings = QSettings('settings.ini', QSettings.Format.IniFormat)
+        settings.setValue("ioEngine", self.ioEngine)
+        settings.setValue("latencyTracing", self.latencyTracing)
 
         settings.beginWriteArray("connections")
         settings.remove("")  # remove all existing connections
@@ -157,6 +290,7 @@ class Application(QApplication):
             settings.setValue("view/title", ctrl.view.windowTitle())
             settings.setValue("view/size", ctrl.view.size())
             settings.setValue("view/pos", ctrl.view.pos())
+            settings.setValue("view/settings", ctrl.view.settings)
 
         settings.endArray()
 
@@ -203,8 +337,12 @@ class Application(QApplication):
 
     @Slot()
     def stopAllDebugOutputs(self):
+        self.statisticsTimer.stop()
+        self.exportStatistics('')
         for ctrl in self.controller.values():
             ctrl.debugOutput.stop()
+        if self.ioLoop:
+            self.ioLoop.stop()
 
     @Slot()
     def showHighlighterSettingsDialog(self):
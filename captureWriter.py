@@ -0,0 +1,151 @@
+import bz2
+import gzip
+import lzma
+import os
+import re
+import struct
+from datetime import datetime
+from queue import SimpleQueue
+from threading import Thread
+
+
+class CaptureSettings:
+    compressions = {'none': ('', open), 'gzip': ('.gz', gzip.open), 'bz2': ('.bz2', bz2.open),
+                    'lzma': ('.xz', lzma.open)}
+
+    def __init__(self):
+        self.enabled = False
+        self.directory = 'captures'
+        self.rotateSize = 100  # MB, 0: never
+        self.rotateInterval = 0  # minutes, 0: never
+        self.compression = 'none'
+        self.timestamps = True
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.__dict__.update(state)
+
+
+class CaptureWriter:
+    # one record per received chunk in the .ts sidecar file: receive time, offset in the capture
+    timestampRecord = struct.Struct('<dQ')
+    bufferSize = 1 << 20
+
+    def __init__(self, settings: CaptureSettings, name: str):
+        self.settings = settings
+        self.name = re.sub(r'[^\w.-]', '_', os.path.basename(name.rstrip('/\\'))) or 'capture'
+        self.queue = SimpleQueue()
+        self.thread = None
+
+        self.dataFile = None
+        self.timestampFile = None
+        self.fileName = None
+        self.fileOpenTimestamp = 0.0
+        self.fileOffset = 0
+
+        self.bytesWritten = 0
+        self.numberOfFiles = 0
+        self.lastError = None  # OSError that stopped the capture
+
+    def start(self):
+        if self.thread is None:
+            self.thread = Thread(target=self.writeData, args=(self.queue,), daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def write(self, data: bytes, timestamp: float):
+        # called by the receiver thread, never blocks; after an error nothing is kept anymore
+        if self.lastError is None:
+            self.queue.put((timestamp, data))
+
+    def writeData(self, queue):
+        running = True
+        while running:
+            items = [queue.get()]
+            # take everything that is already queued and write it as one block
+            while not queue.empty():
+                items.append(queue.get())
+            if None in items:
+                items = items[:items.index(None)]
+                running = False
+
+            if self.lastError is None:
+                try:
+                    self.writeItems(items)
+                except OSError as e:
+                    # e.g. disk full or directory gone, the capture stops
+                    self.lastError = e
+                    self.closeFile()
+
+        self.closeFile()
+
+    def writeItems(self, items):
+        if len(items) == 0:
+            return
+        if self.needsRotation(items[0][0]):
+            self.closeFile()
+        if self.dataFile is None:
+            self.openFile(items[0][0])
+
+        if self.timestampFile:
+            offset = self.fileOffset
+            records = bytearray()
+            for timestamp, data in items:
+                records += CaptureWriter.timestampRecord.pack(timestamp, offset)
+                offset += len(data)
+            self.timestampFile.write(records)
+
+        block = b''.join(data for _, data in items)
+        self.dataFile.write(block)
+        self.fileOffset += len(block)
+        self.bytesWritten += len(block)
+
+    def needsRotation(self, timestamp):
+        if self.dataFile is None:
+            return False
+        if self.settings.rotateSize > 0 and self.fileOffset >= self.settings.rotateSize * 1024 * 1024:
+            return True
+        if self.settings.rotateInterval > 0 and timestamp - self.fileOpenTimestamp >= self.settings.rotateInterval * 60:
+            return True
+        return False
+
+    def openFile(self, timestamp):
+        os.makedirs(self.settings.directory, exist_ok=True)
+        extension, open_function = CaptureSettings.compressions[self.settings.compression]
+
+        stamp = datetime.fromtimestamp(timestamp).strftime('%Y%m%d-%H%M%S')
+        base_name = os.path.join(self.settings.directory, f'{self.name}_{stamp}')
+        counter = 1
+        while os.path.exists(f'{base_name}.log{extension}'):
+            # rotated more than once within a second
+            base_name = os.path.join(self.settings.directory, f'{self.name}_{stamp}_{counter}')
+            counter += 1
+
+        self.fileName = f'{base_name}.log{extension}'
+        if self.settings.compression == 'none':
+            self.dataFile = open(self.fileName, 'wb', buffering=CaptureWriter.bufferSize)
+        else:
+            self.dataFile = open_function(self.fileName, 'wb')
+        if self.settings.timestamps:
+            self.timestampFile = open(f'{base_name}.ts', 'wb', buffering=CaptureWriter.bufferSize)
+
+        self.fileOpenTimestamp = timestamp
+        self.fileOffset = 0
+        self.numberOfFiles += 1
+
+    def closeFile(self):
+        for file in [self.dataFile, self.timestampFile]:
+            if file:
+                try:
+                    file.close()
+                except OSError as e:
+                    # buffered data didn't make it to the file
+                    self.lastError = self.lastError or e
+        self.dataFile = None
+        self.timestampFile = None
+
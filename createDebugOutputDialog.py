@@ -1,11 +1,22 @@
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QDialogButtonBox
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QDialogButtonBox, QFileDialog
 from PySide6.QtCore import Slot
+from urllib.parse import quote
 import serial.tools.list_ports
 import serial
+import os
+import re
 from ui.uiFileHelper import createWidgetFromUiFile
+from lineAssembler import LineAssembler
+from debugOutputWindow import DebugOutputWindowSettings
+from captureWriter import CaptureSettings
+from debugOutput import SerialConnectionSettings
+from receiveQueue import ReceiveQueue
+from repeatCollapser import RepeatCollapser
 
 
 class CreateDebugOutputDialog(QDialog):
+    generatorUrl = 'generator://?rate=1000&mix=info:90,warn:8,error:2'
+
     def __init__(self, parent):
         super().__init__(parent)
 
@@ -13,14 +24,23 @@ class CreateDebugOutputDialog(QDialog):
         self.disabled_port_names = []
 
         self.connectWidget = createWidgetFromUiFile("ui/createDebugOutputDialog.ui")
+        self.fieldPatternToolTip = self.connectWidget.ed_fieldPattern.toolTip()
 
         self.refreshListOfSerialPorts()
         self.populateBaudRateCombobox()
         self.populateDataBitsCombobox()
         self.populateParityCombobox()
         self.populateStopBitsCombobox()
+        self.populateEncodingCombobox()
+        self.initReceiveQueueSettings()
+        self.initViewSettings()
+        self.initCaptureSettings()
 
         self.connectWidget.pb_refresh.clicked.connect(self.refreshListOfSerialPorts)
+        self.connectWidget.pb_replay.clicked.connect(self.selectReplayFile)
+        self.connectWidget.cb_portName.currentTextChanged.connect(self.updateOkButton)
+        self.connectWidget.ed_fieldPattern.textChanged.connect(self.updateOkButton)
+        self.connectWidget.pb_captureDirectory.clicked.connect(self.selectCaptureDirectory)
         self.connectWidget.buttonBox.accepted.connect(self.accept)
         self.connectWidget.buttonBox.rejected.connect(self.reject)
 
@@ -34,12 +54,32 @@ class CreateDebugOutputDialog(QDialog):
     def refreshListOfSerialPorts(self):
         port_name_list = [p.device for p in serial.tools.list_ports.comports() if
                           p.device not in self.disabled_port_names]
+        # virtual port with generated lines, its url can be edited for other rates and line mixes
+        if hasattr(os, 'openpty') and CreateDebugOutputDialog.generatorUrl not in self.disabled_port_names:
+            port_name_list.append(CreateDebugOutputDialog.generatorUrl)
         self.connectWidget.cb_portName.clear()
         self.connectWidget.cb_portName.addItems(port_name_list)
+        self.updateOkButton()
 
-        ok_button_enabled_state = len(port_name_list) > 0
+    @Slot()
+    def updateOkButton(self):
+        ok_button_enabled_state = len(self.getPortName()) > 0
+        try:
+            re.compile(self.connectWidget.ed_fieldPattern.text())
+        except re.error as e:
+            ok_button_enabled_state = False
+            self.connectWidget.ed_fieldPattern.setToolTip(f'Invalid regex: {e}')
+        else:
+            self.connectWidget.ed_fieldPattern.setToolTip(self.fieldPatternToolTip)
         self.connectWidget.buttonBox.button(QDialogButtonBox.Ok).setEnabled(ok_button_enabled_state)
 
+    @Slot()
+    def selectReplayFile(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Replay Capture", self.connectWidget.ed_captureDirectory.text(),
+                                                   "Captures (*.log *.log.gz *.log.bz2 *.log.xz);;All files (*)")
+        if file_name:
+            self.connectWidget.cb_portName.setEditText(f'replay://{quote(file_name)}?speed=1')
+
     def populateBaudRateCombobox(self):
         baudrates = ['9600', '38400', '115200', '1000000']
         self.connectWidget.cb_baudrate.clear()
@@ -71,6 +111,52 @@ class CreateDebugOutputDialog(QDialog):
         self.connectWidget.cb_stopBits.addItem(str(serial.STOPBITS_TWO), userData=serial.STOPBITS_TWO)
         self.connectWidget.cb_stopBits.setCurrentIndex(0)
 
+    def populateEncodingCombobox(self):
+        self.connectWidget.cb_encoding.clear()
+        self.connectWidget.cb_encoding.addItems(LineAssembler.encodings)
+        self.connectWidget.cb_encoding.setCurrentIndex(0)
+
+    def initReceiveQueueSettings(self):
+        defaults = SerialConnectionSettings('')
+        self.connectWidget.sb_receiveQueueSize.setValue(defaults.receiveQueueSize)
+        self.connectWidget.cb_receiveQueuePolicy.clear()
+        self.connectWidget.cb_receiveQueuePolicy.addItems(ReceiveQueue.policies)
+        self.connectWidget.cb_receiveQueuePolicy.setCurrentText(defaults.receiveQueuePolicy)
+        self.connectWidget.cb_collapseRepeats.clear()
+        self.connectWidget.cb_collapseRepeats.addItems(RepeatCollapser.modes)
+        self.connectWidget.cb_collapseRepeats.setCurrentText(defaults.collapseRepeats)
+
+    def initViewSettings(self):
+        defaults = DebugOutputWindowSettings()
+        self.connectWidget.cb_scrollbackUnit.clear()
+        self.connectWidget.cb_scrollbackUnit.addItems(DebugOutputWindowSettings.scrollbackUnits)
+        self.connectWidget.cb_scrollbackUnit.setCurrentText(defaults.scrollbackUnit)
+        self.connectWidget.sb_scrollback.setValue(defaults.scrollbackLimit)
+        self.connectWidget.sb_refreshRate.setValue(defaults.maxRefreshRate)
+        self.connectWidget.cb_viewMode.clear()
+        self.connectWidget.cb_viewMode.addItems(DebugOutputWindowSettings.viewModes)
+        self.connectWidget.cb_viewMode.setCurrentText(defaults.viewMode)
+        self.connectWidget.sb_pauseBuffer.setValue(defaults.pauseBufferSize)
+        self.connectWidget.ed_fieldPattern.setText(defaults.fieldPattern)
+
+    def initCaptureSettings(self):
+        defaults = CaptureSettings()
+        self.connectWidget.groupBox_capture.setChecked(defaults.enabled)
+        self.connectWidget.ed_captureDirectory.setText(defaults.directory)
+        self.connectWidget.sb_rotateSize.setValue(defaults.rotateSize)
+        self.connectWidget.sb_rotateInterval.setValue(defaults.rotateInterval)
+        self.connectWidget.cb_compression.clear()
+        self.connectWidget.cb_compression.addItems(list(CaptureSettings.compressions.keys()))
+        self.connectWidget.cb_compression.setCurrentText(defaults.compression)
+        self.connectWidget.checkBox_captureTimestamps.setChecked(defaults.timestamps)
+
+    @Slot()
+    def selectCaptureDirectory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Capture directory",
+                                                     self.connectWidget.ed_captureDirectory.text())
+        if directory:
+            self.connectWidget.ed_captureDirectory.setText(directory)
+
     def getName(self):
         name = self.connectWidget.ed_name.text()
         if name == '':
@@ -80,7 +166,7 @@ class CreateDebugOutputDialog(QDialog):
         return name
 
     def getPortName(self):
-        return self.connectWidget.cb_portName.currentText()
+        return self.connectWidget.cb_portName.currentText().strip()
 
     def getBaudrate(self):
         return self.connectWidget.cb_baudrate.currentText()
@@ -93,3 +179,35 @@ class CreateDebugOutputDialog(QDialog):
 
     def getStopBits(self):
         return self.connectWidget.cb_stopBits.currentData()
+
+    def getEncoding(self):
+        return self.connectWidget.cb_encoding.currentText()
+
+    def getReceiveQueueSize(self):
+        return self.connectWidget.sb_receiveQueueSize.value()
+
+    def getReceiveQueuePolicy(self):
+        return self.connectWidget.cb_receiveQueuePolicy.currentText()
+
+    def getCollapseRepeats(self):
+        return self.connectWidget.cb_collapseRepeats.currentText()
+
+    def getViewSettings(self):
+        settings = DebugOutputWindowSettings()
+        settings.scrollbackLimit = self.connectWidget.sb_scrollback.value()
+        settings.scrollbackUnit = self.connectWidget.cb_scrollbackUnit.currentText()
+        settings.maxRefreshRate = self.connectWidget.sb_refreshRate.value()
+        settings.viewMode = self.connectWidget.cb_viewMode.currentText()
+        settings.pauseBufferSize = self.connectWidget.sb_pauseBuffer.value()
+        settings.fieldPattern = self.connectWidget.ed_fieldPattern.text()
+        return settings
+
+    def getCaptureSettings(self):
+        settings = CaptureSettings()
+        settings.enabled = self.connectWidget.groupBox_capture.isChecked()
+        settings.directory = self.connectWidget.ed_captureDirectory.text()
+        settings.rotateSize = self.connectWidget.sb_rotateSize.value()
+        settings.rotateInterval = self.connectWidget.sb_rotateInterval.value()
+        settings.compression = self.connectWidget.cb_compression.currentText()
+        settings.timestamps = self.connectWidget.checkBox_captureTimestamps.isChecked()
+        return settings
@@ -1,8 +1,16 @@
 import serial
 import time
 from threading import Thread, Event
-from queue import Queue, Empty
+from queue import Empty
 from PySide6.QtCore import Signal, QObject
+from lineAssembler import LineAssembler
+from repeatCollapser import RepeatCollapser
+from lineStore import receiveTimestamp
+from captureWriter import CaptureSettings, CaptureWriter
+from receiveQueue import ReceiveQueue
+
+# replay:// and generator:// port names open the virtual ports of virtual_port/protocol_*.py
+serial.protocol_handler_packages.append('virtual_port')
 
 
 class SerialConnectionSettings:
@@ -13,57 +21,128 @@ class SerialConnectionSettings:
         self.parity = serial.PARITY_NONE
         self.stopbits = serial.STOPBITS_ONE
         self.timeout = 0.5
+        self.readBlockSize = 0  # 0: read whatever is waiting, otherwise fixed block size
+        self.interByteTimeout = 0.002
+        self.encoding = 'ascii'
+        self.receiveQueueSize = 64  # MB
+        self.receiveQueuePolicy = 'block'
+        self.collapseRepeats = 'off'  # one of RepeatCollapser.modes, the capture gets every line anyway
+        self.capture = CaptureSettings()
+
+    def __setstate__(self, state):
+        # settings pickled by older versions lack newer attributes
+        self.__init__(state.get('portName'))
+        self.__dict__.update(state)
 
 
 class DebugOutput(QObject):
-    dataAvailable = Signal(str)
+    linesAvailable = Signal(list, object)
+    opened = Signal(bool)  # result of start(), engines that open the port in the background report it later
 
-    def __init__(self, settings: SerialConnectionSettings):
+    def __init__(self, settings: SerialConnectionSettings, ioLoop=None):
         super(DebugOutput, self).__init__()
+        # with an io loop, no threads are started for this port
+        self.ioLoop = ioLoop
         self.receiver = DebugOutputReceiver(settings)
-        self.processor = DebugOutputDataProcessor(self.receiver.rxQueue)
+        self.processor = DebugOutputDataProcessor(self.receiver.rxQueue, settings.encoding, settings.collapseRepeats)
+        self.tracer = None
+        self.captureError = None  # of the last capture, kept after stop
 
-        self.processor.dataAvailable.connect(self.dataAvailable)
+        self.processor.linesAvailable.connect(self.linesAvailable)
 
     def start(self):
+        # False if the port failed to open, the same result goes to opened
         if self.receiver.open_port():
-            self.processor.start()
-            self.receiver.start()
+            self.captureError = None
+            if self.receiver.settings.capture.enabled:
+                self.receiver.captureWriter = CaptureWriter(self.receiver.settings.capture, self.getPortName())
+                self.receiver.captureWriter.start()
+            if self.ioLoop:
+                if not self.ioLoop.register(self.receiver, self.processor):
+                    # the loop thread is gone
+                    self.stop()
+                    self.opened.emit(False)
+                    return False
+            else:
+                self.processor.start()
+                self.receiver.start()
+            self.opened.emit(True)
             return True
         else:
+            # no half open port for isActive and stop to trip over
+            self.receiver.close_port()
+            self.opened.emit(False)
             return False
 
     def stop(self):
+        if self.ioLoop and self.receiver.serialPort:
+            self.ioLoop.unregister(self.receiver)
         self.receiver.stop()
         self.receiver.close_port()
         self.processor.stop()
+        if self.receiver.captureWriter:
+            self.receiver.captureWriter.stop()
+            self.captureError = self.receiver.captureWriter.lastError
+            self.receiver.captureWriter = None
 
     def getPortName(self):
         return self.receiver.settings.portName
 
+    def setTracer(self, tracer):
+        # LatencyTrace or None, the threads pick it up with their next chunk
+        self.tracer = tracer
+        self.receiver.tracer = tracer
+        self.processor.tracer = tracer
+
     def isActive(self):
+        if self.ioLoop:
+            return self.ioLoop.isRegistered(self.receiver)
         return self.receiver.isReceiving()
 
+    def getReceiveStatistics(self):
+        return self.receiver.statistics.sample()
+
+    def getCaptureError(self):
+        # OSError that stopped the capture, None while it is fine
+        if self.receiver.captureWriter:
+            return self.receiver.captureWriter.lastError
+        return self.captureError
+
+    def getDecodeErrors(self):
+        return self.processor.lineAssembler.decodeErrors
+
+    def getQueueStatistics(self):
+        # bytes: queued, peak queued, spilled to disk, dropped
+        return self.receiver.rxQueue.statistics()
+
 
 class DebugOutputReceiver:
     def __init__(self, settings: SerialConnectionSettings):
         self.terminateEvent = Event()
-        self.rxQueue = Queue()
+        self.rxQueue = ReceiveQueue(settings.receiveQueueSize << 20, settings.receiveQueuePolicy)
         self.thread = None
         self.serialPort = None
         self.settings = settings
+        self.statistics = ReceiveStatistics()
+        self.captureWriter: CaptureWriter = None
+        self.tracer = None
 
     def open_port(self) -> bool:
         if self.serialPort:
             self.serialPort.close()
 
-        self.serialPort = serial.Serial()
-        self.serialPort.port = self.settings.portName
+        try:
+            self.serialPort = serial.serial_for_url(self.settings.portName, do_not_open=True)
+        except ValueError:
+            # unknown protocol
+            return False
         self.serialPort.baudrate = self.settings.baudrate
         self.serialPort.bytesize = self.settings.bytesize
         self.serialPort.parity = self.settings.parity
         self.serialPort.stopbits = self.settings.stopbits
         self.serialPort.timeout = self.settings.timeout
+        if self.settings.readBlockSize > 0:
+            self.serialPort.inter_byte_timeout = self.settings.interByteTimeout
 
         try:
             self.serialPort.open()
@@ -99,26 +178,74 @@ class DebugOutputReceiver:
         #     return  # todo cleanup thread
 
         self.serialPort.reset_input_buffer()
+        self.statistics.reset()
+        queue.reset()
 
+        block_size = self.settings.readBlockSize
         while not terminateEvent.is_set():
-            received_data = self.serialPort.read(1)
+            if block_size > 0:
+                # returns when the block is full, after an inter byte gap or on timeout
+                received_data = self.serialPort.read(block_size)
+            else:
+                # blocks for the first byte (up to timeout), then takes everything that is waiting
+                received_data = self.serialPort.read(max(1, self.serialPort.in_waiting))
             if len(received_data) > 0:
-                # print(receivedData)
-                queue.put(received_data)
+                # the capture gets everything, even what the queue drops
+                if self.captureWriter:
+                    self.captureWriter.write(received_data, time.time())
+                self.statistics.count(len(received_data))
+                timestamp = receiveTimestamp()
+                tracer = self.tracer
+                if tracer:
+                    tracer.sampleRead(timestamp)
+                queue.put((timestamp, received_data), terminateEvent)
 
         # self.serialPort.close()
         self.terminateEvent.clear()
 
 
+class ReceiveStatistics:
+    def __init__(self):
+        self.bytesReceived = 0
+        self.numberOfReads = 0
+        self.startTimestamp = time.monotonic()
+        self._lastSample = (self.startTimestamp, 0, 0)
+
+    def reset(self):
+        self.__init__()
+
+    def count(self, number_of_bytes):
+        # called by the receiver thread once per chunk
+        self.bytesReceived += number_of_bytes
+        self.numberOfReads += 1
+
+    def sample(self):
+        # (bytes per read, reads per second) since the previous call
+        now = time.monotonic()
+        last_time, last_bytes, last_reads = self._lastSample
+        self._lastSample = (now, self.bytesReceived, self.numberOfReads)
+
+        reads = self.numberOfReads - last_reads
+        bytes_per_read = (self.bytesReceived - last_bytes) / reads if reads > 0 else 0.0
+        reads_per_second = reads / (now - last_time) if now > last_time else 0.0
+        return bytes_per_read, reads_per_second
+
+    def __str__(self):
+        return f"{self.bytesReceived} bytes in {self.numberOfReads} reads"
+
+
 class DebugOutputDataProcessor(QObject):
-    dataAvailable = Signal(str)
+    linesAvailable = Signal(list, object)  # lines, array('q') of receive timestamps
 
-    def __init__(self, rawDataQueue):
+    def __init__(self, rawDataQueue, encoding='ascii', collapseRepeats='off'):
         super(DebugOutputDataProcessor, self).__init__()
         self.lastEmitTimestamp = self.getTimestamp()
         self.terminateEvent = Event()
         self.rawDataQueue = rawDataQueue
+        self.lineAssembler = LineAssembler(encoding)
+        self.repeatCollapser = RepeatCollapser(collapseRepeats)
         self.thread = None
+        self.tracer = None
 
     def start(self):
         if self.thread is None:
@@ -138,21 +265,52 @@ class DebugOutputDataProcessor(QObject):
     def timeDiffSinceLastEmit(self):
         return self.getTimestamp() - self.lastEmitTimestamp
 
+    def reset(self):
+        self.lineAssembler.reset()
+        self.repeatCollapser.reset()
+
+    def takeLines(self):
+        lines, timestamps = self.lineAssembler.takeLines()
+        return self.repeatCollapser.collapse(lines, timestamps)
+
     def processData(self, queue, terminateEvent):
-        data = bytearray()
+        self.reset()
 
         while not terminateEvent.is_set():
             try:
-                rx_bytes = queue.get(timeout=0.2)
-                data.extend(rx_bytes)
-                # queue.task_done()
+                timestamp, rx_bytes = queue.get(timeout=LineAssembler.partialLineTimeout)
             except Empty:
-                pass
-            finally:
-                if len(data) > 0:
-                    try:
-                        # TODO process data
-                        self.dataAvailable.emit(data.decode("ascii"))
-                    except:
-                        pass
-                    data = bytearray()
+                self.lineAssembler.flushPartialLine()
+            else:
+                self.feed(timestamp, rx_bytes)
+                # take everything that is already queued to emit larger batches
+                for _ in range(queue.qsize()):
+                    timestamp, rx_bytes = queue.get_nowait()
+                    self.feed(timestamp, rx_bytes)
+
+            lines, timestamps = self.takeLines()
+            if len(lines) > 0:
+                self.publishLines(lines, timestamps)
+                self.lastEmitTimestamp = self.getTimestamp()
+
+        self.lineAssembler.flushPartialLine(final=True)
+        lines, timestamps = self.takeLines()
+        if len(lines) > 0:
+            self.publishLines(lines, timestamps)
+
+    def feed(self, timestamp, data):
+        tracer = self.tracer
+        if tracer:
+            tracer.stamp('dequeued', timestamp)
+        if isinstance(data, int):
+            # the queue dropped that many bytes here, a character split by the gap can't be completed
+            self.lineAssembler.flushPartialLine(final=True)
+            self.lineAssembler.addLine(f'<DBGVERR: {data} bytes dropped :RREVGBD>', timestamp)
+        else:
+            self.lineAssembler.feed(data, timestamp)
+
+    def publishLines(self, lines, timestamps):
+        tracer = self.tracer
+        if tracer:
+            tracer.stamp('framed', timestamps[-1])
+        self.linesAvailable.emit(lines, timestamps)
@@ -1,9 +1,12 @@
-from PySide6.QtCore import QObject, Slot, Signal
+from PySide6.QtCore import QObject, Slot, Signal, QTimer
 from debugOutput import DebugOutput
 from debugOutputWindow import DebugOutputWindow
+from portStatistics import PortStatistics
+from latencyTrace import LatencyTrace
 
 class DebugOutputController(QObject):
     terminated = Signal(str)
+    opened = Signal(str, bool)  # port name, opened
 
     def __init__(self, debugOutput, view):
         super().__init__()
@@ -11,29 +14,76 @@ class DebugOutputController(QObject):
         self.view: DebugOutputWindow = view
 
         self.view.closed.connect(self.terminate)
-        self.debugOutput.dataAvailable.connect(self.view.appendData)
+        self.debugOutput.linesAvailable.connect(self.view.appendLines)
+        self.debugOutput.linesAvailable.connect(self.countLines)
+        self.statistics = PortStatistics(self.debugOutput.getPortName())
+        self.captureErrorShown = False
+
+        self.queueStatusTimer = QTimer(self)
+        self.queueStatusTimer.setInterval(1000)
+        self.queueStatusTimer.timeout.connect(self.showQueueStatistics)
+        self.debugOutput.opened.connect(self.portOpened)
 
     def start(self) -> bool:
-        started = self.debugOutput.start()
-        if started:
+        # False if the port failed to open right away; the result always comes with opened, too
+        return self.debugOutput.start()
+
+    @Slot(bool)
+    def portOpened(self, opened):
+        if opened:
             self.show_message(f'Opened {self.debugOutput.getPortName()}')
+            self.captureErrorShown = False
+            self.statistics.reset()
+            self.queueStatusTimer.start()
         else:
             self.show_error(f'Failed to open {self.debugOutput.getPortName()}')
-        return started
+        self.opened.emit(self.debugOutput.getPortName(), opened)
 
     def stop(self):
-        if self.debugOutput.isActive():
-            self.debugOutput.stop()
-            self.show_message(f'Closed {self.debugOutput.getPortName()}')
+        self.queueStatusTimer.stop()
+        active = self.debugOutput.isActive()
+        # also when the port or the worker process is gone, that frees e.g. the shared memory ring
+        self.debugOutput.stop()
+        if active:
+            self.showQueueStatistics()
+            bytes_per_read, reads_per_second = self.debugOutput.getReceiveStatistics()
+            self.show_message(f'Closed {self.debugOutput.getPortName()} '
+                              f'({self.debugOutput.receiver.statistics}, '
+                              f'{bytes_per_read:.1f} bytes/read, {reads_per_second:.1f} reads/s)')
+
+    @Slot(list, object)
+    def countLines(self, lines, timestamps):
+        self.statistics.countLines(len(lines))
+
+    def setLatencyTracing(self, enabled):
+        tracer = LatencyTrace() if enabled else None
+        self.debugOutput.setTracer(tracer)
+        self.view.tracer = tracer
+
+    def sampleStatistics(self):
+        return self.statistics.sample(self.debugOutput, self.view)
+
+    @Slot()
+    def showQueueStatistics(self):
+        self.view.showQueueStatistics(*self.debugOutput.getQueueStatistics())
+        self.showCaptureError()
+
+    def showCaptureError(self):
+        # the capture stops on write errors, reading the port goes on
+        error = self.debugOutput.getCaptureError()
+        if error and not self.captureErrorShown:
+            self.captureErrorShown = True
+            self.show_error(f'Capture of {self.debugOutput.getPortName()} stopped: {error}')
 
     def show_message(self, text):
-        self.view.appendData(f'\n<DBGVMSG: {text} :GSMVGBD>\n', True)
+        self.view.appendLines([f'<DBGVMSG: {text} :GSMVGBD>'], force=True)
 
     def show_error(self, text):
-        self.view.appendData(f'\n<DBGVERR: {text} :RREVGBD>\n', True)
+        self.view.appendLines([f'<DBGVERR: {text} :RREVGBD>'], force=True)
 
     @Slot()
     def terminate(self):
         # view is already closed
+        self.queueStatusTimer.stop()
         self.debugOutput.stop()
         self.terminated.emit(self.debugOutput.getPortName())
@@ -1,16 +1,52 @@
-from PySide6.QtCore import Qt, Slot, Signal
-from PySide6.QtGui import QTextCursor, QClipboard
-from PySide6.QtWidgets import QApplication, QMdiSubWindow, QTextEdit, QPushButton, QCheckBox
+import re
+from array import array
+from itertools import repeat
+from bisect import bisect_left, bisect_right
+from PySide6.QtCore import Qt, Slot, Signal, QTimer, QEvent
+from PySide6.QtGui import QClipboard, QKeySequence, QShortcut
+from PySide6.QtWidgets import QApplication, QMdiSubWindow, QTextEdit, QPushButton, QCheckBox, QProgressBar, \
+    QLineEdit, QLabel, QComboBox
 from typing import List
-from text_highlighter.textHighlighter import TextHighlighter, TextHighlighterConfig
+from text_highlighter.textHighlighter import TextHighlighterConfig
+from appendCoalescer import AppendCoalescer
+from pauseBuffer import PauseBuffer
+from repeatCollapser import RepeatCollapser
+from textLogView import TextLogView
+from virtualLogView import VirtualLogView, LogViewport
+from lineSearch import LineSearch, SearchResult
+from lineFilter import LineMatcher
+from recordStore import RecordStore
+from lineStore import LineStore, receiveTimestamp
+from portStatistics import Histogram
 from ui.uiFileHelper import createWidgetFromUiFile
 
 
+class DebugOutputWindowSettings:
+    scrollbackUnits = ['lines', 'bytes']
+    viewModes = ['text', 'list']
+
+    def __init__(self):
+        self.scrollbackLimit = 100000  # 0: unlimited
+        self.scrollbackUnit = 'lines'
+        self.maxRefreshRate = 30
+        self.viewMode = 'text'  # list: virtualized view, renders only visible lines
+        self.timestampMode = 'none'  # one of LineStore.timestampModes
+        self.pauseBufferSize = 32  # MB of lines kept while the view is paused
+        # fields parsed from every line, '' turns a pattern off
+        self.fieldPattern = RecordStore.fieldPattern
+        self.keyValuePattern = RecordStore.keyValuePattern
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.__dict__.update(state)
+
+
 class DebugOutputWindow(QMdiSubWindow):
     closed = Signal()
 
-    def __init__(self, windowTitle):
+    def __init__(self, windowTitle, settings: DebugOutputWindowSettings = None, store=None):
         super().__init__()
+        self.settings = settings if settings else DebugOutputWindowSettings()
 
         widget = createWidgetFromUiFile("ui/debugOutputWindow.ui")
 
@@ -18,10 +54,14 @@ class DebugOutputWindow(QMdiSubWindow):
         self.setWindowTitle(windowTitle)
         self.setAttribute(Qt.WA_DeleteOnClose)
 
-        self.textEdit: QTextEdit = widget.findChild(QTextEdit, 'textEdit')
-
-        self.highlighter = TextHighlighter()
-        self.highlighter.setDocument(self.textEdit.document())
+        text_edit: QTextEdit = widget.findChild(QTextEdit, 'textEdit')
+        if self.settings.viewMode == 'list' or store is not None:
+            self.logView = VirtualLogView(widget, store)
+            widget.layout().replaceWidget(text_edit, self.logView.widget())
+            text_edit.hide()
+            text_edit.deleteLater()
+        else:
+            self.logView = TextLogView(text_edit)
 
         pb_clear: QPushButton = widget.findChild(QPushButton, 'pb_clear')
         pb_clear.pressed.connect(self.clear)
@@ -30,38 +70,466 @@ class DebugOutputWindow(QMdiSubWindow):
         pb_copy.pressed.connect(self.copy)
 
         self.checkBox_enabled: QCheckBox = self.widget().findChild(QCheckBox, 'checkBox_enabled')
+        self.checkBox_enabled.toggled.connect(self.setPaused)
+
+        # while paused, lines are kept off screen and inserted at once on resume
+        self.pauseBuffer = PauseBuffer(self.settings.pauseBufferSize << 20)
+        self.lb_pending: QLabel = widget.findChild(QLabel, 'lb_pending')
+        self.pendingTimer = QTimer(self)
+        self.pendingTimer.setInterval(250)
+        self.pendingTimer.timeout.connect(self.showPending)
+
+        self.progressBar_highlighting: QProgressBar = widget.findChild(QProgressBar, 'progressBar_highlighting')
+        self.logView.rehighlightProgress.connect(self.showRehighlightProgress)
+
+        self.coalescer = AppendCoalescer(self.settings.maxRefreshRate, parent=self)
+        self.coalescer.flushRequested.connect(self.insertLines)
+        self.repeatedLine = None  # (absolute line number, text without counter) a repeat marker applies to
+
+        self.setScrollbackLimit(self.settings.scrollbackLimit, self.settings.scrollbackUnit)
+
+        self.search = LineSearch(self.logView.store, self)
+        self.search.resultsReady.connect(self.showSearchResult)
+        self.searchResult = None
+        self.searchLine = None  # absolute line number of the current match
+
+        self.ed_search: QLineEdit = widget.findChild(QLineEdit, 'ed_search')
+        self.checkBox_searchRegex: QCheckBox = widget.findChild(QCheckBox, 'checkBox_searchRegex')
+        self.checkBox_searchCaseSensitive: QCheckBox = widget.findChild(QCheckBox, 'checkBox_searchCaseSensitive')
+        self.lb_searchResult: QLabel = widget.findChild(QLabel, 'lb_searchResult')
+
+        # search while typing, but not on every key stroke
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(250)
+        self.searchTimer.timeout.connect(self.startSearch)
+        self.ed_search.textChanged.connect(self.searchTimer.start)
+        self.ed_search.returnPressed.connect(self.searchNext)
+        self.checkBox_searchRegex.toggled.connect(self.startSearch)
+        self.checkBox_searchCaseSensitive.toggled.connect(self.startSearch)
+        widget.findChild(QPushButton, 'pb_searchNext').pressed.connect(self.searchNext)
+        widget.findChild(QPushButton, 'pb_searchPrevious').pressed.connect(self.searchPrevious)
+        QShortcut(QKeySequence.Find, self, self.focusSearch)
+
+        self.matcher = LineMatcher(self.logView.store)
+        self.records = RecordStore(self.logView.store, self.settings.fieldPattern, self.settings.keyValuePattern)
+        self.highlighterPatterns = []
+        self.recentFilterPatterns = []  # their bitsets are kept, switching back needs no scan
+        self.filterRows = None  # absolute line numbers shown while filtering
+        self.activeFilter = ('', '')  # (include, exclude) of the applied filter, the combos may hold unapplied text
+
+        self.filterViewport = None  # shows the filtered lines in place of the log view, created on first use
+
+        self.checkBox_filter: QCheckBox = widget.findChild(QCheckBox, 'checkBox_filter')
+        self.cb_filterInclude: QComboBox = widget.findChild(QComboBox, 'cb_filterInclude')
+        self.cb_filterExclude: QComboBox = widget.findChild(QComboBox, 'cb_filterExclude')
+        self.lb_filterResult: QLabel = widget.findChild(QLabel, 'lb_filterResult')
+        self.cb_filterInclude.lineEdit().setPlaceholderText('Include pattern')
+        self.cb_filterExclude.lineEdit().setPlaceholderText('Exclude pattern')
+        for combo in [self.cb_filterInclude, self.cb_filterExclude]:
+            combo.setToolTip('A regex, or a query of a parsed field like @level=ERROR, @module!=net or @adc>1000')
+
+        self.filterTimer = QTimer(self)
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.setInterval(500)
+        self.filterTimer.timeout.connect(self.applyFilter)
+        self.checkBox_filter.toggled.connect(self.applyFilter)
+        self.cb_filterInclude.currentTextChanged.connect(self.filterTimer.start)
+        self.cb_filterExclude.currentTextChanged.connect(self.filterTimer.start)
+        self.cb_filterInclude.activated.connect(self.applyFilter)
+        self.cb_filterExclude.activated.connect(self.applyFilter)
+
+        # entries in the order of LineStore.timestampModes
+        self.cb_timestamps: QComboBox = widget.findChild(QComboBox, 'cb_timestamps')
+        self.cb_timestamps.currentIndexChanged.connect(
+            lambda index: self.setTimestampMode(LineStore.timestampModes[index]))
+        self.setTimestampMode(self.settings.timestampMode)
+
+        self.lb_queueStatus: QLabel = widget.findChild(QLabel, 'lb_queueStatus')
+
+        # receive time of the newest line until the view painted it, time spent inserting a batch
+        self.paintLatency = Histogram()
+        self.flushDuration = Histogram()
+        self.paintPendingTimestamp = 0
+        self.tracer = None  # LatencyTrace when latency tracing is on
+        self.logView.widget().viewport().installEventFilter(self)
 
     def closeEvent(self, event):
         # is not called when mainwindow is closed
+        self.search.stop()
         event.accept()
         self.closed.emit()
 
     @Slot()
     def clear(self):
-        self.textEdit.clear()
+        self.coalescer.clear()
+        self.pauseBuffer.clear()
+        self.repeatedLine = None
+        self.showPending()
+        self.logView.clear()
+        self.matcher.clear()
+        self.records.clear()
+        if self.filterRows is not None:
+            self.filterRows = array('Q')
+            self.filterViewport.setRowMap(self.filterRows)
+            self.showFilterCount()
+
+    def setMaxRefreshRate(self, flushesPerSecond):
+        self.settings.maxRefreshRate = flushesPerSecond
+        self.coalescer.setMaxFlushRate(flushesPerSecond)
+
+    def getFlushStatistics(self):
+        return self.coalescer.flushCount, self.coalescer.charactersPerFlush()
+
+    def setScrollbackLimit(self, limit, unit='lines'):
+        if unit not in DebugOutputWindowSettings.scrollbackUnits:
+            raise Exception(f"Unknown scrollback unit {unit}")
+        self.settings.scrollbackLimit = limit
+        self.settings.scrollbackUnit = unit
+        self.logView.setScrollbackLimit(limit, unit)
+
+    def setTimestampMode(self, mode):
+        if mode not in LineStore.timestampModes:
+            raise Exception(f"Unknown timestamp mode {mode}")
+        self.settings.timestampMode = mode
+        self.cb_timestamps.setCurrentIndex(LineStore.timestampModes.index(mode))
+        self.logView.setTimestampMode(mode)
+        if self.filterViewport:
+            self.filterViewport.setTimestampMode(mode)
 
     def setHighlighterSettings(self, settings: List[TextHighlighterConfig]):
-        self.highlighter.setSettings(settings)
-        self.highlighter.rehighlight()
+        self.logView.setHighlighterSettings(settings)
+        if self.filterViewport:
+            self.filterViewport.invalidateFormats()
+
+        # highlighter rules are matched on every line too and can be picked as filters
+        self.highlighterPatterns = []
+        for setting in settings:
+            try:
+                re.compile(setting.pattern)
+            except re.error:
+                continue
+            if setting.pattern not in self.highlighterPatterns:
+                self.highlighterPatterns.append(setting.pattern)
+        for combo in [self.cb_filterInclude, self.cb_filterExclude]:
+            text = combo.currentText()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItems([''] + self.highlighterPatterns)
+            combo.setCurrentText(text)
+            combo.blockSignals(False)
+        self.updateMatcherPatterns(self.activeFilter)
+
+    @Slot(int)
+    def showRehighlightProgress(self, percent):
+        self.progressBar_highlighting.setValue(percent)
+        self.progressBar_highlighting.setVisible(percent < 100)
+
+    def showQueueStatistics(self, depth, peakDepth, spilledBytes, droppedBytes):
+        text = f'Queue {depth / 1024:.0f} kB (peak {peakDepth / 1024:.0f} kB)'
+        if spilledBytes > 0:
+            text += f', {spilledBytes / 1024:.0f} kB spilled'
+        if droppedBytes > 0:
+            text += f', {droppedBytes} bytes dropped'
+        self.lb_queueStatus.setText(text)
 
     @Slot()
     def copy(self):
         clipboard: QClipboard = QApplication.clipboard()
-        cursor = self.textEdit.textCursor()
+        text = self.filterViewport.text() if self.filterRows is not None else self.logView.text()
+        if len(text) > 0:
+            clipboard.setText(text)
 
-        if cursor.selection().isEmpty():
-            text = self.textEdit.toPlainText()
+    @Slot(list, object)
+    def appendLines(self, lines, timestamps=None, force=False):
+        if self.checkBox_enabled.isChecked() or force:
+            if self.tracer and timestamps is not None and len(timestamps) > 0:
+                self.tracer.stamp('delivered', timestamps[-1])
+            self.coalescer.append(lines, timestamps)
         else:
-            # copy selected text
-            text = cursor.selection().toPlainText()
+            self.pauseBuffer.append(lines, timestamps)
 
-        if len(text) > 0:
-            clipboard.setText(text)
+    @Slot(bool)
+    def setPaused(self, enabled):
+        if enabled:
+            self.pendingTimer.stop()
+            self.resume()
+        else:
+            self.pendingTimer.start()
+        self.showPending()
+
+    def resume(self):
+        # what came in while paused goes in as one batch, after what was already waiting for a flush;
+        # lines beyond the scrollback would be evicted right away and are not inserted at all
+        self.coalescer.flush()
+        limit = self.settings.scrollbackLimit if self.settings.scrollbackUnit == 'lines' else 0
+        lines, timestamps, sources = self.pauseBuffer.take(limit)
+        if len(lines) > 0:
+            self.insertPausedLines(lines, timestamps, sources)
+
+    def insertPausedLines(self, lines, timestamps, sources):
+        self.insertLines(lines, timestamps)
 
     @Slot()
-    def appendData(self, data, force=False):
-        if self.checkBox_enabled.isChecked() or force:
-            self.textEdit.moveCursor(QTextCursor.End)
-            self.textEdit.insertPlainText(data)
-            self.textEdit.ensureCursorVisible()
+    def showPending(self):
+        if len(self.pauseBuffer) > 0 or self.pauseBuffer.droppedLines > 0:
+            text = f'{len(self.pauseBuffer)} lines ({self.pauseBuffer.bytes / 1024:.0f} kB) pending'
+            if self.pauseBuffer.droppedLines > 0:
+                text += f', {self.pauseBuffer.droppedLines} dropped'
+            self.lb_pending.setText(text)
+        else:
+            self.lb_pending.setText('')
+
+    @Slot(list, object)
+    def insertLines(self, lines, timestamps=None):
+        start = receiveTimestamp()
+        if any(map(str.startswith, lines, repeat(RepeatCollapser.markerPrefix))):
+            lines, timestamps = self.foldRepeats(lines, timestamps)
+        elif len(lines) > 0:
+            self.repeatedLine = (self.logView.store.evictedLines + len(self.logView.store) + len(lines) - 1,
+                                 lines[-1])
+        if len(lines) > 0:
+            self.logView.insertLines(lines, timestamps)
+            self.matcher.matchLines(lines)
+            self.records.parseLines(lines)
+        self.linesAdded()
+        self.flushDuration.record((receiveTimestamp() - start) // 1000)
+        if timestamps is not None and len(timestamps) > 0:
+            self.paintPendingTimestamp = timestamps[-1]
+            if self.tracer:
+                self.tracer.stamp('inserted', timestamps[-1])
+
+    def foldRepeats(self, lines, timestamps):
+        # a repeat marker becomes a ×N counter on the line it follows; a line that is already shown
+        # is updated in place, a marker whose line is gone stays as it is
+        store = self.logView.store
+        folded_lines = []
+        folded_timestamps = array('q')
+        repeated_text = None  # of the last folded line, None if no marker applies to it
+        if timestamps is None:
+            timestamps = array('q', repeat(receiveTimestamp(), len(lines)))
+        for line, timestamp in zip(lines, timestamps):
+            count = RepeatCollapser.markerCount(line)
+            if count is None:
+                folded_lines.append(line)
+                folded_timestamps.append(timestamp)
+                repeated_text = line
+            elif repeated_text is not None:
+                folded_lines[-1] = f'{repeated_text} ×{count}'
+            elif len(folded_lines) == 0 and self.repeatedLine and \
+                    self.repeatedLine[0] == store.evictedLines + len(store) - 1:
+                self.replaceLastLine(f'{self.repeatedLine[1]} ×{count}')
+            else:
+                folded_lines.append(line)
+                folded_timestamps.append(timestamp)
+        if len(folded_lines) > 0:
+            self.repeatedLine = (store.evictedLines + len(store) + len(folded_lines) - 1, repeated_text) \
+                if repeated_text is not None else None
+        return folded_lines, folded_timestamps
+
+    def replaceLastLine(self, text):
+        # filters see the new text too, e.g. one for the counter
+        line = self.repeatedLine[0]
+        self.logView.replaceLastLine(text)
+        self.matcher.replaceLast(text)
+        self.records.replaceLast(text)
+        if self.filterRows is not None:
+            shown = len(self.filterRows) > 0 and self.filterRows[-1] == line
+            passes = len(self.filteredLines(line)) > 0
+            if shown and not passes:
+                self.filterRows.pop()
+            elif passes and not shown:
+                self.filterRows.append(line)
+            self.filterViewport.linesChanged()
+            self.showFilterCount()
+        if self.filterViewport:
+            self.filterViewport.lineChanged(line)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint and self.paintPendingTimestamp:
+            self.paintLatency.record((receiveTimestamp() - self.paintPendingTimestamp) // 1000)
+            if self.tracer:
+                self.tracer.stamp('painted', self.paintPendingTimestamp)
+            self.paintPendingTimestamp = 0
+        return super().eventFilter(watched, event)
+
+    def linesAdded(self):
+        self.matcher.dropEvicted()
+        self.records.dropEvicted()
+        if self.filterRows is not None:
+            self.filterRows.extend(self.filteredLines(self.filterEndLine))
+            self.filterEndLine = self.matcher.endLine
+            self.filterViewport.dropEvictedRows()
+            self.filterViewport.linesChanged()
+            self.showFilterCount()
+        self.search.notifyLinesAdded()
+        if self.searchResult:
+            self.showSearchPosition()
+
+    @Slot()
+    def focusSearch(self):
+        self.ed_search.setFocus()
+        self.ed_search.selectAll()
+
+    @Slot()
+    def startSearch(self):
+        self.searchTimer.stop()
+        self.searchResult = None
+        self.searchLine = None
+        try:
+            self.search.search(self.ed_search.text(), self.checkBox_searchRegex.isChecked(),
+                               self.checkBox_searchCaseSensitive.isChecked())
+        except re.error as e:
+            self.lb_searchResult.setText('Invalid regex')
+            self.lb_searchResult.setToolTip(str(e))
+            return
+        self.lb_searchResult.setText('')
+        self.lb_searchResult.setToolTip('')
+
+    @Slot(object)
+    def showSearchResult(self, result: SearchResult):
+        self.searchResult = result
+        if result.duration > 0:
+            self.lb_searchResult.setToolTip(f'Searched in {result.duration * 1000:.0f} ms')
+        self.showSearchPosition()
+
+    def validSearchMatches(self):
+        # matches in lines that were evicted meanwhile are skipped
+        return bisect_left(self.searchResult.lines, self.logView.store.evictedLines), len(self.searchResult.lines)
+
+    def showSearchPosition(self):
+        first, end = self.validSearchMatches()
+        if self.searchLine is not None and self.searchLine >= self.logView.store.evictedLines:
+            index = bisect_left(self.searchResult.lines, self.searchLine, first)
+            self.lb_searchResult.setText(f'{index - first + 1}/{end - first}')
+        else:
+            self.lb_searchResult.setText(f'{end - first} matches')
+
+    @Slot()
+    def searchNext(self):
+        if self.searchTimer.isActive():
+            self.startSearch()
+        if not self.searchResult:
+            return
+        first, end = self.validSearchMatches()
+        if first == end:
+            return
+        index = first
+        if self.searchLine is not None:
+            index = bisect_right(self.searchResult.lines, self.searchLine, first)
+            if index == end:
+                index = first  # wrap around
+        self.showSearchMatch(index)
+
+    @Slot()
+    def searchPrevious(self):
+        if not self.searchResult:
+            return
+        first, end = self.validSearchMatches()
+        if first == end:
+            return
+        index = end - 1
+        if self.searchLine is not None:
+            index = bisect_left(self.searchResult.lines, self.searchLine, first) - 1
+            if index < first:
+                index = end - 1  # wrap around
+        self.showSearchMatch(index)
+
+    def showSearchMatch(self, index):
+        self.searchLine = self.searchResult.lines[index]
+        if self.filterRows is not None:
+            self.filterViewport.showLine(self.searchLine)
+        else:
+            self.logView.showLine(self.searchLine)
+        self.showSearchPosition()
+
+    def filterPatterns(self):
+        return self.cb_filterInclude.currentText(), self.cb_filterExclude.currentText()
+
+    def updateMatcherPatterns(self, filterPatterns):
+        # raises re.error for invalid filter patterns
+        patterns = [pattern for pattern in filterPatterns if len(pattern) > 0 and not RecordStore.isQuery(pattern)]
+        for pattern in patterns:
+            re.compile(pattern)
+            if pattern in self.recentFilterPatterns:
+                self.recentFilterPatterns.remove(pattern)
+            self.recentFilterPatterns.insert(0, pattern)
+        del self.recentFilterPatterns[8:]
+        self.matcher.setPatterns(self.highlighterPatterns + self.recentFilterPatterns)
+
+    @Slot()
+    def applyFilter(self):
+        self.filterTimer.stop()
+        include, exclude = self.filterPatterns()
+        filtering = self.checkBox_filter.isChecked() and (len(include) > 0 or len(exclude) > 0)
+        self.lb_filterResult.setToolTip('')
+        if filtering:
+            try:
+                self.updateMatcherPatterns((include, exclude))
+            except re.error as e:
+                self.lb_filterResult.setText('Invalid regex')
+                self.lb_filterResult.setToolTip(str(e))
+                filtering = False
+
+        if filtering:
+            if self.filterViewport is None:
+                self.createFilterViewport()
+            self.activeFilter = (include, exclude)
+            self.matcher.matchStoredLines()
+            self.filterRows = self.filteredLines()
+            self.filterEndLine = self.matcher.endLine
+            self.filterViewport.setRowMap(self.filterRows)
+            self.showFilterCount()
+            self.showFieldCounts()
+        else:
+            self.activeFilter = ('', '')
+            self.filterRows = None
+            if self.filterViewport:
+                self.filterViewport.setRowMap(None)
+            if self.lb_filterResult.toolTip() == '':
+                self.lb_filterResult.setText('')
+        if self.filterViewport:
+            self.filterViewport.setVisible(filtering)
+        self.logView.widget().setVisible(not filtering)
+
+    def filteredLines(self, firstLine=None):
+        # absolute numbers of the lines passing the filter, from firstLine on;
+        # field queries like @level=ERROR are answered by the record store, regex patterns by the matcher
+        include, exclude = self.activeFilter
+        if not RecordStore.isQuery(include) and not RecordStore.isQuery(exclude):
+            return self.matcher.matchingLines(include, exclude, firstLine=firstLine)
+        self.records.parseStoredLines()
+        lines = self.selectLines(include, firstLine)
+        if exclude:
+            excluded = set(self.selectLines(exclude, firstLine))
+            lines = array('Q', [line for line in lines if line not in excluded])
+        return lines
+
+    def selectLines(self, pattern, firstLine):
+        if RecordStore.isQuery(pattern):
+            return self.records.matchingLines(pattern, firstLine or 0)
+        return self.matcher.matchingLines(pattern or None, firstLine=firstLine)
+
+    def showFieldCounts(self):
+        # the values of queried fields and their number of lines
+        tool_tips = []
+        for pattern in self.activeFilter:
+            if RecordStore.isQuery(pattern):
+                field = RecordStore.query.match(pattern).group(1)
+                counts = self.records.counts(field)
+                text = ', '.join(f'{value} {count}' for value, count in counts[:10])
+                if len(counts) > 10:
+                    text += f', {len(counts) - 10} more'
+                tool_tips.append(f'{field}: {text}' if counts else f'{field}: no values')
+        self.lb_filterResult.setToolTip('\n'.join(tool_tips))
+
+    def createFilterViewport(self):
+        layout = self.widget().layout()
+        self.filterViewport = LogViewport(self.logView.store, self.logView.highlighter, self.widget())
+        layout.insertWidget(layout.indexOf(self.logView.widget()) + 1, self.filterViewport)
+        self.filterViewport.hide()
+        self.filterViewport.setTimestampMode(self.settings.timestampMode)
+        self.filterViewport.viewport().installEventFilter(self)
 
+    def showFilterCount(self):
+        self.lb_filterResult.setText(f'{self.filterViewport.rowCount()} lines')
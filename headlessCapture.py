@@ -0,0 +1,228 @@
+import argparse
+import os
+import re
+import signal
+import sys
+import time
+from threading import Event, Lock
+from PySide6.QtCore import QSettings
+from debugOutput import SerialConnectionSettings, DebugOutputReceiver, DebugOutputDataProcessor
+from serialIoLoop import SerialIoLoop
+from captureWriter import CaptureWriter
+from lineStore import LineStore
+
+# logs serial ports without a display, e.g. on a test rack; uses the connections of the GUI's settings.ini
+# and no widget modules:  python headlessCapture.py [--port NAME ...] [--output DIR] [--include REGEX]
+
+
+class LineWriter:
+    # filters the lines of one port and writes them to its file or to a stream shared by all ports
+    def __init__(self, stream, lock: Lock, prefix='', include=None, exclude=None, timestamps=False, stopEvent=None):
+        self.stream = stream
+        self.lock = lock
+        self.prefix = prefix
+        self.include = include
+        self.exclude = exclude
+        self.timestamps = timestamps
+        self.stopEvent = stopEvent
+        self.lastSecond = None
+        self.lastSecondText = ''
+
+    def timestampText(self, timestamp):
+        # the time of day text only changes once per second
+        seconds, nanoseconds = divmod(timestamp + LineStore.wallClockOffset, 1000000000)
+        if seconds != self.lastSecond:
+            self.lastSecond = seconds
+            self.lastSecondText = time.strftime('%H:%M:%S', time.localtime(seconds))
+        return f'{self.lastSecondText}.{nanoseconds // 1000:06d} '
+
+    def write(self, lines, timestamps):
+        selected = range(len(lines))
+        if self.include:
+            selected = [i for i in selected if self.include.search(lines[i])]
+        if self.exclude:
+            selected = [i for i in selected if not self.exclude.search(lines[i])]
+        if len(selected) == 0:
+            return
+        if self.timestamps:
+            text = ''.join(f'{self.prefix}{self.timestampText(timestamps[i])}{lines[i]}\n' for i in selected)
+        elif self.prefix or len(selected) < len(lines):
+            text = ''.join(f'{self.prefix}{lines[i]}\n' for i in selected)
+        else:
+            text = '\n'.join(lines) + '\n'
+        try:
+            with self.lock:
+                self.stream.write(text)
+        except (BrokenPipeError, ValueError):
+            # reader is gone, e.g. piped into head
+            if self.stopEvent:
+                self.stopEvent.set()
+
+
+class CaptureProcessor(DebugOutputDataProcessor):
+    # there is no event loop, lines are written straight from the processing thread
+    def __init__(self, rawDataQueue, encoding, writer: LineWriter):
+        super().__init__(rawDataQueue, encoding)
+        self.writer = writer
+
+    def publishLines(self, lines, timestamps):
+        self.writer.write(lines, timestamps)
+
+
+class HeadlessCapture:
+    def __init__(self, connections, writers, ioLoop: SerialIoLoop = None):
+        self.ioLoop = ioLoop
+        self.ports = []  # (receiver, processor)
+        for settings, writer in zip(connections, writers):
+            receiver = DebugOutputReceiver(settings)
+            self.ports.append((receiver, CaptureProcessor(receiver.rxQueue, settings.encoding, writer)))
+
+    def start(self):
+        # ports that can't be opened are reported and skipped
+        opened = 0
+        for receiver, processor in self.ports:
+            if not receiver.open_port():
+                print(f'Failed to open {receiver.settings.portName}', file=sys.stderr)
+                receiver.close_port()
+                continue
+            if receiver.settings.capture.enabled:
+                receiver.captureWriter = CaptureWriter(receiver.settings.capture, receiver.settings.portName)
+                receiver.captureWriter.start()
+            if self.ioLoop:
+                self.ioLoop.register(receiver, processor)
+            else:
+                processor.start()
+                receiver.start()
+            opened += 1
+        return opened
+
+    def stop(self):
+        for receiver, processor in self.ports:
+            if receiver.serialPort is None:
+                continue
+            if self.ioLoop:
+                self.ioLoop.unregister(receiver)
+            receiver.stop()
+            receiver.close_port()
+            processor.stop()
+            if receiver.captureWriter:
+                receiver.captureWriter.stop()
+                if receiver.captureWriter.lastError:
+                    print(f'Capture of {receiver.settings.portName} stopped: {receiver.captureWriter.lastError}',
+                          file=sys.stderr)
+                receiver.captureWriter = None
+        if self.ioLoop:
+            self.ioLoop.stop()
+
+
+def loadConnections(settingsFile):
+    settings = QSettings(settingsFile, QSettings.Format.IniFormat)
+    connections = []
+    number_of_connections = settings.beginReadArray("connections")
+    for i in range(number_of_connections):
+        settings.setArrayIndex(i)
+        if 'debugOutput' in settings.allKeys():
+            connections.append(settings.value("debugOutput"))
+    settings.endArray()
+    return connections
+
+
+def selectConnections(connections, portNames, baudrate):
+    # ports that are not in the settings get default settings
+    if not portNames:
+        return connections
+    known = {settings.portName: settings for settings in connections}
+    selected = []
+    for port_name in portNames:
+        settings = known.get(port_name)
+        if settings is None:
+            settings = SerialConnectionSettings(port_name)
+            if baudrate:
+                settings.baudrate = baudrate
+        selected.append(settings)
+    return selected
+
+
+def parseArguments(arguments):
+    parser = argparse.ArgumentParser(description='Capture serial debug output without a GUI.')
+    parser.add_argument('--settings', default='settings.ini', help='settings file of the GUI (default: %(default)s)')
+    parser.add_argument('--port', dest='ports', action='append', help='port to capture, repeatable '
+                        '(default: all connections of the settings file)')
+    parser.add_argument('--baudrate', type=int, help='baudrate of ports that are not in the settings file')
+    parser.add_argument('--output', default='-', help="directory for one <port>.log per port, '-' for stdout "
+                        '(default: %(default)s)')
+    parser.add_argument('--include', help='only lines matching this regex')
+    parser.add_argument('--exclude', help='no lines matching this regex')
+    parser.add_argument('--timestamps', action='store_true', help='prefix lines with the receive time')
+    parser.add_argument('--duration', type=float, help='stop after this many seconds')
+    parser.add_argument('--engine', choices=['threads', 'selectors'],
+                        default='selectors' if SerialIoLoop.isSupported() else 'threads',
+                        help='selectors: one thread for all ports (posix only) (default: %(default)s)')
+    return parser.parse_args(arguments)
+
+
+def main(arguments):
+    args = parseArguments(arguments)
+    try:
+        include = re.compile(args.include) if args.include else None
+        exclude = re.compile(args.exclude) if args.exclude else None
+    except re.error as e:
+        print(f'Invalid regex: {e}', file=sys.stderr)
+        return 2
+
+    connections = selectConnections(loadConnections(args.settings), args.ports, args.baudrate)
+    if len(connections) == 0:
+        print(f'No ports given and no connections in {args.settings}', file=sys.stderr)
+        return 2
+
+    stop_event = Event()
+    streams = []
+    writers = []
+    stdout_lock = Lock()
+    for settings in connections:
+        if args.output == '-':
+            stream, lock = sys.stdout, stdout_lock
+            prefix = f'[{settings.portName}] ' if len(connections) > 1 else ''
+        else:
+            os.makedirs(args.output, exist_ok=True)
+            file_name = re.sub(r'[^\w.-]', '_', settings.portName).strip('_') + '.log'
+            stream, lock = open(os.path.join(args.output, file_name), 'a', encoding='utf-8'), Lock()
+            prefix = ''
+        streams.append(stream)
+        writers.append(LineWriter(stream, lock, prefix, include, exclude, args.timestamps, stop_event))
+
+    io_loop = None
+    if args.engine == 'selectors':
+        io_loop = SerialIoLoop()
+        io_loop.start()
+    capture = HeadlessCapture(connections, writers, io_loop)
+
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    if capture.start() == 0:
+        capture.stop()
+        return 1
+
+    deadline = time.monotonic() + args.duration if args.duration is not None else None
+    while not stop_event.wait(1.0 if deadline is None else max(0.0, min(1.0, deadline - time.monotonic()))):
+        for stream in streams:
+            try:
+                stream.flush()
+            except (BrokenPipeError, ValueError):
+                stop_event.set()
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+
+    capture.stop()
+    for stream in set(streams):
+        try:
+            stream.flush()
+            if stream is not sys.stdout:
+                stream.close()
+        except (BrokenPipeError, ValueError):
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
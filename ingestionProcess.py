@@ -0,0 +1,338 @@
+import errno
+import multiprocessing
+import os
+import struct
+import time
+from array import array
+from collections import deque
+from multiprocessing import shared_memory
+from threading import Thread, RLock
+from PySide6.QtCore import Signal, Slot
+from debugOutput import DebugOutput, DebugOutputReceiver, DebugOutputDataProcessor, SerialConnectionSettings
+from captureWriter import CaptureWriter
+
+
+class SharedLineRing:
+    # single producer, single consumer ring of line batches in shared memory;
+    # header: write position, read position, bytes received, number of reads,
+    # the receive queue's bytes queued, peak queued, spilled and dropped, the decode errors,
+    # then the errno that stopped the capture
+    header = struct.Struct('<QQQQQQQQQQ')
+    headerSize = 128
+    # record: payload length, number of lines, then one int64 timestamp per line and the '\n' joined utf-8 lines
+    record = struct.Struct('<II')
+    wrapMarker = 0xFFFFFFFF
+
+    def __init__(self, name=None, size=8 << 20):
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=SharedLineRing.headerSize + size)
+            SharedLineRing.header.pack_into(self.memory.buf, 0, *[0] * 10)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+        self.buffer = self.memory.buf
+        self.capacity = self.memory.size - SharedLineRing.headerSize
+
+    def close(self, unlink=False):
+        self.buffer = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+    def positions(self):
+        return SharedLineRing.header.unpack_from(self.buffer, 0)[:2]
+
+    def statistics(self):
+        return SharedLineRing.header.unpack_from(self.buffer, 0)[2:4]
+
+    def setStatistics(self, bytesReceived, numberOfReads):
+        struct.pack_into('<QQ', self.buffer, 16, bytesReceived, numberOfReads)
+
+    def queueStatistics(self):
+        return SharedLineRing.header.unpack_from(self.buffer, 0)[4:8]
+
+    def setQueueStatistics(self, depth, peakDepth, spilledBytes, droppedBytes):
+        struct.pack_into('<QQQQ', self.buffer, 32, depth, peakDepth, spilledBytes, droppedBytes)
+
+    def decodeErrors(self):
+        return SharedLineRing.header.unpack_from(self.buffer, 0)[8]
+
+    def setDecodeErrors(self, decodeErrors):
+        struct.pack_into('<Q', self.buffer, 64, decodeErrors)
+
+    def captureErrno(self):
+        return SharedLineRing.header.unpack_from(self.buffer, 0)[9]
+
+    def setCaptureErrno(self, number):
+        struct.pack_into('<Q', self.buffer, 72, number)
+
+    def maxRecordSize(self):
+        return self.capacity // 4
+
+    def write(self, lines, timestamps) -> bool:
+        # False if there is not enough free space, nothing is written then
+        payload = '\n'.join(lines).encode('utf-8')
+        size = (SharedLineRing.record.size + 8 * len(lines) + len(payload) + 7) & ~7
+        write_position, read_position = self.positions()
+        offset = write_position % self.capacity
+        padding = self.capacity - offset if offset + size > self.capacity else 0
+        if write_position + padding + size - read_position > self.capacity:
+            return False
+
+        if padding > 0:
+            # records are contiguous, the rest of the buffer is skipped
+            SharedLineRing.record.pack_into(self.buffer, SharedLineRing.headerSize + offset,
+                                            0, SharedLineRing.wrapMarker)
+            offset = 0
+        start = SharedLineRing.headerSize + offset
+        SharedLineRing.record.pack_into(self.buffer, start, len(payload), len(lines))
+        start += SharedLineRing.record.size
+        self.buffer[start:start + 8 * len(lines)] = timestamps.tobytes()
+        start += 8 * len(lines)
+        self.buffer[start:start + len(payload)] = payload
+        # published after the record is complete
+        struct.pack_into('<Q', self.buffer, 0, write_position + padding + size)
+        return True
+
+    def read(self):
+        # all complete records as (lines, timestamps); lines are decoded straight from the shared buffer
+        lines = []
+        timestamps = array('q')
+        write_position, read_position = self.positions()
+        while read_position < write_position:
+            offset = read_position % self.capacity
+            start = SharedLineRing.headerSize + offset
+            payload_length, line_count = SharedLineRing.record.unpack_from(self.buffer, start)
+            if line_count == SharedLineRing.wrapMarker:
+                read_position += self.capacity - offset
+                continue
+            start += SharedLineRing.record.size
+            timestamps.frombytes(self.buffer[start:start + 8 * line_count])
+            start += 8 * line_count
+            lines.extend(str(self.buffer[start:start + payload_length], 'utf-8', 'replace').split('\n'))
+            read_position += (SharedLineRing.record.size + 8 * line_count + payload_length + 7) & ~7
+        struct.pack_into('<Q', self.buffer, 8, read_position)
+        return lines, timestamps
+
+
+class RingWriter:
+    # worker side; lines that don't fit while the GUI is busy are kept until there is space again
+    def __init__(self, ring: SharedLineRing, connection, statistics, queue):
+        self.ring = ring
+        self.connection = connection
+        self.statistics = statistics
+        self.queue = queue
+        self.lineAssembler = None  # of the processor that writes
+        self.captureWriter = None
+        self.overflow = deque()
+        self.lock = RLock()
+
+    def writeLines(self, lines, timestamps):
+        # a record holds a line even if all of its characters take 4 bytes in utf-8
+        max_line_length = (self.ring.maxRecordSize() - 16) // 4
+        if any(len(line) > max_line_length for line in lines):
+            lines, timestamps = RingWriter.splitLongLines(lines, timestamps, max_line_length)
+        longest = max(map(len, lines), default=0)
+        max_lines = max(1, min(self.ring.maxRecordSize() // 256, self.ring.maxRecordSize() // (4 * longest + 9)))
+        with self.lock:
+            for i in range(0, len(lines), max_lines):
+                self.overflow.append((lines[i:i + max_lines], timestamps[i:i + max_lines]))
+            self.flush()
+
+    @staticmethod
+    def splitLongLines(lines, timestamps, maxLength):
+        # nothing is cut off, the rest of a long line goes on in the following lines
+        split_lines = []
+        split_timestamps = array('q')
+        for line, timestamp in zip(lines, timestamps):
+            pieces = [line[i:i + maxLength] for i in range(0, len(line), maxLength)] or [line]
+            split_lines.extend(pieces)
+            split_timestamps.extend([timestamp] * len(pieces))
+        return split_lines, split_timestamps
+
+    def flush(self):
+        with self.lock:
+            written = False
+            while len(self.overflow) > 0 and self.ring.write(*self.overflow[0]):
+                self.overflow.popleft()
+                written = True
+            self.ring.setStatistics(self.statistics.bytesReceived, self.statistics.numberOfReads)
+            self.ring.setQueueStatistics(*self.queue.statistics())
+            if self.lineAssembler:
+                self.ring.setDecodeErrors(self.lineAssembler.decodeErrors)
+            if self.captureWriter and self.captureWriter.lastError:
+                self.ring.setCaptureErrno(self.captureWriter.lastError.errno or errno.EIO)
+            if written:
+                self.connection.send_bytes(b'')
+
+
+class RingDataProcessor(DebugOutputDataProcessor):
+    # there is no event loop in the worker, lines go to the ring directly from the processing thread
+    def __init__(self, rawDataQueue, encoding, collapseRepeats, writer: RingWriter):
+        super().__init__(rawDataQueue, encoding, collapseRepeats)
+        self.writer = writer
+        self.writer.lineAssembler = self.lineAssembler
+
+    def publishLines(self, lines, timestamps):
+        self.writer.writeLines(lines, timestamps)
+
+
+def runIngestionWorker(settings: SerialConnectionSettings, ringName, connection):
+    # receiver, framing and capture of one port in a process of its own
+    ring = SharedLineRing(ringName)
+    receiver = DebugOutputReceiver(settings)
+    if not receiver.open_port():
+        connection.send(False)
+        ring.close()
+        return
+
+    if settings.capture.enabled:
+        receiver.captureWriter = CaptureWriter(settings.capture, settings.portName)
+        receiver.captureWriter.start()
+    writer = RingWriter(ring, connection, receiver.statistics, receiver.rxQueue)
+    writer.captureWriter = receiver.captureWriter
+    processor = RingDataProcessor(receiver.rxQueue, settings.encoding, settings.collapseRepeats, writer)
+    # the open result goes first, notifications of the first lines must not overtake it
+    connection.send(True)
+    processor.start()
+    receiver.start()
+
+    # waits for the stop request, retries lines that didn't fit meanwhile
+    while not connection.poll(0.05):
+        writer.flush()
+    receiver.stop()
+    receiver.close_port()
+    processor.stop()
+    if receiver.captureWriter:
+        receiver.captureWriter.stop()
+    while len(writer.overflow) > 0:
+        writer.flush()
+        time.sleep(0.01)
+    writer.flush()
+    connection.send(None)
+    ring.close()
+
+
+class DebugOutputProcess(DebugOutput):
+    # same interface as DebugOutput, the port is read by a worker process
+    dataNotified = Signal()
+    openReported = Signal(int, bool)  # start number, port opened
+
+    startTimeout = 10
+
+    def __init__(self, settings: SerialConnectionSettings):
+        super().__init__(settings)
+        self.ring: SharedLineRing = None
+        self.process = None
+        self.connection = None
+        self.notificationThread = None
+        self.notificationPending = False
+        self.queueStatistics = (0, 0, 0, 0)
+        self.decodeErrors = 0
+        self.captureErrno = 0
+        self.starts = 0  # a late open result of an earlier start is ignored
+        self.dataNotified.connect(self.readRing)
+        self.openReported.connect(self.finishStart)
+
+    def start(self):
+        # the worker imports and opens the port in the background, opened tells how that went
+        self.captureErrno = 0
+        self.starts += 1
+        context = multiprocessing.get_context('spawn')
+        self.ring = SharedLineRing()
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(target=runIngestionWorker, daemon=True,
+                                       args=(self.receiver.settings, self.ring.name, worker_connection))
+        self.process.start()
+        worker_connection.close()
+
+        self.notificationThread = Thread(target=self.receiveNotifications, args=(self.starts,), daemon=True)
+        self.notificationThread.start()
+        return True
+
+    @Slot(int, bool)
+    def finishStart(self, start, opened):
+        if start != self.starts or self.process is None:
+            return  # stopped meanwhile
+        if not opened:
+            # nothing to hand over yet, the worker doesn't get to wait for it
+            self.process.kill()
+            self.shutdown()
+        self.opened.emit(opened)
+
+    def receiveNotifications(self, start):
+        try:
+            opened = self.connection.poll(DebugOutputProcess.startTimeout) and self.connection.recv()
+        except (EOFError, OSError):
+            opened = False  # worker is gone
+        self.openReported.emit(start, bool(opened))
+        if not opened:
+            return
+        # blocks on the pipe, one queued signal at a time while the GUI catches up
+        try:
+            while self.connection.recv_bytes() == b'':
+                if not self.notificationPending:
+                    self.notificationPending = True
+                    self.dataNotified.emit()
+        except (EOFError, OSError):
+            pass
+
+    @Slot()
+    def readRing(self):
+        self.notificationPending = False
+        if self.ring is None:
+            return
+        lines, timestamps = self.ring.read()
+        if self.tracer and len(timestamps) > 0:
+            # read in the worker, the first stage seen here is the delivery to the window
+            self.tracer.sampleRead(timestamps[0])
+        self.receiver.statistics.bytesReceived, self.receiver.statistics.numberOfReads = self.ring.statistics()
+        if len(lines) > 0:
+            self.linesAvailable.emit(lines, timestamps)
+
+    def stop(self):
+        if self.process is None:
+            return
+        # the worker confirms with a message that ends the notification thread
+        try:
+            self.connection.send('stop')
+        except OSError:
+            pass  # worker is gone already
+        # keep reading, the worker may wait for space to hand over its last lines
+        while self.notificationThread.is_alive():
+            self.readRing()
+            self.notificationThread.join(0.05)
+        self.readRing()
+        self.shutdown()
+
+    def shutdown(self):
+        self.process.join(DebugOutputProcess.startTimeout)
+        if self.process.is_alive():
+            self.process.kill()
+        self.process = None
+        self.connection.close()
+        self.queueStatistics = self.ring.queueStatistics()
+        self.decodeErrors = self.ring.decodeErrors()
+        self.captureErrno = self.ring.captureErrno()
+        self.ring.close(unlink=True)
+        self.ring = None
+
+    def getQueueStatistics(self):
+        # as of the last read, the queue is in the worker
+        if self.ring is not None:
+            self.queueStatistics = self.ring.queueStatistics()
+        return self.queueStatistics
+
+    def getCaptureError(self):
+        # the capture writer is in the worker, only its errno comes through
+        if self.ring is not None:
+            self.captureErrno = self.ring.captureErrno()
+        return OSError(self.captureErrno, os.strerror(self.captureErrno)) if self.captureErrno else None
+
+    def getDecodeErrors(self):
+        if self.ring is not None:
+            self.decodeErrors = self.ring.decodeErrors()
+        return self.decodeErrors
+
+    def isActive(self):
+        return self.process is not None and self.process.is_alive()
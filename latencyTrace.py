@@ -0,0 +1,83 @@
+import csv
+from collections import deque
+from threading import Lock
+from lineStore import receiveTimestamp
+from portStatistics import Histogram
+
+
+class LatencyTrace:
+    # samples received chunks and stamps them at every stage on their way to the screen;
+    # a chunk is identified by its receive timestamp, which travels with the lines, so a stage
+    # only compares the newest timestamp of a batch with the oldest sample still waiting for it
+    stages = ['read', 'dequeued', 'framed', 'delivered', 'inserted', 'painted']
+    stageIndex = {stage: index for index, stage in enumerate(stages)}
+    maxPending = 10000
+
+    def __init__(self, sampleInterval=0.01, maxCompleted=100000):
+        self.sampleInterval = int(sampleInterval * 1e9)
+        self.lastSample = 0
+        self.pending = deque()  # per sample one timestamp per stage, 0 for stages the engine doesn't have
+        self.stamped = [0] * len(LatencyTrace.stages)  # per stage: leading pending samples that passed it
+        self.completed = deque(maxlen=maxCompleted)
+        self.histograms = {stage: Histogram() for stage in LatencyTrace.stages[1:] + ['total']}
+        self.lostSamples = 0  # never painted, e.g. in a hidden window
+        self.lock = Lock()
+
+    def sampleRead(self, timestamp):
+        # called for every chunk, only some are traced
+        if timestamp - self.lastSample < self.sampleInterval:
+            return
+        self.lastSample = timestamp
+        with self.lock:
+            if len(self.pending) >= LatencyTrace.maxPending:
+                self.pending.popleft()
+                self.stamped = [max(0, count - 1) for count in self.stamped]
+                self.lostSamples += 1
+            stamps = [0] * len(LatencyTrace.stages)
+            stamps[0] = timestamp
+            self.pending.append(stamps)
+
+    def stamp(self, stage, upTo):
+        # every sample received at or before upTo has passed the stage now
+        if len(self.pending) == 0:
+            return
+        index = LatencyTrace.stageIndex[stage]
+        with self.lock:
+            count = self.stamped[index]
+            if count >= len(self.pending) or self.pending[count][0] > upTo:
+                return
+            now = receiveTimestamp()
+            while count < len(self.pending) and self.pending[count][0] <= upTo:
+                self.pending[count][index] = now
+                count += 1
+            self.stamped[index] = count
+            if index == len(LatencyTrace.stages) - 1:
+                self.complete(count)
+
+    def complete(self, count):
+        for _ in range(count):
+            stamps = self.pending.popleft()
+            previous = stamps[0]
+            for stage, timestamp in zip(LatencyTrace.stages[1:], stamps[1:]):
+                if timestamp > 0:
+                    self.histograms[stage].record((timestamp - previous) // 1000)
+                    previous = timestamp
+            self.histograms['total'].record((stamps[-1] - stamps[0]) // 1000)
+            self.completed.append(stamps)
+        self.stamped = [max(0, stamped - count) for stamped in self.stamped]
+
+    def summary(self):
+        # (stage, samples, p50, p99, max) in microseconds, the time since the previous stage
+        with self.lock:
+            return [(stage, histogram.count, histogram.percentile(0.5), histogram.percentile(0.99), histogram.maximum)
+                    for stage, histogram in self.histograms.items()]
+
+    def writeCsv(self, writer: csv.writer, portName):
+        # one row per completed sample, absolute timestamps in ns
+        with self.lock:
+            completed = list(self.completed)
+        writer.writerows([portName] + stamps for stamps in completed)
+
+    @staticmethod
+    def csvHeader():
+        return ['port'] + [f'{stage}_ns' for stage in LatencyTrace.stages]
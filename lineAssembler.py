@@ -0,0 +1,70 @@
+import codecs
+from array import array
+from itertools import repeat
+from typing import List, Tuple
+
+
+class LineAssembler:
+    encodings = ['ascii', 'utf-8', 'latin-1']
+    partialLineTimeout = 0.2  # seconds the sender is idle before a partial line is flushed
+
+    def __init__(self, encoding='ascii'):
+        # undecodable bytes are replaced instead of dropping the whole chunk
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.partialLine = ''
+        self.partialLineTimestamp = 0
+        self.lines: List[str] = []
+        self.timestamps = array('q')
+        self.decodeErrors = 0  # replaced characters
+
+    def feed(self, data: bytes, timestamp=0):
+        # a line is stamped with the receive time of the chunk its first byte came in
+        first_timestamp = self.partialLineTimestamp if len(self.partialLine) > 0 else timestamp
+        decoded = self.decoder.decode(data)
+        if '\ufffd' in decoded:
+            self.decodeErrors += decoded.count('\ufffd')
+        text = self.partialLine + decoded
+        if '\n' not in text:
+            self.partialLine = text
+            self.partialLineTimestamp = first_timestamp
+            return
+
+        lines = text.split('\n')
+        self.partialLine = lines.pop()
+        self.partialLineTimestamp = timestamp
+        self.lines.extend(line[:-1] if line.endswith('\r') else line for line in lines)
+        self.timestamps.append(first_timestamp)
+        self.timestamps.extend(repeat(timestamp, len(lines) - 1))
+
+    def flushPartialLine(self, final=False):
+        # used when the sender is idle, e.g. for a prompt without line ending; the bytes of a character split
+        # by the pause stay in the decoder. final ends the data, e.g. on stop, incomplete bytes are replaced then
+        text = self.partialLine
+        if final:
+            decoded = self.decoder.decode(b'', final=True)
+            self.decodeErrors += decoded.count('\ufffd')
+            text += decoded
+        self.partialLine = ''
+        if len(text) > 0:
+            self.lines.append(text[:-1] if text.endswith('\r') else text)
+            self.timestamps.append(self.partialLineTimestamp)
+
+    def addLine(self, text, timestamp=0):
+        # a complete line from elsewhere, e.g. a marker; the partial line has to be flushed before
+        self.lines.append(text)
+        self.timestamps.append(timestamp)
+
+    def takeLines(self) -> Tuple[List[str], array]:
+        # complete lines and their receive timestamps
+        lines, timestamps = self.lines, self.timestamps
+        self.lines = []
+        self.timestamps = array('q')
+        return lines, timestamps
+
+    def reset(self):
+        self.decoder.reset()
+        self.partialLine = ''
+        self.partialLineTimestamp = 0
+        self.lines = []
+        self.timestamps = array('q')
+        self.decodeErrors = 0
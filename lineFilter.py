@@ -0,0 +1,142 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List
+
+# set bit positions of every byte value
+_bitPositions = [[bit for bit in range(8) if value & (1 << bit)] for value in range(256)]
+_nonZeroByte = re.compile(rb'[^\x00]')
+
+
+class LineMatcher:
+    # every line is matched once when it comes in against all rules (highlighter and filter patterns);
+    # the result is one bit per line and rule, filters only combine bitsets afterwards
+    scanBlockLines = 65536
+
+    def __init__(self, store):
+        self.store = store
+        self.firstLine = store.evictedLines & ~7  # line of bit 0 in all bitsets, byte aligned
+        self.endLine = store.evictedLines + len(store)  # lines up to here were matched
+        self.rules = {}  # pattern -> (compiled pattern, bytearray)
+
+    def setPatterns(self, patterns: List[str]):
+        # keeps the bitsets of known patterns, new ones are matched against the stored lines once;
+        # raises re.error for invalid patterns
+        rules = {}
+        for pattern in patterns:
+            if pattern in rules:
+                continue
+            rule = self.rules.get(pattern)
+            if rule is None:
+                rule = (re.compile(pattern, re.MULTILINE), bytearray((self.endLine - self.firstLine + 7) // 8))
+                self.scanStoredLines(rule)
+            rules[pattern] = rule
+        self.rules = rules
+
+    def scanStoredLines(self, rule):
+        self.scanLines([rule], max(self.firstLine, self.store.evictedLines), self.endLine)
+
+    def matchStoredLines(self):
+        # catches up with lines that were added to the store without matchLines, e.g. from a file
+        end_line = self.store.evictedLines + len(self.store)
+        if end_line <= self.endLine:
+            return
+        first = max(self.endLine, self.store.evictedLines)
+        self.endLine = end_line
+        size = (self.endLine - self.firstLine + 7) // 8
+        for _, bits in self.rules.values():
+            bits.extend(bytes(size - len(bits)))
+        self.scanLines(self.rules.values(), first, end_line)
+
+    def scanLines(self, rules, firstLine, endLine):
+        line = firstLine
+        while line < endLine:
+            first, data, offsets = self.store.textBlock(line, min(endLine, line + LineMatcher.scanBlockLines))
+            if len(data) == 0:
+                break
+            text = data.decode('utf-8', errors='replace')
+            for rule in rules:
+                self.matchText(rule, first, text, offsets, len(data))
+            line = first + len(offsets)
+
+    def matchText(self, rule, firstLine, text, offsets, size):
+        # offsets are line starts, only equal to character positions for ascii text
+        regex, bits = rule
+        if size != len(text):
+            offsets = array('Q', accumulate((len(line) + 1 for line in text.split('\n')[:len(offsets) - 1]), initial=0))
+        base = firstLine - self.firstLine
+        position = 0
+        while True:
+            match = regex.search(text, position)
+            if match is None:
+                return
+            row = bisect_right(offsets, match.start()) - 1
+            next_line = offsets[row + 1] if row + 1 < len(offsets) else len(text)
+            # a match across a line break is checked again against the line alone
+            if match.end() < next_line or regex.search(text[offsets[row]:next_line].rstrip('\r\n')):
+                bit = base + row
+                bits[bit >> 3] |= 1 << (bit & 7)
+            position = next_line
+            if position >= len(text):
+                return
+
+    def matchLines(self, lines: List[str]):
+        # lines that were just appended to the store
+        if len(lines) == 0:
+            return
+        first = self.endLine
+        self.endLine += len(lines)
+        size = (self.endLine - self.firstLine + 7) // 8
+        text = '\n'.join(lines) + '\n'
+        offsets = None
+        for rule in self.rules.values():
+            rule[1].extend(bytes(size - len(rule[1])))
+            if offsets is None:
+                offsets = array('Q', accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+            self.matchText(rule, first, text, offsets, len(text))
+
+    def replaceLast(self, text):
+        # the newest line changed in place, e.g. by a repeat counter; it is matched again
+        if self.endLine <= self.store.evictedLines:
+            return
+        line = self.endLine - 1
+        bit = line - self.firstLine
+        for rule in self.rules.values():
+            rule[1][bit >> 3] &= ~(1 << (bit & 7))
+            self.matchText(rule, line, text + '\n', array('Q', [0]), len(text) + 1)
+
+    def dropEvicted(self):
+        # bitsets keep pace with the store, whole bytes are cut off the front
+        cut = (self.store.evictedLines - self.firstLine) // 8
+        if cut < 4096:
+            return
+        for _, bits in self.rules.values():
+            del bits[:cut]
+        self.firstLine += cut * 8
+
+    def clear(self):
+        self.firstLine = self.store.evictedLines & ~7
+        self.endLine = self.store.evictedLines + len(self.store)
+        for pattern, (regex, _) in self.rules.items():
+            self.rules[pattern] = (regex, bytearray((self.endLine - self.firstLine + 7) // 8))
+
+    def matchingLines(self, include: str = None, exclude: str = None, firstLine=None):
+        # absolute numbers of stored lines from firstLine on matching include (all if None) and not exclude
+        first = max(self.store.evictedLines, self.firstLine if firstLine is None else firstLine)
+        start = (first - self.firstLine) // 8
+        count = self.endLine - self.firstLine - start * 8
+        if count <= 0:
+            return array('Q')
+        mask = (1 << count) - 1
+        selected = int.from_bytes(self.rules[include][1][start:], 'little') if include else mask
+        if exclude:
+            selected &= ~int.from_bytes(self.rules[exclude][1][start:], 'little')
+        data = (selected & mask).to_bytes((count + 7) // 8, 'little')
+
+        lines = array('Q')
+        base = self.firstLine + start * 8
+        for match in _nonZeroByte.finditer(data):
+            line = base + match.start() * 8
+            lines.extend([line + bit for bit in _bitPositions[data[match.start()]]])
+        return lines[bisect_left(lines, first):]
@@ -0,0 +1,77 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import count, repeat
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from lineAssembler import LineAssembler
+from lineStore import receiveTimestamp
+
+
+class MergeInput(QObject):
+    # slot object per source, lines emitted by the receiving threads get queued to the merger's thread
+    def __init__(self, merger, source):
+        super().__init__(merger)
+        self.merger = merger
+        self.source = source
+
+    @Slot(list, object)
+    def addLines(self, lines, timestamps):
+        self.merger.addLines(self.source, lines, timestamps)
+
+
+class LineMerger(QObject):
+    # interleaves the lines of several sources by receive timestamp; lines are held back for the
+    # reorder window, everything older than that is final and merged from the per source runs
+    linesAvailable = Signal(list, object, object)  # lines, array('q') timestamps, array('B') source indexes
+    # a partial line comes after the sender was idle for the partial line timeout, stamped with the time of
+    # its first chunk; a shorter window would always count it as late and append it out of order
+    minimumReorderWindow = LineAssembler.partialLineTimeout + 0.05
+
+    def __init__(self, sourceCount, reorderWindow=0.25, parent=None):
+        super().__init__(parent)
+        self.pending = [([], array('q')) for _ in range(sourceCount)]
+        self.inputs = [MergeInput(self, source) for source in range(sourceCount)]
+        self.reorderWindow = int(max(reorderWindow, LineMerger.minimumReorderWindow) * 1e9)
+        self.lateLines = 0  # came in after newer lines were emitted already
+
+        self.lastEmittedTimestamp = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def addLines(self, source, lines, timestamps):
+        # timestamps of one source are in order
+        pending_lines, pending_timestamps = self.pending[source]
+        pending_lines.extend(lines)
+        pending_timestamps.extend(timestamps)
+        if not self.timer.isActive():
+            self.timer.start(self.reorderWindow // 1000000)
+
+    def flush(self, everything=False):
+        watermark = receiveTimestamp() - self.reorderWindow
+        runs = []
+        for source, (lines, timestamps) in enumerate(self.pending):
+            cut = len(timestamps) if everything else bisect_right(timestamps, watermark)
+            if cut > 0:
+                runs.append((source, lines[:cut], timestamps[:cut]))
+                self.lateLines += bisect_left(timestamps, self.lastEmittedTimestamp, 0, cut)
+                del lines[:cut]
+                del timestamps[:cut]
+
+        if len(runs) == 1:
+            source, lines, timestamps = runs[0]
+            self.emitLines(lines, timestamps, array('B', repeat(source, len(lines))))
+        elif len(runs) > 1:
+            # the counter breaks ties within a source without comparing the lines
+            merged = heapq.merge(*(zip(timestamps, repeat(source), count(), lines)
+                                   for source, lines, timestamps in runs))
+            timestamps, sources, _, lines = zip(*merged)
+            self.emitLines(list(lines), array('q', timestamps), array('B', sources))
+
+        waiting = [timestamps[0] for _, timestamps in self.pending if len(timestamps) > 0]
+        if len(waiting) > 0:
+            self.timer.start(max(0, (min(waiting) - watermark) // 1000000 + 1))
+
+    def emitLines(self, lines, timestamps, sources):
+        self.lastEmittedTimestamp = timestamps[-1]
+        self.linesAvailable.emit(lines, timestamps, sources)
@@ -0,0 +1,287 @@
+import re
+import time
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from threading import Thread, Condition
+from PySide6.QtCore import QObject, Signal
+
+try:
+    from re import _parser
+except ImportError:
+    # python < 3.11
+    import sre_parse as _parser
+
+
+def requiredLiterals(pattern: str):
+    # literal runs every match of the regex has to contain, used to skip blocks via the index
+    def collect(parsed):
+        runs = []
+        current = ''
+        for op, av in parsed:
+            if op is _parser.LITERAL:
+                current += chr(av)
+                continue
+            runs.append(current)
+            current = ''
+            if op is _parser.SUBPATTERN:
+                runs += collect(av[-1])
+            elif op in (_parser.MAX_REPEAT, _parser.MIN_REPEAT) and av[0] >= 1:
+                runs += collect(av[2])
+        runs.append(current)
+        return runs
+
+    try:
+        return [run for run in collect(_parser.parse(pattern)) if len(run) > 0]
+    except (re.error, RecursionError):
+        return []
+
+
+def matchesAsBytes(pattern: str, flags):
+    # True if the regex finds the same lines in the utf-8 bytes as in the text: ascii literals and sets only;
+    # '.', \w, \b, negated sets and the like would see the bytes of a character one by one, and ignoring
+    # case i, k and s match non ascii characters too (ı, K, ſ)
+    repeats = (_parser.MAX_REPEAT, _parser.MIN_REPEAT, getattr(_parser, 'POSSESSIVE_REPEAT', None))
+
+    def isAscii(character, ignoreCase):
+        return character < 128 and not (ignoreCase and chr(character).lower() in 'iks')
+
+    def check(parsed, ignoreCase):
+        for op, av in parsed:
+            if op is _parser.LITERAL:
+                if not isAscii(av, ignoreCase):
+                    return False
+            elif op is _parser.IN:
+                for item_op, item in av:
+                    if item_op is _parser.LITERAL:
+                        if not isAscii(item, ignoreCase):
+                            return False
+                    elif item_op is _parser.RANGE:
+                        if not all(isAscii(character, ignoreCase) for character in range(item[0], item[1] + 1)):
+                            return False
+                    else:
+                        return False
+            elif op is _parser.SUBPATTERN:
+                if av[1] or av[2] or not check(av[3], ignoreCase):
+                    return False
+            elif op is _parser.BRANCH:
+                if not all(check(branch, ignoreCase) for branch in av[1]):
+                    return False
+            elif op in repeats:
+                if not check(av[2], ignoreCase):
+                    return False
+            elif op in (_parser.ASSERT, _parser.ASSERT_NOT):
+                if not check(av[1], ignoreCase):
+                    return False
+            elif op is _parser.AT:
+                if av in (_parser.AT_BOUNDARY, _parser.AT_NON_BOUNDARY):
+                    return False
+            elif op is not _parser.GROUPREF:
+                return False
+        return True
+
+    try:
+        parsed = _parser.parse(pattern, flags)
+        return check(parsed, bool((flags | parsed.state.flags) & re.IGNORECASE))
+    except (re.error, RecursionError):
+        return False
+
+
+class BlockTrigramIndex:
+    # one bloom filter per block of lines over the trigrams of all words in the block,
+    # about 4 bytes per line; a block is only scanned if it may contain all query trigrams
+    blockLines = 4096
+    bloomBits = 1 << 17
+    wordPattern = re.compile(rb'\w{3,}')
+
+    def __init__(self):
+        self.blooms = {}
+        self.nextBlock = 0
+
+    @staticmethod
+    def trigramHashes(data: bytes):
+        trigrams = set()
+        # logs repeat the same words a lot, deduplicating keeps the python loops short
+        for word in set(BlockTrigramIndex.wordPattern.findall(data.lower())):
+            trigrams.update([word[i:i + 3] for i in range(len(word) - 2)])
+        bits = BlockTrigramIndex.bloomBits
+        return {(int.from_bytes(trigram, 'little') * 2654435761 >> 7) % bits for trigram in trigrams}
+
+    def addBlock(self, block, data: bytes):
+        bloom = bytearray(BlockTrigramIndex.bloomBits // 8)
+        for h in BlockTrigramIndex.trigramHashes(data):
+            bloom[h >> 3] |= 1 << (h & 7)
+        self.blooms[block] = bloom
+
+    def mayContain(self, block, hashes):
+        bloom = self.blooms.get(block)
+        if bloom is None:
+            return True  # not indexed (yet)
+        return all(bloom[h >> 3] & (1 << (h & 7)) for h in hashes)
+
+    def dropBlocksBefore(self, line):
+        for block in [b for b in self.blooms if (b + 1) * BlockTrigramIndex.blockLines <= line]:
+            del self.blooms[block]
+
+
+class SearchQuery:
+    def __init__(self, text, regex=False, caseSensitive=False):
+        self.text = text
+        self.regex = regex
+        self.caseSensitive = caseSensitive
+
+        pattern = text if regex else re.escape(text)
+        flags = re.MULTILINE if caseSensitive else re.MULTILINE | re.IGNORECASE
+        # raises re.error for invalid patterns
+        self.pattern = re.compile(pattern, flags)
+        # searches the stored bytes without decoding them, None if the text has to be searched
+        self.bytesPattern = None
+        if matchesAsBytes(pattern, flags):
+            try:
+                self.bytesPattern = re.compile(pattern.encode('utf-8'), flags)
+            except re.error:
+                pass  # e.g. \u escapes, bytes patterns don't have them
+
+        literals = requiredLiterals(text) if regex else [text]
+        # lowered like the indexed blocks, ascii only
+        words = BlockTrigramIndex.wordPattern.findall(' '.join(literals).encode('utf-8').lower())
+        self.trigramHashes = BlockTrigramIndex.trigramHashes(b' '.join(words))
+
+
+class SearchResult:
+    def __init__(self, query: SearchQuery, lines: array, duration: float):
+        self.query = query
+        self.lines = lines  # absolute line numbers, sorted
+        self.duration = duration
+
+
+class LineSearch(QObject):
+    resultsReady = Signal(object)
+
+    liveUpdateInterval = 0.25
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.index = BlockTrigramIndex()
+        self.condition = Condition()
+        self.query = None
+        self.queryChanged = False
+        self.linesAdded = False
+        self.running = True
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def search(self, text, regex=False, caseSensitive=False):
+        query = SearchQuery(text, regex, caseSensitive) if len(text) > 0 else None
+        with self.condition:
+            self.query = query
+            self.queryChanged = True
+            self.condition.notify()
+
+    def notifyLinesAdded(self):
+        with self.condition:
+            self.linesAdded = True
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+
+    def endLine(self):
+        return self.store.evictedLines + len(self.store)
+
+    def run(self):
+        query = None
+        lines = array('Q')
+        searched_up_to = 0
+        last_emit = 0.0
+
+        while True:
+            with self.condition:
+                while self.running and not self.queryChanged and not self.linesAdded:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                query_changed = self.queryChanged
+                query = self.query
+                self.queryChanged = False
+                self.linesAdded = False
+
+            self.updateIndex()
+
+            if query_changed:
+                start = time.perf_counter()
+                lines = array('Q')
+                searched_up_to = self.store.evictedLines
+                if query:
+                    searched_up_to = self.scan(query, searched_up_to, self.endLine(), lines)
+                if query is self.query:
+                    self.resultsReady.emit(SearchResult(query, array('Q', lines), time.perf_counter() - start))
+                    last_emit = time.monotonic()
+            elif query:
+                # keep results up to date while lines come in
+                found = len(lines)
+                searched_up_to = self.scan(query, searched_up_to, self.endLine(), lines)
+                if len(lines) > found and query is self.query:
+                    wait = last_emit + LineSearch.liveUpdateInterval - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    self.resultsReady.emit(SearchResult(query, array('Q', lines), 0.0))
+                    last_emit = time.monotonic()
+
+    def updateIndex(self):
+        block_lines = BlockTrigramIndex.blockLines
+        self.index.dropBlocksBefore(self.store.evictedLines)
+        self.index.nextBlock = max(self.index.nextBlock, self.store.evictedLines // block_lines)
+
+        # only complete blocks are indexed, the last one is always scanned
+        while (self.index.nextBlock + 1) * block_lines <= self.endLine():
+            block = self.index.nextBlock
+            _, data, _ = self.store.textBlock(block * block_lines, (block + 1) * block_lines)
+            self.index.addBlock(block, data)
+            self.index.nextBlock += 1
+
+    def scan(self, query: SearchQuery, firstLine, endLine, lines: array):
+        block_lines = BlockTrigramIndex.blockLines
+        line = firstLine
+        while line < endLine:
+            block = line // block_lines
+            block_end = min(endLine, (block + 1) * block_lines)
+            if self.queryChanged or not self.running:
+                return line  # abandoned, a new query follows
+            if self.index.mayContain(block, query.trigramHashes):
+                self.scanBlock(query, line, block_end, lines)
+            line = block_end
+        return max(line, firstLine)
+
+    def scanBlock(self, query: SearchQuery, firstLine, endLine, lines: array):
+        first, data, offsets = self.store.textBlock(firstLine, endLine)
+        pattern = query.bytesPattern
+        if pattern is None:
+            # searched as text like the matcher does, line starts move by the multi-byte characters
+            pattern = query.pattern
+            size = len(data)
+            data = data.decode('utf-8', errors='replace')
+            if size != len(data):
+                offsets = array('Q', accumulate((len(line) + 1 for line in data.split('\n')[:len(offsets) - 1]),
+                                                initial=0))
+        position = 0
+        while True:
+            match = pattern.search(data, position)
+            if match is None:
+                return
+            row = bisect_right(offsets, match.start()) - 1
+            next_line = offsets[row + 1] if row + 1 < len(offsets) else len(data)
+            # a match across a line break is checked again against the line alone
+            line = data[offsets[row]:next_line]
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', errors='replace')
+            if match.end() < next_line or query.pattern.search(line.rstrip('\r\n')):
+                lines.append(first + row)
+            position = next_line
+            if position >= len(data):
+                return
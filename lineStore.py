@@ -0,0 +1,148 @@
+import time
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, repeat
+from threading import Lock
+from typing import List
+
+
+def receiveTimestamp():
+    # monotonic and high resolution, in nanoseconds
+    return time.perf_counter_ns()
+
+
+class LineStore:
+    units = ['lines', 'bytes']
+    timestampModes = ['none', 'time', 'relative', 'delta']
+    # the receive timestamps have no epoch, the offset to the wall clock is taken once
+    wallClockOffset = time.time_ns() - receiveTimestamp()
+
+    def __init__(self, sourceNames: List[str] = None):
+        # all lines utf-8 encoded and '\n' terminated in one buffer, offsets[i] is the start of line i
+        self.buffer = bytearray()
+        self.offsets = array('Q')
+        self.timestamps = array('q')  # receive timestamp of each line, next to offsets
+        self.timeOrigin = None  # timestamp of the first line, for relative times
+        # stores of merged views keep the index of the source of each line too
+        self.sourceNames = sourceNames
+        self.sources = array('B') if sourceNames is not None else None
+        self.head = 0  # number of evicted lines still at the front of buffer/offsets
+        self.evictedLines = 0  # absolute number of the first stored line
+        self.limit = 0
+        self.unit = 'lines'
+        # held while the buffer changes, readers in other threads (search) take it too
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.offsets) - self.head
+
+    def setLimit(self, limit, unit='lines'):
+        if unit not in LineStore.units:
+            raise Exception(f"Unknown limit unit {unit}")
+        self.limit = limit
+        self.unit = unit
+
+    def append(self, lines: List[str], timestamps: array = None, sources: array = None):
+        if len(lines) == 0:
+            return
+        encoded = [line.encode('utf-8') for line in lines]
+        if timestamps is None:
+            timestamps = repeat(receiveTimestamp(), len(lines))
+        with self.lock:
+            self.timestamps.extend(timestamps)
+            if self.sources is not None:
+                self.sources.extend(sources)
+            if self.timeOrigin is None:
+                self.timeOrigin = self.timestamps[self.head]
+            self.offsets.extend(accumulate((len(data) + 1 for data in encoded[:-1]), initial=len(self.buffer)))
+            self.buffer += b'\n'.join(encoded)
+            self.buffer += b'\n'
+
+    def replaceLast(self, text):
+        # the newest line changes in place, e.g. for a repeat counter; its timestamp stays
+        if len(self) == 0:
+            return
+        with self.lock:
+            del self.buffer[self.offsets[-1]:]
+            self.buffer += text.encode('utf-8')
+            self.buffer += b'\n'
+
+    def line(self, index) -> str:
+        i = self.head + index
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(self.buffer)
+        return self.buffer[self.offsets[i]:end - 1].decode('utf-8')
+
+    def timestamp(self, index):
+        return self.timestamps[self.head + index]
+
+    def sourceIndex(self, index):
+        return self.sources[self.head + index]
+
+    def timestampText(self, index, mode):
+        timestamp = self.timestamps[self.head + index]
+        if mode == 'time':
+            seconds, nanoseconds = divmod(timestamp + LineStore.wallClockOffset, 1000000000)
+            return time.strftime('%H:%M:%S', time.localtime(seconds)) + f'.{nanoseconds // 1000:06d}'
+        if mode == 'delta':
+            previous = self.timestamps[self.head + index - 1] if self.head + index > 0 else timestamp
+            return f'+{(timestamp - previous) / 1e9:.6f}'
+        return f'{(timestamp - self.timeOrigin) / 1e9:.6f}'
+
+    def lines(self, start=0, end=None) -> List[str]:
+        end = len(self) if end is None else end
+        return [self.line(i) for i in range(start, end)]
+
+    def textBlock(self, firstLine, lastLine):
+        # raw bytes and line start offsets (relative to the bytes) of absolute lines [firstLine, lastLine)
+        with self.lock:
+            first = max(firstLine, self.evictedLines)
+            last = min(lastLine, self.evictedLines + len(self))
+            if first >= last:
+                return first, b'', array('Q')
+            start = self.offsets[self.head + first - self.evictedLines]
+            i = self.head + last - self.evictedLines
+            end = self.offsets[i] if i < len(self.offsets) else len(self.buffer)
+            offsets = self.offsets[self.head + first - self.evictedLines:i]
+            return first, bytes(self.buffer[start:end]), array('Q', (offset - start for offset in offsets))
+
+    def byteSize(self):
+        return len(self.buffer) - self.offsets[self.head] if len(self) > 0 else 0
+
+    def excessLines(self):
+        # number of lines to evict from the front to get back within the limit
+        if self.limit <= 0:
+            return 0
+        if self.unit == 'lines':
+            return max(0, len(self) - self.limit)
+        if self.byteSize() <= self.limit:
+            return 0
+        return bisect_left(self.offsets, len(self.buffer) - self.limit, self.head) - self.head
+
+    def removeFirst(self, count):
+        count = min(count, len(self))
+        if count <= 0:
+            return
+        with self.lock:
+            self.head += count
+            self.evictedLines += count
+
+            # compact once at least half of the buffer is dead, amortized O(1) per line
+            if self.head > 1024 and self.head * 2 > len(self.offsets):
+                cut = self.offsets[self.head] if self.head < len(self.offsets) else len(self.buffer)
+                del self.buffer[:cut]
+                self.offsets = array('Q', (offset - cut for offset in self.offsets[self.head:]))
+                self.timestamps = self.timestamps[self.head:]
+                if self.sources is not None:
+                    self.sources = self.sources[self.head:]
+                self.head = 0
+
+    def clear(self):
+        with self.lock:
+            self.evictedLines += len(self)
+            self.buffer = bytearray()
+            self.offsets = array('Q')
+            self.timestamps = array('q')
+            if self.sources is not None:
+                self.sources = array('B')
+            self.timeOrigin = None
+            self.head = 0
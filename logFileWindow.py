@@ -0,0 +1,58 @@
+import os
+from PySide6.QtCore import Slot, QTimer
+from PySide6.QtGui import QClipboard
+from PySide6.QtWidgets import QApplication, QPushButton
+from debugOutputWindow import DebugOutputWindow, DebugOutputWindowSettings
+from mappedLineStore import MappedLineStore
+
+
+class LogFileWindow(DebugOutputWindow):
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.store = MappedLineStore(fileName)
+
+        settings = DebugOutputWindowSettings()
+        settings.viewMode = 'list'
+        settings.scrollbackLimit = 0
+        super().__init__(os.path.basename(fileName), settings, self.store)
+
+        # nothing is received, the file content can't be cleared
+        self.widget().findChild(QPushButton, 'pb_clear').hide()
+        self.checkBox_enabled.hide()
+        self.cb_timestamps.hide()  # files have no receive timestamps
+
+        # the index grows in the background, the view picks up new lines periodically
+        self.indexTimer = QTimer(self)
+        self.indexTimer.setInterval(200)
+        self.indexTimer.timeout.connect(self.refreshIndex)
+        self.indexTimer.start()
+        self.store.start()
+        self.refreshIndex()
+
+    @Slot()
+    def refreshIndex(self):
+        self.logView.publishLines(self.store.indexedLines)
+        if self.filterRows is not None:
+            self.matcher.matchStoredLines()
+        self.linesAdded()
+
+        title = os.path.basename(self.fileName)
+        if self.store.isIndexComplete():
+            self.indexTimer.stop()
+            self.setWindowTitle(f'{title} ({len(self.store)} lines)')
+        else:
+            self.setWindowTitle(f'{title} (indexing {self.store.indexProgress()}%)')
+
+    @Slot()
+    def copy(self):
+        # copying a whole multi gigabyte file to the clipboard is never intended
+        text = self.logView.text(selectionOnly=True)
+        if len(text) > 0:
+            clipboard: QClipboard = QApplication.clipboard()
+            clipboard.setText(text)
+
+    def closeEvent(self, event):
+        self.indexTimer.stop()
+        # the search thread reads the mapped file until it is stopped
+        super().closeEvent(event)
+        self.store.close()
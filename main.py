@@ -1,11 +1,14 @@
 import sys
-from application import Application
 
 # check minimum python version
 MIN_PYTHON = (3, 11)
 if sys.version_info < MIN_PYTHON:
     sys.exit("Python %s.%s or later is required." % MIN_PYTHON)
 
-# start application
-app = Application(sys.argv)
-sys.exit(app.exec())
+# ingestion worker processes import this module again, they must not start the application
+if __name__ == '__main__':
+    from application import Application
+
+    # start application
+    app = Application(sys.argv)
+    sys.exit(app.exec())
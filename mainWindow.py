@@ -1,24 +1,30 @@
-from PySide6.QtWidgets import QMdiArea, QMainWindow, QPushButton
-from PySide6.QtCore import QSettings, QSize, QPoint, Signal
+from PySide6.QtWidgets import QMdiArea, QMainWindow, QPushButton, QFileDialog, QMessageBox
+from PySide6.QtCore import Qt, QSettings, QSize, QPoint, Signal
 
 from typing import List
 
 from debugOutput import SerialConnectionSettings
 from ui.uiFileHelper import createWidgetFromUiFile
-from debugOutputWindow import DebugOutputWindow
-from createDebugOutputDialog import CreateDebugOutputDialog
-from text_highlighter.textHightlighterSettingsDialog import TextHighlighterSettingsDialog
+from debugOutputWindow import DebugOutputWindow, DebugOutputWindowSettings
 from text_highlighter.textHighlighter import TextHighlighterConfig
 
+# dialogs, file and merged views and the statistics panel are imported when they are first used
+
 
 class MainWindow(QMainWindow):
     signal_showDebugOutputCreateDialog = Signal()
-    signal_createDebugOutput = Signal(str, SerialConnectionSettings)
+    signal_createDebugOutput = Signal(str, SerialConnectionSettings, DebugOutputWindowSettings)
     signal_clearAll = Signal()
     signal_connectionStateChanged = Signal(bool)
     signal_aboutToBeClosed = Signal()
     signal_editHighlighterSettings = Signal()
     signal_applyHighlighterSettings = Signal(object)
+    signal_openLogFile = Signal(str)
+    signal_showMergedViewDialog = Signal()
+    signal_createMergedView = Signal(list, float)
+    signal_exportStatistics = Signal(str)
+    signal_latencyTracingChanged = Signal(bool)
+    signal_dumpLatencyTrace = Signal(str)
 
     def __init__(self):
         super(MainWindow, self).__init__()
@@ -29,7 +35,12 @@ class MainWindow(QMainWindow):
         self.mdiArea = widget.findChild(QMdiArea, 'mdiArea')
         self.pb_changeConnectionState: QPushButton = widget.findChild(QPushButton, 'pb_changeConnectionState')
 
+        self.pb_statistics: QPushButton = widget.findChild(QPushButton, 'pb_statistics')
+
         self.setCentralWidget(widget)
+
+        self.statisticsPanel = None
+        self.latencyTracing = False
         self.setConnectionState(False)
         self.loadSettings()
 
@@ -38,8 +49,12 @@ class MainWindow(QMainWindow):
         widget.pb_clear.clicked.connect(self.signal_clearAll)
         widget.pb_changeConnectionState.clicked.connect(self.signal_connectionStateChanged)
         widget.pb_highlighter.clicked.connect(self.signal_editHighlighterSettings)
+        widget.pb_openLogFile.clicked.connect(self.showOpenLogFileDialog)
+        widget.pb_mergedView.clicked.connect(self.signal_showMergedViewDialog)
+        widget.pb_statistics.clicked.connect(self.showStatisticsPanel)
 
     def showDebugOutputCreateDialog(self, disabled_ports: list):
+        from createDebugOutputDialog import CreateDebugOutputDialog
         dialog = CreateDebugOutputDialog(self)
         dialog.disablePorts(disabled_ports)
         if dialog.exec():
@@ -50,18 +65,91 @@ class MainWindow(QMainWindow):
                 settings.bytesize = dialog.getDataBits()
                 settings.parity = dialog.getParity()
                 settings.stopbits = dialog.getStopBits()
+                settings.encoding = dialog.getEncoding()
+                settings.receiveQueueSize = dialog.getReceiveQueueSize()
+                settings.receiveQueuePolicy = dialog.getReceiveQueuePolicy()
+                settings.collapseRepeats = dialog.getCollapseRepeats()
+                settings.capture = dialog.getCaptureSettings()
 
-                self.signal_createDebugOutput.emit(dialog.getName(), settings)
+                self.signal_createDebugOutput.emit(dialog.getName(), settings, dialog.getViewSettings())
 
-    def createDebugOutputView(self, viewTitle: str, size: QSize = None):
-        view = DebugOutputWindow(viewTitle)
+    def createDebugOutputView(self, viewTitle: str, viewSettings: DebugOutputWindowSettings = None,
+                              size: QSize = None):
+        view = DebugOutputWindow(viewTitle, viewSettings)
         if size:
             view.resize(size)
         self.mdiArea.addSubWindow(view)
         view.show()
         return view
 
+    def showOpenLogFileDialog(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Open Log File", "",
+                                                   "Log files (*.log *.txt);;All files (*)")
+        if file_name:
+            self.signal_openLogFile.emit(file_name)
+
+    def createLogFileView(self, fileName: str):
+        from logFileWindow import LogFileWindow
+        try:
+            view = LogFileWindow(fileName)
+        except Exception as e:
+            QMessageBox.warning(self, "Open Log File", str(e))
+            return None
+        self.mdiArea.addSubWindow(view)
+        view.show()
+        return view
+
+    def showMergedViewDialog(self, port_names: list):
+        if len(port_names) < 2:
+            QMessageBox.information(self, "Merged View", "A merged view needs at least two ports.")
+            return
+        from mergedViewDialog import MergedViewDialog
+        dialog = MergedViewDialog(self, port_names)
+        if dialog.exec():
+            self.signal_createMergedView.emit(dialog.getPortNames(), dialog.getReorderWindow())
+
+    def createMergedView(self, portNames: List[str], reorderWindow: float):
+        from mergedOutputWindow import MergedOutputWindow
+        view = MergedOutputWindow(portNames, reorderWindow)
+        self.mdiArea.addSubWindow(view)
+        view.show()
+        return view
+
+    def showStatisticsPanel(self, visible):
+        if self.statisticsPanel is None:
+            from portStatisticsPanel import PortStatisticsPanel
+            self.statisticsPanel = PortStatisticsPanel(self)
+            self.statisticsPanel.setLatencyTracing(self.latencyTracing)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.statisticsPanel)
+            self.statisticsPanel.visibilityChanged.connect(self.pb_statistics.setChecked)
+            self.statisticsPanel.exportRequested.connect(self.signal_exportStatistics)
+            self.statisticsPanel.latencyTracingToggled.connect(self.signal_latencyTracingChanged)
+            self.statisticsPanel.latencyTracingToggled.connect(self.setLatencyTracing)
+            self.statisticsPanel.traceDumpRequested.connect(self.signal_dumpLatencyTrace)
+        self.statisticsPanel.setVisible(visible)
+
+    def showPortStatistics(self, snapshots: List[dict]):
+        if self.statisticsPanel and self.statisticsPanel.isVisible():
+            self.statisticsPanel.showSnapshots(snapshots)
+
+    def showLatencyTrace(self, rows):
+        if self.statisticsPanel and self.statisticsPanel.isVisible():
+            self.statisticsPanel.showLatencyTrace(rows)
+
+    def setLatencyTracing(self, enabled):
+        self.latencyTracing = enabled
+        if self.statisticsPanel:
+            self.statisticsPanel.setLatencyTracing(enabled)
+
+    def showTraceDumpError(self, error):
+        QMessageBox.warning(self, "Dump Latency Trace", error)
+
+    def stopStatisticsExport(self, error):
+        self.statisticsPanel.stopExport()
+        QMessageBox.warning(self, "Export Statistics", error)
+
     def showHighlighterSettingsDialog(self, settings: List[TextHighlighterConfig]):
+        from text_highlighter.textHightlighterSettingsDialog import TextHighlighterSettingsDialog
         dialog = TextHighlighterSettingsDialog(self, settings)
         if dialog.exec():
             self.signal_applyHighlighterSettings.emit(dialog.table_model.settings)
@@ -0,0 +1,40 @@
+from PySide6.QtCore import Slot
+from typing import List
+from debugOutputWindow import DebugOutputWindow, DebugOutputWindowSettings
+from lineMerger import LineMerger
+from lineStore import LineStore
+
+
+class MergedOutputWindow(DebugOutputWindow):
+    def __init__(self, sourceNames: List[str], reorderWindow=0.25):
+        self.sourceNames = sourceNames
+
+        settings = DebugOutputWindowSettings()
+        settings.viewMode = 'list'
+        settings.timestampMode = 'time'
+        super().__init__('Merged: ' + ', '.join(sourceNames), settings, LineStore(sourceNames))
+
+        self.merger = LineMerger(len(sourceNames), reorderWindow, self)
+        self.merger.linesAvailable.connect(self.insertMergedLines)
+
+    def addSource(self, source, linesAvailable):
+        # linesAvailable(list, object) of the port at index source of sourceNames
+        linesAvailable.connect(self.merger.inputs[source].addLines)
+
+    @Slot(list, object, object)
+    def insertMergedLines(self, lines, timestamps, sources):
+        # the merger emits at most once per reorder window, no coalescing needed
+        if self.checkBox_enabled.isChecked():
+            self.logView.insertLines(lines, timestamps, sources)
+            self.matcher.matchLines(lines)
+            self.records.parseLines(lines)
+            self.linesAdded()
+        else:
+            self.pauseBuffer.append(lines, timestamps, sources)
+
+    def insertPausedLines(self, lines, timestamps, sources):
+        self.insertMergedLines(lines, timestamps, sources)
+
+    def closeEvent(self, event):
+        self.merger.timer.stop()
+        super().closeEvent(event)
@@ -0,0 +1,35 @@
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QDialogButtonBox, QListWidgetItem
+from PySide6.QtCore import Qt, Slot
+from typing import List
+from ui.uiFileHelper import createWidgetFromUiFile
+
+
+class MergedViewDialog(QDialog):
+    def __init__(self, parent, portNames: List[str]):
+        super().__init__(parent)
+
+        self.setWindowTitle("Create Merged View")
+
+        self.dialogWidget = createWidgetFromUiFile("ui/mergedViewDialog.ui")
+        for port_name in portNames:
+            item = QListWidgetItem(port_name, self.dialogWidget.lw_ports)
+            item.setCheckState(Qt.Checked)
+
+        self.dialogWidget.lw_ports.itemChanged.connect(self.updateOkButton)
+        self.dialogWidget.buttonBox.accepted.connect(self.accept)
+        self.dialogWidget.buttonBox.rejected.connect(self.reject)
+        self.updateOkButton()
+
+        QVBoxLayout(self).addWidget(self.dialogWidget)
+
+    @Slot()
+    def updateOkButton(self):
+        # merging needs at least two ports
+        self.dialogWidget.buttonBox.button(QDialogButtonBox.Ok).setEnabled(len(self.getPortNames()) > 1)
+
+    def getPortNames(self) -> List[str]:
+        ports = self.dialogWidget.lw_ports
+        return [ports.item(i).text() for i in range(ports.count()) if ports.item(i).checkState() == Qt.Checked]
+
+    def getReorderWindow(self):
+        return self.dialogWidget.sb_reorderWindow.value() / 1000
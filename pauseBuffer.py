@@ -0,0 +1,62 @@
+from array import array
+from collections import deque
+from lineStore import receiveTimestamp
+
+
+class PauseBuffer:
+    # lines that arrive while a view is paused; a batch is kept as one string, not as a list of lines,
+    # and the oldest batches are dropped beyond maxBytes
+    def __init__(self, maxBytes=32 << 20):
+        self.maxBytes = maxBytes
+        self.batches = deque()  # (text, number of lines, timestamps, sources)
+        self.lines = 0
+        self.bytes = 0  # characters with the line ends, bytes for ascii
+        self.droppedLines = 0
+
+    def __len__(self):
+        return self.lines
+
+    def append(self, lines, timestamps=None, sources=None):
+        if len(lines) == 0:
+            return
+        if timestamps is None:
+            timestamps = array('q', [receiveTimestamp()] * len(lines))
+        text = '\n'.join(lines)
+        self.batches.append((text, len(lines), timestamps, sources))
+        self.lines += len(lines)
+        self.bytes += len(text) + 1
+        while self.bytes > self.maxBytes and len(self.batches) > 1:
+            text, number_of_lines, _, _ = self.batches.popleft()
+            self.lines -= number_of_lines
+            self.bytes -= len(text) + 1
+            self.droppedLines += number_of_lines
+
+    def take(self, maxLines=0):
+        # everything as one batch (lines, timestamps, sources or None) and empties the buffer;
+        # with maxLines only the newest lines, the others would leave the scrollback right away
+        lines = '\n'.join(text for text, _, _, _ in self.batches).split('\n') if self.batches else []
+        timestamps = array('q')
+        sources = array('B') if self.batches and self.batches[0][3] is not None else None
+        for _, _, batch_timestamps, batch_sources in self.batches:
+            timestamps.extend(batch_timestamps)
+            if sources is not None:
+                sources.extend(batch_sources)
+        if 0 < maxLines < len(lines):
+            lines = lines[-maxLines:]
+            timestamps = timestamps[-maxLines:]
+            if sources is not None:
+                sources = sources[-maxLines:]
+
+        if self.droppedLines > 0 and len(lines) > 0:
+            lines.insert(0, f'<DBGVERR: {self.droppedLines} lines dropped while paused :RREVGBD>')
+            timestamps.insert(0, timestamps[0])
+            if sources is not None:
+                sources.insert(0, sources[0])
+        self.clear()
+        return lines, timestamps, sources
+
+    def clear(self):
+        self.batches.clear()
+        self.lines = 0
+        self.bytes = 0
+        self.droppedLines = 0
@@ -0,0 +1,453 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from threading import Lock
+
+# measures the pipeline from the serial port to the view headless against generator:// virtual ports (posix);
+# every scenario runs in a process of its own, the generators in separate load processes
+#   python pipelineBenchmark.py --baudrates 115200 12000000 --ports 1 16 --rules 0 50 --output new.json
+#   python pipelineBenchmark.py --compare old.json new.json
+
+defaultMix = 'info:90,warn:8,error:2'
+rulePatterns = [r'ERROR', r'WARN', r'task{k}\b', r'code=0x[0-9A-F]{{3}}{k:X}\b', r'adc={k}\d*\b',
+                r'module m\d*{k}\b', r'buffer 9{k}% full', r'state=\w+', r'tick=\d+{k}\b', r'{k} retries']
+ruleColors = ['#ff0000', '#ff8000', '#0000ff', '#008000', '#800080']
+# compared by --compare, True: higher is better
+comparedMetrics = {'shownBytesPerSecond': True, 'cpuSecondsPerMB': False, 'peakMemoryMB': False,
+                   'stallP99Ms': False, 'stallMaxMs': False, 'flushP99Ms': False, 'microsecondsPerLine': False}
+
+
+def highlighterRules(count):
+    from text_highlighter.textHighlighterConfig import TextHighlighterConfig
+    rules = []
+    for i in range(count):
+        rule = TextHighlighterConfig()
+        rule.pattern = rulePatterns[i % len(rulePatterns)].format(k=i // len(rulePatterns))
+        rule.color_foreground = ruleColors[i % len(ruleColors)]
+        rule.bold = i % 3 == 0
+        rules.append(rule)
+    return rules
+
+
+def generator(mix, seed=0):
+    # a generator:// port that is never opened, only its lines are used
+    from urllib.parse import parse_qs
+    from virtual_port.protocol_generator import Serial
+    port = Serial()
+    port.openSource('', parse_qs(f'mix={mix}&seed={seed}'))
+    return port
+
+
+def bytesPerLine(mix):
+    return len(generator(mix).generate(0, 10000)) / 10000
+
+
+def cpuTime(pid=None):
+    # seconds of user and system time of this process or of pid (linux)
+    if pid is None:
+        times = os.times()
+        return times.user + times.system
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except OSError:
+        return 0.0
+
+
+def peakMemory(pid=None):
+    # peak resident set size in MB of this process or of pid (linux)
+    if pid is None:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def runLoad(connection, urls, baudrate):
+    # load process: opens the generators and sends the names of their ptys, runs until told to stop
+    import serial
+    import debugOutput  # registers the virtual ports
+    ports = [serial.serial_for_url(url, baudrate=baudrate) for url in urls]
+    connection.send([port.portstr for port in ports])
+    connection.recv()
+    for port in ports:
+        port.close()
+
+
+class LineCounter:
+    # passes the lines of one port on to its view and counts them; generated lines start with their sequence number
+    def __init__(self, view):
+        self.view = view
+        self.lines = 0
+        self.characters = 0  # with the line ends
+        self.lastSequence = -1
+        self.forward = True  # off once measured, the backlog is dropped instead of shown
+        self.lock = Lock()  # the counters are read by the measuring thread
+
+    def count(self, lines, timestamps):
+        characters = sum(map(len, lines)) + len(lines)
+        try:
+            sequence = int(lines[-1].split(' ', 1)[0])
+        except ValueError:
+            sequence = self.lastSequence
+        with self.lock:
+            self.lines += len(lines)
+            self.characters += characters
+            self.lastSequence = sequence
+        if self.forward:
+            self.view.appendLines(lines, timestamps)
+
+    def snapshot(self):
+        with self.lock:
+            return self.lines, self.characters, self.lastSequence
+
+
+class StallMonitor:
+    # lateness of a 10 ms timer is time the event loop couldn't run
+    interval = 10
+
+    def __init__(self):
+        from PySide6.QtCore import QTimer
+        from portStatistics import Histogram
+        self.histogram = Histogram()
+        self.stalled = 0.0  # seconds, in intervals that were more than 50 ms late
+        self.last = time.perf_counter()
+        self.timer = QTimer()
+        self.timer.setInterval(StallMonitor.interval)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start()
+
+    def tick(self):
+        now = time.perf_counter()
+        lateness = now - self.last - StallMonitor.interval / 1000
+        self.last = now
+        self.histogram.record(max(0, int(lateness * 1e6)))
+        if lateness > 0.05:
+            self.stalled += lateness
+
+    def reset(self):
+        self.histogram.reset()
+        self.stalled = 0.0
+
+
+def runScenario(scenario):
+    import multiprocessing
+    from threading import Thread, Event
+    from PySide6.QtCore import QMetaObject, Qt
+    from PySide6.QtWidgets import QApplication, QMdiArea
+    from debugOutput import DebugOutput, SerialConnectionSettings
+    from debugOutputWindow import DebugOutputWindow, DebugOutputWindowSettings
+    from debugOutputController import DebugOutputController
+    from serialIoLoop import SerialIoLoop
+
+    app = QApplication([])
+    area = QMdiArea()
+    area.resize(1280, 800)
+    area.show()
+
+    # the generators are paced to the baudrate, 10 bits per byte
+    mix = scenario['mix']
+    rate = scenario['baudrate'] / 10 / bytesPerLine(mix)
+    context = multiprocessing.get_context('spawn')
+    loads = []
+    for i in range(scenario['loadProcesses']):
+        urls = [f'generator://?rate={rate:.1f}&mix={mix}&seed={port}'
+                for port in range(i, scenario['ports'], scenario['loadProcesses'])]
+        connection, load_connection = context.Pipe()
+        process = context.Process(target=runLoad, args=(load_connection, urls, scenario['baudrate']), daemon=True)
+        process.start()
+        loads.append((process, connection))
+    port_names = [name for _, connection in loads for name in connection.recv()]
+
+    io_loop = None
+    if scenario['engine'] == 'selectors':
+        io_loop = SerialIoLoop()
+        io_loop.start()
+    rules = highlighterRules(scenario['rules'])
+    ports = []  # (controller, counter)
+    failed_ports = []  # worker processes report a port that didn't open later on
+    for port_name in port_names:
+        settings = SerialConnectionSettings(port_name)
+        settings.baudrate = scenario['baudrate']
+        settings.encoding = 'utf-8'
+        if scenario['engine'] == 'processes':
+            from ingestionProcess import DebugOutputProcess
+            debug_output = DebugOutputProcess(settings)
+        else:
+            debug_output = DebugOutput(settings, io_loop)
+        view_settings = DebugOutputWindowSettings()
+        view_settings.viewMode = scenario['viewMode']
+        view = DebugOutputWindow(port_name, view_settings)
+        area.addSubWindow(view)
+        view.show()
+        view.setHighlighterSettings(rules)
+        ctrl = DebugOutputController(debug_output, view)
+        counter = LineCounter(view)
+        debug_output.linesAvailable.disconnect(view.appendLines)
+        debug_output.linesAvailable.connect(counter.count)
+        ctrl.opened.connect(lambda name, opened: opened or failed_ports.append(name))
+        if not ctrl.start():
+            raise Exception(f"Failed to open {port_name}")
+        ports.append((ctrl, counter))
+    area.tileSubWindows()
+    stall_monitor = StallMonitor()
+
+    result = dict(scenario)
+    stop_event = Event()
+
+    def workers():
+        return [ctrl for ctrl, _ in ports if getattr(ctrl.debugOutput, 'process', None)]
+
+    def measure():
+        # in a thread of its own: a flooded event loop starves timers, which is what is measured here
+        if stop_event.wait(scenario['warmup']):
+            return
+        if len(failed_ports) > 0:
+            QMetaObject.invokeMethod(app, 'quit', Qt.QueuedConnection)
+            return
+        start_time = time.perf_counter()
+        start_cpu = cpuTime() + sum(cpuTime(ctrl.debugOutput.process.pid) for ctrl in workers())
+        start_counters = [counter.snapshot() for _, counter in ports]
+        for ctrl, _ in ports:
+            ctrl.sampleStatistics()
+        stall_monitor.reset()
+        if stop_event.wait(scenario['duration']):
+            return
+
+        elapsed = time.perf_counter() - start_time
+        snapshots = [ctrl.sampleStatistics() for ctrl, _ in ports]
+        cpu = cpuTime() + sum(cpuTime(ctrl.debugOutput.process.pid) for ctrl in workers()) - start_cpu
+        lost = 0
+        shown = 0
+        for (start_lines, start_characters, start_sequence), (_, counter) in zip(start_counters, ports):
+            lines, characters, sequence = counter.snapshot()
+            lost += max(0, sequence - start_sequence - (lines - start_lines))
+            shown += (characters - start_characters) / elapsed
+        received = sum(snapshot['bytesPerSecond'] for snapshot in snapshots)
+        offered = scenario['baudrate'] / 10 * scenario['ports']
+        # a stall that is still going on counts as well
+        stall = max(stall_monitor.histogram.maximum / 1e6, time.perf_counter() - stall_monitor.last)
+        result.update({
+            'offeredBytesPerSecond': round(offered),
+            'receivedBytesPerSecond': round(received),
+            # characters that reached the views, bytes for the generated ascii lines
+            'shownBytesPerSecond': round(shown),
+            'keptUp': shown >= 0.98 * offered,
+            'linesPerSecond': round(sum(snapshot['linesPerSecond'] for snapshot in snapshots)),
+            'lostLines': lost,
+            'droppedBytes': sum(snapshot['droppedBytes'] for snapshot in snapshots),
+            'cpuPercent': round(100 * cpu / elapsed, 1),
+            'cpuSecondsPerMB': round(cpu / (received * elapsed / (1 << 20)), 4) if received > 0 else None,
+            'peakMemoryMB': round(peakMemory() + sum(peakMemory(ctrl.debugOutput.process.pid)
+                                                     for ctrl in workers()), 1),
+            'stallP99Ms': stall_monitor.histogram.percentile(0.99) / 1000,
+            'stallMaxMs': round(stall * 1000, 3),
+            'stalledPercent': round(100 * min(elapsed, stall_monitor.stalled + max(0.0, stall - 0.05)) / elapsed, 1),
+            'flushP99Ms': max(snapshot['flushDurationP99'] for snapshot in snapshots) / 1000,
+            'paintLatencyP99Ms': max(snapshot['paintLatencyP99'] for snapshot in snapshots) / 1000,
+            # near 100 per load process: the generators, not the viewer, limit the throughput
+            'loadCpuPercent': round(100 * sum(cpuTime(process.pid) for process, _ in loads)
+                                    / (time.perf_counter() - launched), 1),
+        })
+        # the backlog isn't shown, so the event loop soon gets to the quit
+        for _, counter in ports:
+            counter.forward = False
+        QMetaObject.invokeMethod(app, 'quit', Qt.QueuedConnection)
+
+    launched = time.perf_counter()
+    measurement = Thread(target=measure)
+    measurement.start()
+    app.exec()
+    stop_event.set()
+    measurement.join()
+
+    for ctrl, _ in ports:
+        ctrl.stop()
+    if io_loop:
+        io_loop.stop()
+    # the ports are closed first, a pty that goes away is a device that was unplugged
+    for process, connection in loads:
+        connection.send(None)
+        process.join(10)
+    if len(failed_ports) > 0:
+        raise Exception(f"Failed to open {', '.join(failed_ports)}")
+    return result
+
+
+def runHighlightCost(ruleCounts, mix):
+    # time of the highlighter to find the formats of one line, without drawing
+    from PySide6.QtWidgets import QApplication
+    from text_highlighter.textHighlighter import TextHighlighter
+
+    app = QApplication([])
+    lines = generator(mix).generate(0, 20000).decode().splitlines()
+    results = []
+    for rules in ruleCounts:
+        highlighter = TextHighlighter()
+        highlighter.setSettings(highlighterRules(rules))
+        start = time.perf_counter()
+        for line in lines:
+            for _ in highlighter.formatRanges(line):
+                pass
+        elapsed = time.perf_counter() - start
+        matching = sum(1 for line in lines if highlighter.couldMatch(line))
+        results.append({'rules': rules, 'microsecondsPerLine': round(elapsed / len(lines) * 1e6, 3),
+                        'matchingLines': round(matching / len(lines), 3)})
+    return results
+
+
+def launch(task, environment):
+    # runs one task in a fresh interpreter, its result is the last line of its output;
+    # a task that fails, e.g. with a crash in Qt, gives {'error': ..., 'stderr': ...} instead
+    try:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), '--task', json.dumps(task)],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), env=environment,
+                                capture_output=True, text=True, timeout=task.get('duration', 0) + 300)
+    except subprocess.TimeoutExpired as e:
+        stderr = e.stderr.decode(errors='replace') if isinstance(e.stderr, bytes) else e.stderr
+        return {'error': f'timed out after {e.timeout:.0f} s', 'stderr': stderr or ''}
+    if result.returncode != 0:
+        return {'error': f'exit code {result.returncode}', 'stderr': result.stderr}
+    try:
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return {'error': 'no result', 'stderr': result.stderr}
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    import PySide6
+    return {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'pyside': PySide6.__version__, 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def scenarioKey(result):
+    return tuple(result[key] for key in ('engine', 'viewMode', 'baudrate', 'ports', 'rules'))
+
+
+def compareResults(old, new, threshold):
+    # prints every metric that changed by more than threshold percent; returns the number of regressions
+    regressions = 0
+    old_results = {scenarioKey(result): result for result in old['scenarios']}
+    rows = [(scenarioKey(result), old_results.get(scenarioKey(result)), result) for result in new['scenarios']]
+    old_costs = {cost['rules']: cost for cost in old.get('highlightCost', [])}
+    rows += [(('highlight', cost['rules']), old_costs.get(cost['rules']), cost) for cost in new.get('highlightCost', [])]
+    for key, old_result, new_result in rows:
+        if old_result is None:
+            continue
+        if 'error' in new_result and 'error' not in old_result:
+            regressions += 1
+            print(f"{'REGRESSION':>10} {'/'.join(map(str, key))}: failed, {new_result['error']}")
+            continue
+        for metric, higher_is_better in comparedMetrics.items():
+            before, after = old_result.get(metric), new_result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            if abs(change) < threshold:
+                continue
+            worse = (change < 0) == higher_is_better
+            regressions += worse
+            print(f"{'REGRESSION' if worse else 'improved':>10} {'/'.join(map(str, key))}: {metric} "
+                  f"{before} -> {after} ({change:+.1f}%)")
+    return regressions
+
+
+def main(arguments):
+    parser = argparse.ArgumentParser(description='Measure throughput, cpu, memory and stalls of the pipeline.')
+    parser.add_argument('--baudrates', type=int, nargs='+', default=[115200, 1000000, 12000000])
+    parser.add_argument('--ports', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--rules', type=int, nargs='+', default=[0, 10, 50], help='numbers of highlighter rules')
+    parser.add_argument('--engine', choices=['threads', 'selectors', 'processes'], default='threads')
+    parser.add_argument('--view-mode', choices=['text', 'list'], default='text')
+    parser.add_argument('--mix', default=defaultMix, help='line kinds of the generators (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=5, help='seconds measured per scenario')
+    parser.add_argument('--warmup', type=float, default=1, help='seconds before measuring')
+    parser.add_argument('--load-processes', type=int, help='processes running the generators '
+                        '(default: half of the cpus, at most one per port)')
+    parser.add_argument('--output', help='json file for the results (default: stdout)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files and exit')
+    parser.add_argument('--threshold', type=float, default=10, help='percent a metric has to change for --compare')
+    parser.add_argument('--task', help=argparse.SUPPRESS)
+    args = parser.parse_args(arguments)
+
+    if args.task:
+        task = json.loads(args.task)
+        if task['kind'] == 'highlight':
+            print(json.dumps(runHighlightCost(task['rules'], task['mix'])))
+        else:
+            print(json.dumps(runScenario(task)))
+        # the result is out; tearing down windows, threads and the app at interpreter exit can crash
+        # in the deallocation of Qt objects, as it can during a run, which launch records as a failure
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(0)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        return 1 if compareResults(old, new, args.threshold) > 0 else 0
+
+    if not hasattr(os, 'openpty'):
+        print('The virtual ports need a pty, this platform has none', file=sys.stderr)
+        return 2
+    environment = dict(os.environ)
+    environment.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    results = {'metadata': metadata(), 'scenarios': []}
+    for baudrate, ports, rules in itertools.product(args.baudrates, args.ports, args.rules):
+        load_processes = args.load_processes or max(1, (os.cpu_count() or 2) // 2)
+        scenario = {'kind': 'pipeline', 'engine': args.engine, 'viewMode': args.view_mode, 'mix': args.mix,
+                    'baudrate': baudrate, 'ports': ports, 'rules': rules, 'duration': args.duration,
+                    'warmup': args.warmup, 'loadProcesses': min(ports, load_processes)}
+        result = launch(scenario, environment)
+        if 'error' in result:
+            # the grid goes on, the failure is kept with the results
+            results['scenarios'].append(dict(scenario, **result))
+            print(f"{args.engine} {baudrate:>9} baud {ports:>3} ports {rules:>3} rules: failed, {result['error']}\n"
+                  f"{result['stderr']}", file=sys.stderr)
+            continue
+        results['scenarios'].append(result)
+        print(f"{args.engine} {baudrate:>9} baud {ports:>3} ports {rules:>3} rules: "
+              f"{result['shownBytesPerSecond'] / 1024:>8.1f} kB/s shown{'' if result['keptUp'] else ' (behind)'}, "
+              f"{result['cpuPercent']:>5.1f}% cpu, {result['peakMemoryMB']:>6.1f} MB, "
+              f"stall p99 {result['stallP99Ms']:.1f} ms, lost {result['lostLines']} lines", file=sys.stderr)
+    print('highlighter cost per rule count', file=sys.stderr)
+    costs = launch({'kind': 'highlight', 'rules': sorted(set(args.rules) | {0, 1, 10, 50}), 'mix': args.mix},
+                   environment)
+    if 'error' in costs:
+        print(f"failed, {costs['error']}\n{costs['stderr']}", file=sys.stderr)
+        results['highlightCostError'] = costs
+        costs = []
+    results['highlightCost'] = costs
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 1 if any('error' in result for result in results['scenarios']) or 'highlightCostError' in results else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,114 @@
+import csv
+import json
+import time
+
+
+class Histogram:
+    # power of two buckets of microseconds, recording a value is a bit_length and an increment
+    bucketCount = 40
+
+    def __init__(self):
+        self.buckets = [0] * Histogram.bucketCount
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def record(self, microseconds):
+        microseconds = max(0, int(microseconds))
+        self.buckets[min(microseconds.bit_length(), Histogram.bucketCount - 1)] += 1
+        self.count += 1
+        self.total += microseconds
+        self.maximum = max(self.maximum, microseconds)
+
+    def percentile(self, fraction):
+        # upper bound of the bucket the value falls in, 0 without values
+        rank = fraction * self.count
+        seen = 0
+        for bucket, number in enumerate(self.buckets):
+            seen += number
+            if number > 0 and seen >= rank:
+                return min((1 << bucket) - 1, self.maximum)
+        return self.maximum
+
+    def mean(self):
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def reset(self):
+        self.__init__()
+
+
+class PortStatistics:
+    # counters of one port, sampled periodically; rates and histograms cover the time since the previous sample,
+    # latencies and durations are in microseconds
+    fields = ['time', 'port', 'bytesPerSecond', 'linesPerSecond', 'readsPerSecond', 'bytesPerRead',
+              'queueDepth', 'peakQueueDepth', 'droppedBytes', 'decodeErrors',
+              'paintLatencyP50', 'paintLatencyP99', 'paintLatencyMax',
+              'flushDurationP50', 'flushDurationP99', 'flushDurationMax']
+
+    def __init__(self, portName):
+        self.portName = portName
+        self.linesReceived = 0
+        self.lastSample = (time.monotonic(), 0, 0, 0)  # time, bytes, reads, lines
+
+    def reset(self):
+        self.__init__(self.portName)
+
+    def countLines(self, number_of_lines):
+        self.linesReceived += number_of_lines
+
+    def sample(self, debugOutput, view):
+        now = time.monotonic()
+        received = debugOutput.receiver.statistics
+        last_time, last_bytes, last_reads, last_lines = self.lastSample
+        self.lastSample = (now, received.bytesReceived, received.numberOfReads, self.linesReceived)
+        # the receiver restarts its counters when the port is opened
+        new_bytes = received.bytesReceived - last_bytes if received.bytesReceived >= last_bytes else received.bytesReceived
+        reads = received.numberOfReads - last_reads if received.numberOfReads >= last_reads else received.numberOfReads
+        interval = max(now - last_time, 1e-6)
+
+        depth, peak_depth, _, dropped_bytes = debugOutput.getQueueStatistics()
+        snapshot = {
+            'time': round(time.time(), 3),
+            'port': self.portName,
+            'bytesPerSecond': round(new_bytes / interval, 1),
+            'linesPerSecond': round((self.linesReceived - last_lines) / interval, 1),
+            'readsPerSecond': round(reads / interval, 1),
+            'bytesPerRead': round(new_bytes / reads, 1) if reads > 0 else 0.0,
+            'queueDepth': depth,
+            'peakQueueDepth': peak_depth,
+            'droppedBytes': dropped_bytes,
+            'decodeErrors': debugOutput.getDecodeErrors(),
+            'paintLatencyP50': view.paintLatency.percentile(0.5),
+            'paintLatencyP99': view.paintLatency.percentile(0.99),
+            'paintLatencyMax': view.paintLatency.maximum,
+            'flushDurationP50': view.flushDuration.percentile(0.5),
+            'flushDurationP99': view.flushDuration.percentile(0.99),
+            'flushDurationMax': view.flushDuration.maximum,
+        }
+        view.paintLatency.reset()
+        view.flushDuration.reset()
+        return snapshot
+
+
+class StatisticsExporter:
+    # appends snapshots to a file, one json object per line for *.json, csv otherwise
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.json = fileName.lower().endswith('.json')
+        self.file = open(fileName, 'a', newline='')
+        self.writer = None
+        if not self.json:
+            self.writer = csv.DictWriter(self.file, fieldnames=PortStatistics.fields)
+            if self.file.tell() == 0:
+                self.writer.writeheader()
+
+    def write(self, snapshots):
+        if self.json:
+            for snapshot in snapshots:
+                self.file.write(json.dumps(snapshot) + '\n')
+        else:
+            self.writer.writerows(snapshots)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
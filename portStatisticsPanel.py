@@ -0,0 +1,116 @@
+from PySide6.QtWidgets import QDockWidget, QTableWidgetItem, QFileDialog, QHeaderView
+from PySide6.QtCore import Qt, Signal, Slot
+from typing import List
+from ui.uiFileHelper import createWidgetFromUiFile
+
+
+class PortStatisticsPanel(QDockWidget):
+    # one row per port with the latest snapshot of PortStatistics
+    exportRequested = Signal(str)  # file name, '' stops the export
+    latencyTracingToggled = Signal(bool)
+    traceDumpRequested = Signal(str)
+
+    # header, snapshot key, scale of numbers shown with one decimal (None: as is)
+    columns = [('Port', 'port', None),
+               ('kB/s', 'bytesPerSecond', 1 / 1024),
+               ('Lines/s', 'linesPerSecond', 1),
+               ('Reads/s', 'readsPerSecond', 1),
+               ('Bytes/read', 'bytesPerRead', 1),
+               ('Queue kB', 'queueDepth', 1 / 1024),
+               ('Peak kB', 'peakQueueDepth', 1 / 1024),
+               ('Dropped', 'droppedBytes', None),
+               ('Decode errors', 'decodeErrors', None),
+               ('Paint p50 ms', 'paintLatencyP50', 1 / 1000),
+               ('Paint p99 ms', 'paintLatencyP99', 1 / 1000),
+               ('Paint max ms', 'paintLatencyMax', 1 / 1000),
+               ('Flush p50 ms', 'flushDurationP50', 1 / 1000),
+               ('Flush p99 ms', 'flushDurationP99', 1 / 1000),
+               ('Flush max ms', 'flushDurationMax', 1 / 1000)]
+    traceColumns = ['Port', 'Stage', 'Samples', 'p50 ms', 'p99 ms', 'Max ms']
+
+    def __init__(self, parent=None):
+        super().__init__("Port statistics", parent)
+        self.setObjectName('portStatisticsPanel')
+
+        self.panelWidget = createWidgetFromUiFile("ui/portStatisticsPanel.ui")
+        table = self.panelWidget.tw_statistics
+        table.setColumnCount(len(PortStatisticsPanel.columns))
+        table.setHorizontalHeaderLabels([header for header, _, _ in PortStatisticsPanel.columns])
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        trace_table = self.panelWidget.tw_trace
+        trace_table.setColumnCount(len(PortStatisticsPanel.traceColumns))
+        trace_table.setHorizontalHeaderLabels(PortStatisticsPanel.traceColumns)
+        trace_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        self.panelWidget.pb_export.toggled.connect(self.toggleExport)
+        self.panelWidget.checkBox_trace.toggled.connect(self.toggleLatencyTracing)
+        self.panelWidget.pb_dumpTrace.clicked.connect(self.selectTraceFile)
+        self.setWidget(self.panelWidget)
+
+    def showSnapshots(self, snapshots: List[dict]):
+        table = self.panelWidget.tw_statistics
+        table.setRowCount(len(snapshots))
+        for row, snapshot in enumerate(snapshots):
+            for column, (_, key, scale) in enumerate(PortStatisticsPanel.columns):
+                value = snapshot[key]
+                text = str(value) if scale is None else f'{value * scale:.1f}'
+                item = table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if key != 'port':
+                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    table.setItem(row, column, item)
+                item.setText(text)
+
+    def showLatencyTrace(self, rows):
+        # (port, stage, samples, p50, p99, max) with times in microseconds
+        table = self.panelWidget.tw_trace
+        table.setRowCount(len(rows))
+        for row, (port, stage, samples, p50, p99, maximum) in enumerate(rows):
+            texts = [port, stage, str(samples)] + [f'{value / 1000:.1f}' for value in (p50, p99, maximum)]
+            for column, text in enumerate(texts):
+                item = table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if column > 1:
+                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    table.setItem(row, column, item)
+                item.setText(text)
+
+    def setLatencyTracing(self, enabled):
+        self.panelWidget.checkBox_trace.blockSignals(True)
+        self.panelWidget.checkBox_trace.setChecked(enabled)
+        self.panelWidget.checkBox_trace.blockSignals(False)
+        self.panelWidget.tw_trace.setVisible(enabled)
+        self.panelWidget.pb_dumpTrace.setEnabled(enabled)
+
+    @Slot(bool)
+    def toggleLatencyTracing(self, checked):
+        self.panelWidget.tw_trace.setVisible(checked)
+        self.panelWidget.pb_dumpTrace.setEnabled(checked)
+        self.latencyTracingToggled.emit(checked)
+
+    @Slot()
+    def selectTraceFile(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "Dump Latency Trace", "trace.csv", "CSV files (*.csv)")
+        if file_name:
+            self.traceDumpRequested.emit(file_name)
+
+    @Slot(bool)
+    def toggleExport(self, checked):
+        if not checked:
+            self.panelWidget.lb_exportFile.setText('')
+            self.exportRequested.emit('')
+            return
+        file_name, _ = QFileDialog.getSaveFileName(self, "Export Statistics", "statistics.csv",
+                                                   "CSV files (*.csv);;JSON lines (*.json)")
+        if not file_name:
+            self.panelWidget.pb_export.setChecked(False)
+            return
+        self.panelWidget.lb_exportFile.setText(file_name)
+        self.exportRequested.emit(file_name)
+
+    def stopExport(self):
+        # e.g. when the file could not be written
+        self.panelWidget.pb_export.setChecked(False)
@@ -0,0 +1,156 @@
+import struct
+import tempfile
+from collections import deque
+from queue import Empty
+from threading import Condition
+
+
+class ReceiveQueue:
+    # bounded handoff of (timestamp, bytes) chunks from the receiver to the processor;
+    # what happens when the processor falls behind depends on the policy:
+    #   block: the receiver waits, the serial driver buffers (and eventually drops) instead
+    #   drop-oldest / drop-newest: chunks are discarded, a gap item (timestamp, number of bytes) takes their place
+    #   spill: chunks go to a temporary file until the processor caught up
+    policies = ['block', 'drop-oldest', 'drop-newest', 'spill']
+    spillRecord = struct.Struct('<qI')
+
+    def __init__(self, maxBytes=64 << 20, policy='block'):
+        if policy not in ReceiveQueue.policies:
+            raise Exception(f"Unknown receive queue policy {policy}")
+        self.maxBytes = max(1, maxBytes)
+        self.policy = policy
+        self.items = deque()
+        self.depth = 0  # bytes in memory
+        self.peakDepth = 0
+        self.droppedBytes = 0
+        self.spillFile = None
+        self.spillReadPosition = 0
+        self.spillWritePosition = 0
+        self.spilledItems = 0
+        self.spilledBytes = 0  # currently in the spill file
+        self.condition = Condition()
+
+    def put(self, item, terminateEvent=None):
+        timestamp, data = item
+        size = len(data)
+        with self.condition:
+            if self.policy == 'spill' and (self.spilledItems > 0 or self.depth + size > self.maxBytes):
+                # once spilling, everything goes to the file to keep the order
+                self.spill(timestamp, data)
+            elif self.depth + size > self.maxBytes and self.depth > 0:
+                if self.policy == 'block':
+                    while self.depth + size > self.maxBytes and self.depth > 0:
+                        if terminateEvent and terminateEvent.is_set():
+                            break
+                        self.condition.wait(0.1)
+                elif self.policy == 'drop-newest':
+                    self.addGap(timestamp, size, atEnd=True)
+                    return
+                else:
+                    self.dropOldest(size)
+                self.append(item)
+            else:
+                self.append(item)
+            self.condition.notify_all()
+
+    def append(self, item):
+        self.items.append(item)
+        self.depth += len(item[1])
+        self.peakDepth = max(self.peakDepth, self.depth)
+
+    def addGap(self, timestamp, size, atEnd):
+        # neighbouring gaps are merged into one
+        self.droppedBytes += size
+        index = -1 if atEnd else 0
+        if len(self.items) > 0 and isinstance(self.items[index][1], int):
+            gap_timestamp, dropped = self.items[index]
+            self.items[index] = (gap_timestamp, dropped + size)
+        elif atEnd:
+            self.items.append((timestamp, size))
+        else:
+            self.items.appendleft((timestamp, size))
+
+    def dropOldest(self, size):
+        dropped = 0
+        gap_timestamp = None
+        while self.depth + size > self.maxBytes and self.depth > 0:
+            timestamp, data = self.items.popleft()
+            if isinstance(data, int):
+                # an earlier gap, continued
+                self.droppedBytes -= data
+                dropped += data
+            else:
+                self.depth -= len(data)
+                dropped += len(data)
+            if gap_timestamp is None:
+                gap_timestamp = timestamp
+        self.addGap(gap_timestamp, dropped, atEnd=False)
+
+    def spill(self, timestamp, data):
+        if self.spillFile is None:
+            self.spillFile = tempfile.TemporaryFile(prefix='debugOutputViewer_')
+        self.spillFile.seek(self.spillWritePosition)
+        self.spillFile.write(ReceiveQueue.spillRecord.pack(timestamp, len(data)))
+        self.spillFile.write(data)
+        self.spillWritePosition += ReceiveQueue.spillRecord.size + len(data)
+        self.spilledItems += 1
+        self.spilledBytes += len(data)
+
+    def unspill(self):
+        # moves a part of the spilled chunks back to memory
+        self.spillFile.flush()
+        self.spillFile.seek(self.spillReadPosition)
+        loaded = 0
+        while self.spilledItems > 0 and loaded < self.maxBytes // 4:
+            timestamp, size = ReceiveQueue.spillRecord.unpack(self.spillFile.read(ReceiveQueue.spillRecord.size))
+            data = self.spillFile.read(size)
+            self.spillReadPosition += ReceiveQueue.spillRecord.size + size
+            self.spilledItems -= 1
+            self.spilledBytes -= size
+            self.append((timestamp, data))
+            loaded += size
+        if self.spilledItems == 0:
+            self.spillFile.truncate(0)
+            self.spillReadPosition = 0
+            self.spillWritePosition = 0
+
+    def get(self, timeout=None):
+        # (timestamp, bytes) or (timestamp, int) for a gap of dropped bytes; raises Empty like queue.Queue
+        with self.condition:
+            if len(self.items) == 0 and self.spilledItems == 0:
+                self.condition.wait_for(lambda: len(self.items) > 0 or self.spilledItems > 0, timeout)
+            if len(self.items) == 0:
+                if self.spilledItems == 0:
+                    raise Empty
+                self.unspill()
+            item = self.items.popleft()
+            if not isinstance(item[1], int):
+                self.depth -= len(item[1])
+                self.condition.notify_all()
+            return item
+
+    def get_nowait(self):
+        return self.get(timeout=0)
+
+    def qsize(self):
+        return len(self.items) + self.spilledItems
+
+    def statistics(self):
+        # bytes: queued in memory, peak in memory, in the spill file, dropped
+        with self.condition:
+            return self.depth, self.peakDepth, self.spilledBytes, self.droppedBytes
+
+    def reset(self):
+        with self.condition:
+            self.items.clear()
+            self.depth = 0
+            self.peakDepth = 0
+            self.droppedBytes = 0
+            self.spilledItems = 0
+            self.spilledBytes = 0
+            self.spillReadPosition = 0
+            self.spillWritePosition = 0
+            if self.spillFile:
+                self.spillFile.close()
+                self.spillFile = None
+            self.condition.notify_all()
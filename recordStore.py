@@ -0,0 +1,256 @@
+import operator
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from functools import partial
+from itertools import compress, repeat
+from typing import List
+
+
+def int64(text):
+    # ints beyond the range of array('q') don't count as ints
+    value = int(text)
+    if not -(1 << 63) <= value < (1 << 63):
+        raise ValueError(text)
+    return value
+
+
+def hexInt(text):
+    if text[:2] not in ('0x', '0X'):
+        raise ValueError(text)
+    value = int(text, 16)
+    if value >= (1 << 63):
+        raise ValueError(text)
+    return value
+
+
+def floatValue(text):
+    # floats and ints alike; ints that may be beyond int64 stay exact as text, e.g. 64 bit ids
+    if len(text) >= 19 and (text.lstrip('+-').isdigit() or text[:2] in ('0x', '0X')):
+        raise ValueError(text)
+    return float(int(text, 16)) if text[:2] in ('0x', '0X') else float(text)
+
+
+class FieldColumn:
+    # values of one field for the lines that have it, sparse and sorted by absolute line number;
+    # the type follows the values: int, float or str, strings are stored as indexes into an interned table
+    def __init__(self):
+        self.lines = array('Q')
+        self.kind = None
+        self.values = None
+        self.strings: List[str] = []
+        self.stringIndex = {}
+
+    def __len__(self):
+        return len(self.lines)
+
+    conversions = [('int', int64), ('int', hexInt), ('float', floatValue)]
+
+    @staticmethod
+    def convert(texts: List[str]):
+        # (type, values) of a batch of values, converted all at once: int64 (also 0x hex), floats
+        # or a mix of both as floats, anything else keeps the texts
+        for kind, conversion in FieldColumn.conversions:
+            try:
+                return kind, list(map(conversion, texts))
+            except ValueError:
+                pass
+        return 'str', texts
+
+    def extend(self, lines, texts: List[str], storedTexts=None):
+        # storedTexts(column) gives the original texts of the values so far, for the promotion to str
+        kind, values = ('str', texts) if self.kind == 'str' else FieldColumn.convert(texts)
+        if kind != self.kind:
+            self.promote(kind, storedTexts)
+        if self.kind == 'str':
+            values = map(self.intern, values)
+        self.lines.extend(lines)
+        self.values.extend(values)
+
+    def promote(self, kind, storedTexts=None):
+        # int -> float -> str, a column never goes back to a narrower type; strings are the original
+        # texts, not the numbers formatted again, so x=3 stays '3' however the batches were split
+        if self.kind is None:
+            self.kind = kind
+            self.values = array({'int': 'q', 'float': 'd', 'str': 'I'}[kind])
+        elif self.kind == 'int' and kind == 'float':
+            self.kind = 'float'
+            self.values = array('d', self.values)
+        elif self.kind != 'str' and kind == 'str':
+            texts = storedTexts(self) if storedTexts else [str(value) for value in self.values]
+            self.kind = 'str'
+            self.values = array('I', map(self.intern, texts))
+
+    def intern(self, text):
+        index = self.stringIndex.get(text)
+        if index is None:
+            index = self.stringIndex[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def matchingLines(self, compare, text, firstLine=0):
+        first = bisect_left(self.lines, firstLine)
+        lines = self.lines[first:]
+        values = self.values[first:]
+        if self.kind == 'str':
+            # compared once per distinct string, not per line
+            hits = [compare(string, text) for string in self.strings]
+            return array('Q', compress(lines, map(hits.__getitem__, values)))
+        kind, value = FieldColumn.convert([text])
+        if kind == 'str':
+            return array('Q')
+        return array('Q', compress(lines, map(compare, values, repeat(value[0]))))
+
+    def counts(self, firstLine=0):
+        # (value, number of lines) most frequent first
+        counts = Counter(self.values[bisect_left(self.lines, firstLine):]).most_common()
+        if self.kind == 'str':
+            return [(self.strings[index], count) for index, count in counts]
+        return counts
+
+    def dropLine(self, line):
+        # values of the newest line, which comes last
+        while len(self.lines) > 0 and self.lines[-1] == line:
+            self.lines.pop()
+            self.values.pop()
+
+    def dropBefore(self, line):
+        cut = bisect_left(self.lines, line)
+        if cut < 4096:
+            return
+        del self.lines[:cut]
+        del self.values[:cut]
+        # strings of evicted lines are dropped once they are the majority of the table
+        if self.kind == 'str' and len(self.strings) > 2 * len(self.values) + 1024:
+            strings = self.strings
+            self.strings = []
+            self.stringIndex = {}
+            self.values = array('I', [self.intern(strings[index]) for index in self.values])
+
+
+class RecordStore:
+    # fields of every line are parsed once when it comes in: the named groups of fieldPattern and the
+    # key=value pairs of keyValuePattern; filters and counts by field work on the columns, not the text
+    fieldPattern = r'<DBGV(?P<tag>[A-Z]+): |' \
+                   r'\b(?P<level>TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL)\b(?:\s+\[?(?P<module>[A-Za-z_][\w.]*)\]?:)?'
+    keyValuePattern = r'\b([A-Za-z_]\w*)=([^\s,;]+)'
+    maxColumns = 64  # further keys are ignored, e.g. when binary garbage looks like key=value
+    query = re.compile(r'^@(\w+)\s*(!=|<=|>=|=|<|>)\s*(.*)$')
+    comparisons = {'=': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt,
+                   '>=': operator.ge}
+
+    def __init__(self, store, fieldPattern=fieldPattern, keyValuePattern=keyValuePattern):
+        # raises re.error for invalid patterns, empty patterns parse nothing
+        self.store = store
+        self.fieldRegex = re.compile(fieldPattern) if fieldPattern else None
+        self.keyValueRegex = re.compile(keyValuePattern) if keyValuePattern else None
+        self.columns = {}  # field name -> FieldColumn
+        self.endLine = store.evictedLines + len(store)  # lines up to here were parsed
+
+    @staticmethod
+    def isQuery(text):
+        return RecordStore.query.match(text) is not None
+
+    def parseLines(self, lines: List[str]):
+        # lines that were just appended to the store
+        first = self.endLine
+        self.endLine += len(lines)
+        if self.fieldRegex is None and self.keyValueRegex is None:
+            return
+        # values are collected per field first, columns convert and store a whole batch at once
+        batch = defaultdict(lambda: ([], []))  # field -> (lines, texts)
+        search = self.fieldRegex.search if self.fieldRegex else None
+        find_key_values = self.keyValueRegex.findall if self.keyValueRegex else None
+        for line, text in enumerate(lines, first):
+            if search:
+                match = search(text)
+                if match:
+                    for field, value in match.groupdict().items():
+                        if value is not None:
+                            field_lines, texts = batch[field]
+                            field_lines.append(line)
+                            texts.append(value)
+            if find_key_values and '=' in text:
+                for key, value in find_key_values(text):
+                    field_lines, texts = batch[key]
+                    if len(field_lines) > 0 and field_lines[-1] == line:
+                        # one value per field and line, the last one wins, e.g. 'ERROR net: level=ERROR'
+                        texts[-1] = value
+                        continue
+                    field_lines.append(line)
+                    texts.append(value)
+
+        for field, (field_lines, texts) in batch.items():
+            column = self.columns.get(field)
+            if column is None:
+                if len(self.columns) >= RecordStore.maxColumns:
+                    continue
+                column = self.columns[field] = FieldColumn()
+            column.extend(field_lines, texts, partial(self.storedTexts, field))
+
+    def lineFields(self, text):
+        # field -> value of one line like parseLines gets them, the last value of a field wins
+        fields = {}
+        if self.fieldRegex:
+            match = self.fieldRegex.search(text)
+            if match:
+                fields = {field: value for field, value in match.groupdict().items() if value is not None}
+        if self.keyValueRegex and '=' in text:
+            fields.update(self.keyValueRegex.findall(text))
+        return fields
+
+    def storedTexts(self, field, column: FieldColumn):
+        # values of a column as they are written in the stored lines; rows of evicted lines are dropped,
+        # their texts are gone and no query or count sees them anyway
+        evicted = self.store.evictedLines
+        cut = bisect_left(column.lines, evicted)
+        del column.lines[:cut]
+        del column.values[:cut]
+        texts = []
+        for line, value in zip(column.lines, column.values):
+            text = self.lineFields(self.store.line(line - evicted)).get(field)
+            texts.append(text if text is not None else str(value))
+        return texts
+
+    def parseStoredLines(self):
+        # catches up with lines that were added to the store without parseLines, e.g. from a file
+        end_line = self.store.evictedLines + len(self.store)
+        self.endLine = max(self.endLine, self.store.evictedLines)
+        while self.endLine < end_line:
+            first = self.endLine - self.store.evictedLines
+            self.parseLines(self.store.lines(first, min(first + 65536, end_line - self.store.evictedLines)))
+
+    def matchingLines(self, query, firstLine=0):
+        # absolute numbers of stored lines matching a query like @level=ERROR or @adc>1000;
+        # raises an Exception for malformed queries
+        match = RecordStore.query.match(query)
+        if match is None:
+            raise Exception(f"Invalid field query {query}")
+        field, comparison, value = match.groups()
+        column = self.columns.get(field)
+        if column is None:
+            return array('Q')
+        return column.matchingLines(RecordStore.comparisons[comparison], value.strip(),
+                                    max(firstLine, self.store.evictedLines))
+
+    def counts(self, field):
+        column = self.columns.get(field)
+        return column.counts(self.store.evictedLines) if column is not None else []
+
+    def replaceLast(self, text):
+        # the newest line changed in place, e.g. by a repeat counter; its values are parsed again
+        if self.endLine <= self.store.evictedLines:
+            return
+        self.endLine -= 1
+        for column in self.columns.values():
+            column.dropLine(self.endLine)
+        self.parseLines([text])
+
+    def dropEvicted(self):
+        for column in self.columns.values():
+            column.dropBefore(self.store.evictedLines)
+
+    def clear(self):
+        self.columns = {}
+        self.endLine = self.store.evictedLines + len(self.store)
@@ -0,0 +1,63 @@
+import re
+from array import array
+from typing import List
+
+
+class RepeatCollapser:
+    # consecutive repeats of a line are not passed on, a marker after the line counts them instead;
+    # in a long run there is one marker per batch, the view keeps a counter on the line up to date
+    modes = ['off', 'identical', 'masked']  # masked: lines that differ only in numbers are repeats too
+    markerPrefix = '<DBGVREP: ×'
+    markerSuffix = ' :PERVGBD>'
+    numbers = re.compile(r'\d+')
+
+    def __init__(self, mode='identical'):
+        if mode not in RepeatCollapser.modes:
+            raise Exception(f"Unknown collapse mode {mode}")
+        self.mode = mode
+        self.reset()
+
+    def reset(self):
+        self.key = None  # of the line that is repeated
+        self.count = 0  # number of times the line came in
+        self.reportedCount = 0
+        self.lastTimestamp = 0
+
+    @staticmethod
+    def marker(count):
+        return f'{RepeatCollapser.markerPrefix}{count}{RepeatCollapser.markerSuffix}'
+
+    @staticmethod
+    def markerCount(line):
+        # count of a marker line, None for other lines
+        if line.startswith(RepeatCollapser.markerPrefix) and line.endswith(RepeatCollapser.markerSuffix):
+            count = line[len(RepeatCollapser.markerPrefix):-len(RepeatCollapser.markerSuffix)]
+            if count.isdigit():
+                return int(count)
+        return None
+
+    def collapse(self, lines: List[str], timestamps: array):
+        if self.mode == 'off':
+            return lines, timestamps
+        masked = self.mode == 'masked'
+        collapsed_lines = []
+        collapsed_timestamps = array('q')
+        for line, timestamp in zip(lines, timestamps):
+            key = RepeatCollapser.numbers.sub('#', line) if masked else line
+            if key == self.key:
+                self.count += 1
+                self.lastTimestamp = timestamp
+                continue
+            self.reportRun(collapsed_lines, collapsed_timestamps)
+            self.key = key
+            self.count = self.reportedCount = 1
+            collapsed_lines.append(line)
+            collapsed_timestamps.append(timestamp)
+        self.reportRun(collapsed_lines, collapsed_timestamps)
+        return collapsed_lines, collapsed_timestamps
+
+    def reportRun(self, lines, timestamps):
+        if self.count > self.reportedCount:
+            lines.append(RepeatCollapser.marker(self.count))
+            timestamps.append(self.lastTimestamp)
+            self.reportedCount = self.count
@@ -0,0 +1,170 @@
+import os
+import selectors
+import time
+from queue import SimpleQueue, Empty
+from threading import Thread, Event
+from lineAssembler import LineAssembler
+from lineStore import receiveTimestamp
+
+
+class SerialIoLoop:
+    # one thread waits on the file descriptors of all open ports, reads whatever is ready and
+    # frames it right away; it only wakes up for data, partial line timeouts and commands
+    partialLineTimeout = LineAssembler.partialLineTimeout
+    readSize = 1 << 16
+
+    @staticmethod
+    def isSupported():
+        # needs selectable serial port file descriptors
+        return os.name == 'posix'
+
+    def __init__(self):
+        self.selector = None
+        self.commands = SimpleQueue()
+        self.wakeupReader, self.wakeupWriter = os.pipe()
+        os.set_blocking(self.wakeupReader, False)
+        self.thread = None
+        self.running = False
+        self.partialLineDeadlines = {}  # fd -> time.monotonic() when the partial line gets flushed
+
+    def start(self):
+        if self.thread is None:
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.wakeupReader, selectors.EVENT_READ)
+            self.running = True
+            self.thread = Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.thread:
+            self.call(self.exit)
+            self.thread.join()
+            self.thread = None
+            self.selector.close()
+
+    def call(self, function, wait=False) -> bool:
+        # runs function in the loop thread; False if the loop thread is gone and never runs it
+        done = Event()
+        self.commands.put((function, done))
+        os.write(self.wakeupWriter, b'\0')
+        if wait:
+            while not done.wait(0.5):
+                thread = self.thread
+                if thread is None or not thread.is_alive():
+                    return done.is_set()
+        return True
+
+    def exit(self):
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None:
+                self.removePort(key.fd)
+        self.running = False
+
+    def register(self, receiver, processor) -> bool:
+        # receiver.serialPort has to be open; processor frames the data and emits the lines
+        receiver.serialPort.reset_input_buffer()
+        receiver.statistics.reset()
+        processor.reset()
+        fd = receiver.serialPort.fileno()
+        return self.call(lambda: self.selector.register(fd, selectors.EVENT_READ, (receiver, processor)), wait=True)
+
+    def unregister(self, receiver):
+        # pending lines are emitted before this returns
+        fd = receiver.serialPort.fileno()
+        self.call(lambda: self.removePort(fd), wait=True)
+
+    def isRegistered(self, receiver):
+        if self.thread is None or receiver.serialPort is None:
+            return False
+        try:
+            return self.selector.get_key(receiver.serialPort.fileno()) is not None
+        except (KeyError, ValueError):
+            return False
+
+    def removePort(self, fd):
+        try:
+            key = self.selector.unregister(fd)
+        except (KeyError, ValueError):
+            return
+        self.partialLineDeadlines.pop(fd, None)
+        _, processor = key.data
+        processor.lineAssembler.flushPartialLine(final=True)
+        self.emitLines(processor)
+
+    def emitLines(self, processor):
+        lines, timestamps = processor.takeLines()
+        if len(lines) > 0:
+            processor.publishLines(lines, timestamps)
+            processor.lastEmitTimestamp = processor.getTimestamp()
+
+    def runCommands(self):
+        try:
+            while True:
+                os.read(self.wakeupReader, 4096)
+        except BlockingIOError:
+            pass
+        try:
+            while True:
+                function, done = self.commands.get_nowait()
+                try:
+                    function()
+                finally:
+                    done.set()
+        except Empty:
+            pass
+
+    def run(self):
+        while self.running:
+            timeout = None
+            if len(self.partialLineDeadlines) > 0:
+                timeout = max(0.0, min(self.partialLineDeadlines.values()) - time.monotonic())
+            events = self.selector.select(timeout)
+            timestamp = receiveTimestamp()
+            now = time.monotonic()
+
+            ready = []
+            for key, _ in events:
+                if key.data is None:
+                    self.runCommands()
+                    continue
+                if self.selector.get_map().get(key.fd) is not key:
+                    # unregistered by a command of this wakeup, its lines were emitted already
+                    continue
+                receiver, processor = key.data
+                try:
+                    data = os.read(key.fd, SerialIoLoop.readSize)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b''
+                if len(data) == 0:
+                    # device is gone
+                    self.removePort(key.fd)
+                    continue
+
+                if receiver.tracer:
+                    receiver.tracer.sampleRead(timestamp)
+                processor.lineAssembler.feed(data, timestamp)
+                if receiver.captureWriter:
+                    receiver.captureWriter.write(data, time.time())
+                receiver.statistics.count(len(data))
+                ready.append(processor)
+                if len(processor.lineAssembler.partialLine) > 0:
+                    self.partialLineDeadlines[key.fd] = now + SerialIoLoop.partialLineTimeout
+                else:
+                    self.partialLineDeadlines.pop(key.fd, None)
+
+            # one batch per port and wakeup
+            for processor in ready:
+                self.emitLines(processor)
+
+            for fd, deadline in list(self.partialLineDeadlines.items()):
+                if deadline <= now:
+                    # sender is idle, e.g. after a prompt without line ending
+                    del self.partialLineDeadlines[fd]
+                    key = self.selector.get_map().get(fd)
+                    if key is None:
+                        continue
+                    _, processor = key.data
+                    processor.lineAssembler.flushPartialLine()
+                    self.emitLines(processor)
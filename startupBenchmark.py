@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# launches the application with N saved connections and measures until its event loop is idle;
+# cold: without compiled forms and byte code, warm: the launches after that
+#   python startupBenchmark.py --windows 0 5 20 --runs 3
+
+driver = '''
+import sys, time
+start = time.perf_counter()
+from PySide6.QtCore import QTimer
+from application import Application
+app = Application(sys.argv)
+def ready():
+    print(time.perf_counter() - start)
+    app.quit()
+QTimer.singleShot(0, ready)
+app.exec()
+'''
+
+
+def copyTree(directory):
+    source = os.path.dirname(os.path.abspath(__file__))
+    shutil.copytree(source, directory, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns('.git', '__pycache__', '__uicache__', 'settings.ini', '*.log',
+                                                  'captures', '.venv', 'venv'))
+
+
+def writeSettings(directory, windows, viewMode):
+    # the application starts disconnected, the ports don't have to exist
+    from PySide6.QtCore import QSettings, QSize
+    from debugOutput import SerialConnectionSettings
+    from debugOutputWindow import DebugOutputWindowSettings
+
+    settings = QSettings(os.path.join(directory, 'settings.ini'), QSettings.Format.IniFormat)
+    settings.beginWriteArray("connections")
+    for i in range(windows):
+        settings.setArrayIndex(i)
+        view_settings = DebugOutputWindowSettings()
+        view_settings.viewMode = viewMode
+        settings.setValue("debugOutput", SerialConnectionSettings(f'/dev/benchmark{i}'))
+        settings.setValue("view/title", f'benchmark {i}')
+        settings.setValue("view/size", QSize(400, 300))
+        settings.setValue("view/settings", view_settings)
+    settings.endArray()
+    settings.sync()
+
+
+def clearCaches(directory):
+    for root, directories, _ in os.walk(directory):
+        for name in directories:
+            if name in ('__pycache__', '__uicache__'):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def launch(directory, environment):
+    # (seconds until the event loop is idle, seconds from spawn to exit)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', driver], cwd=directory, env=environment,
+                            capture_output=True, text=True, timeout=300)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        raise Exception(f"Launch failed: {result.stderr}")
+    return float(result.stdout.strip().splitlines()[-1]), total
+
+
+def main(arguments):
+    parser = argparse.ArgumentParser(description='Measure the startup time of the application.')
+    parser.add_argument('--windows', type=int, nargs='+', default=[0, 20], help='numbers of restored windows')
+    parser.add_argument('--runs', type=int, default=3, help='warm launches per number of windows')
+    parser.add_argument('--view-mode', choices=['text', 'list'], default='text')
+    parser.add_argument('--json', action='store_true', help='print the results as json')
+    args = parser.parse_args(arguments)
+
+    environment = dict(os.environ)
+    if sys.platform.startswith('linux') and 'DISPLAY' not in environment and 'WAYLAND_DISPLAY' not in environment:
+        environment.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    results = []
+    for windows in args.windows:
+        with tempfile.TemporaryDirectory(prefix='startupBenchmark_') as directory:
+            copyTree(directory)
+            writeSettings(directory, windows, args.view_mode)
+            clearCaches(directory)
+            cold_ready, cold_total = launch(directory, environment)
+            warm = [launch(directory, environment) for _ in range(args.runs)]
+        results.append({'windows': windows,
+                         'coldReady': round(cold_ready, 3), 'coldTotal': round(cold_total, 3),
+                         'warmReady': round(statistics.median(ready for ready, _ in warm), 3),
+                         'warmTotal': round(statistics.median(total for _, total in warm), 3)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'windows':>8} {'cold ready':>11} {'cold total':>11} {'warm ready':>11} {'warm total':>11}")
+    for result in results:
+        print(f"{result['windows']:>8} {result['coldReady']:>10.3f}s {result['coldTotal']:>10.3f}s "
+              f"{result['warmReady']:>10.3f}s {result['warmTotal']:>10.3f}s")
+    print('ready: until the event loop is idle, total: from spawn to exit; warm values are medians')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
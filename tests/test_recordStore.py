@@ -0,0 +1,57 @@
+import unittest
+from lineStore import LineStore
+from recordStore import RecordStore
+
+
+class RecordStoreTest(unittest.TestCase):
+    def parse(self, *batches):
+        store = LineStore()
+        records = RecordStore(store)
+        for lines in batches:
+            store.append(lines)
+            records.parseLines(lines)
+        return records
+
+    def test_field_of_both_patterns_counts_once(self):
+        records = self.parse(['ERROR net: level=ERROR', 'INFO net: up'])
+        self.assertEqual(list(records.matchingLines('@level=ERROR')), [0])
+        self.assertEqual(records.counts('level'), [('ERROR', 1), ('INFO', 1)])
+
+    def test_repeated_key_keeps_last_value(self):
+        records = self.parse(['a=1 a=2', 'a=3'])
+        column = records.columns['a']
+        self.assertEqual(list(column.lines), [0, 1])
+        self.assertEqual(list(column.values), [2, 3])
+        self.assertEqual(list(records.matchingLines('@a=1')), [])
+        self.assertEqual(list(records.matchingLines('@a=2')), [0])
+
+    def test_lines_stay_strictly_increasing(self):
+        records = self.parse(['WARN x: level=ERROR a=1 a=2'], ['a=3 a=4 level=INFO'])
+        for column in records.columns.values():
+            lines = list(column.lines)
+            self.assertEqual(lines, sorted(set(lines)))
+
+    def test_promotion_to_str_keeps_texts(self):
+        lines = ['x=3', 'x=4.5', 'x=0x10', 'x=abc']
+        for batches in [[lines], [[line] for line in lines]]:
+            records = self.parse(*batches)
+            column = records.columns['x']
+            self.assertEqual(column.kind, 'str')
+            self.assertEqual([column.strings[index] for index in column.values], ['3', '4.5', '0x10', 'abc'])
+            self.assertEqual(list(records.matchingLines('@x=3')), [0])
+
+    def test_promotion_to_str_drops_evicted_rows(self):
+        store = LineStore()
+        store.setLimit(2)
+        records = RecordStore(store)
+        for line in ['x=1', 'x=2', 'x=3', 'x=abc']:
+            store.append([line])
+            store.removeFirst(store.excessLines())
+            records.parseLines([line])
+        column = records.columns['x']
+        self.assertEqual(list(column.lines), [2, 3])
+        self.assertEqual([column.strings[index] for index in column.values], ['3', 'abc'])
+
+
+if __name__ == '__main__':
+    unittest.main()
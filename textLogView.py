@@ -0,0 +1,155 @@
+from PySide6.QtCore import Qt, QObject, QEvent, QPoint, QRectF, Signal
+from PySide6.QtGui import QTextCursor, QPainter, QPalette
+from PySide6.QtWidgets import QTextEdit, QWidget
+from typing import List
+from text_highlighter.textHighlighter import TextHighlighter, TextHighlighterConfig
+from text_highlighter.chunkedRehighlighter import ChunkedRehighlighter
+from lineStore import LineStore
+
+
+class TimestampGutter(QWidget):
+    def __init__(self, logView):
+        super().__init__(logView.textEdit)
+        self.logView = logView
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), self.palette().window())
+        self.logView.paintTimestamps(painter, self.width())
+        painter.end()
+
+
+class TextLogView(QObject):
+    rehighlightProgress = Signal(int)
+
+    def __init__(self, textEdit: QTextEdit):
+        super().__init__(textEdit)
+        self.textEdit = textEdit
+        # holds the same lines as the document, block n is line store.evictedLines + n
+        self.store = LineStore()
+
+        self.highlighter = TextHighlighter()
+        self.highlighter.setDocument(self.textEdit.document())
+
+        self.rehighlighter = ChunkedRehighlighter(self.highlighter, self.textEdit, self)
+        self.rehighlighter.progressChanged.connect(self.rehighlightProgress)
+
+        # timestamps are painted next to the viewport for the visible blocks only
+        self.timestampMode = 'none'
+        self.gutter = TimestampGutter(self)
+        self.gutter.hide()
+        self.textEdit.verticalScrollBar().valueChanged.connect(self.gutter.update)
+        self.textEdit.installEventFilter(self)
+
+    def widget(self):
+        return self.textEdit
+
+    def clear(self):
+        self.rehighlighter.cancel()
+        self.store.clear()
+        self.textEdit.clear()
+
+    def text(self):
+        cursor = self.textEdit.textCursor()
+        if cursor.selection().isEmpty():
+            return self.textEdit.toPlainText()
+        # copy selected text
+        return cursor.selection().toPlainText()
+
+    def showLine(self, line):
+        # select absolute line and scroll it into view
+        block = self.textEdit.document().findBlockByNumber(line - self.store.evictedLines)
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        self.textEdit.setTextCursor(cursor)
+        self.textEdit.ensureCursorVisible()
+
+    def setTimestampMode(self, mode):
+        self.timestampMode = mode
+        width = 0
+        if mode != 'none':
+            width = self.textEdit.fontMetrics().horizontalAdvance('00:00:00.000000') + 12
+        self.textEdit.setViewportMargins(width, 0, 0, 0)
+        self.gutter.setVisible(width > 0)
+        self.updateGutterGeometry()
+
+    def updateGutterGeometry(self):
+        rect = self.textEdit.contentsRect()
+        self.gutter.setGeometry(rect.left(), rect.top(), self.textEdit.viewportMargins().left(), rect.height())
+        self.gutter.update()
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Resize:
+            self.updateGutterGeometry()
+        return False
+
+    def paintTimestamps(self, painter: QPainter, width):
+        document = self.textEdit.document()
+        layout = document.documentLayout()
+        scroll_offset = self.textEdit.verticalScrollBar().value()
+        line_height = self.textEdit.fontMetrics().lineSpacing()
+        painter.setPen(self.gutter.palette().color(QPalette.PlaceholderText))
+
+        block = self.textEdit.cursorForPosition(QPoint(0, 0)).block()
+        while block.isValid() and len(self.store) > 0:
+            top = layout.blockBoundingRect(block).top() - scroll_offset
+            if top > self.gutter.height():
+                break
+            # block n is line n of the store
+            painter.drawText(QRectF(0, top, width - 6, line_height), Qt.AlignRight | Qt.AlignVCenter,
+                             self.store.timestampText(block.blockNumber(), self.timestampMode))
+            block = block.next()
+
+    def setHighlighterSettings(self, settings: List[TextHighlighterConfig]):
+        self.highlighter.setSettings(settings)
+        if not self.textEdit.document().isEmpty():
+            self.rehighlighter.start()
+
+    def setScrollbackLimit(self, limit, unit='lines'):
+        self.store.setLimit(limit, unit)
+        self.trimScrollback()
+
+    def trimScrollback(self):
+        excess = self.store.excessLines()
+        if excess <= 0:
+            return
+        self.store.removeFirst(excess)
+
+        # evict the same whole blocks from the front of the document
+        document = self.textEdit.document()
+        block = document.findBlockByNumber(excess)
+        cursor = QTextCursor(document)
+        if block.isValid():
+            cursor.setPosition(block.position(), QTextCursor.KeepAnchor)
+        else:
+            cursor.select(QTextCursor.Document)
+        cursor.removeSelectedText()
+
+    def replaceLastLine(self, text):
+        self.store.replaceLast(text)
+        cursor = QTextCursor(self.textEdit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
+        cursor.insertText(text)
+
+    def insertLines(self, lines, timestamps=None):
+        document = self.textEdit.document()
+        text = '\n'.join(lines)
+        if len(self.store) > 0:
+            text = '\n' + text
+        self.store.append(lines, timestamps)
+
+        scroll_bar = self.textEdit.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+
+        # one edit per flush, independent of the user's cursor and selection
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self.trimScrollback()
+
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+        self.gutter.update()
@@ -0,0 +1,73 @@
+from PySide6.QtCore import QObject, QTimer, QElapsedTimer, QPoint, Signal
+from PySide6.QtWidgets import QTextEdit
+from text_highlighter.textHighlighter import TextHighlighter
+
+
+class ChunkedRehighlighter(QObject):
+    progressChanged = Signal(int)  # percent, 100 when done
+
+    sliceDuration = 10  # ms of work per event loop iteration
+
+    def __init__(self, highlighter: TextHighlighter, textEdit: QTextEdit, parent=None):
+        super().__init__(parent)
+        self.highlighter = highlighter
+        self.textEdit = textEdit
+        self.nextBlockNumber = -1
+        self.totalBlocks = 0
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.processSlice)
+
+    def isRunning(self):
+        return self.timer.isActive()
+
+    def start(self):
+        # a running pass is cancelled and starts over with the current rules
+        self.timer.stop()
+        self.rehighlightVisibleBlocks()
+
+        document = self.textEdit.document()
+        self.totalBlocks = document.blockCount()
+        self.nextBlockNumber = self.totalBlocks - 1
+        self.progressChanged.emit(0)
+        self.timer.start()
+
+    def cancel(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.progressChanged.emit(100)
+
+    def rehighlightVisibleBlocks(self):
+        viewport = self.textEdit.viewport()
+        block = self.textEdit.cursorForPosition(QPoint(0, 0)).block()
+        last = self.textEdit.cursorForPosition(QPoint(viewport.width(), viewport.height())).block()
+        while block.isValid():
+            self.highlighter.rehighlightBlock(block)
+            if block == last:
+                break
+            block = block.next()
+
+    def processSlice(self):
+        # walks from the end to the start: the view usually follows the end and blocks
+        # evicted from the front only shift the remaining ones, nothing gets skipped
+        document = self.textEdit.document()
+        self.nextBlockNumber = min(self.nextBlockNumber, document.blockCount() - 1)
+        block = document.findBlockByNumber(self.nextBlockNumber)
+
+        elapsed = QElapsedTimer()
+        elapsed.start()
+        while block.isValid() and elapsed.elapsed() < ChunkedRehighlighter.sliceDuration:
+            # every format change makes QTextEdit lay out the rest of the document again,
+            # so only blocks that are highlighted now or will be highlighted are touched
+            if len(block.layout().formats()) > 0 or self.highlighter.couldMatch(block.text()):
+                self.highlighter.rehighlightBlock(block)
+            block = block.previous()
+            self.nextBlockNumber -= 1
+
+        if block.isValid():
+            done = self.totalBlocks - self.nextBlockNumber
+            self.progressChanged.emit(min(99, int(100 * done / max(1, self.totalBlocks))))
+        else:
+            self.timer.stop()
+            self.progressChanged.emit(100)
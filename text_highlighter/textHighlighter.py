@@ -6,25 +6,68 @@ from text_highlighter.textHighlighterConfig import TextHighlighterConfig
 
 
 class TextHighlighter(QSyntaxHighlighter):
+    # backreferences are numbered per pattern and break when patterns are joined
+    _unfusablePattern = re.compile(r'\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)')
+
     def __init__(self, parent=None):
         QSyntaxHighlighter.__init__(self, parent)
         self._settings: List[TextHighlighterConfig] = []
+        self._rules = []  # (compiled pattern, format) in settings order
+        self._fusedPattern = None  # matches if any fusable rule matches
+        self._unfusedRules = []
 
     def setSettings(self, settings: List[TextHighlighterConfig]):
         self._settings = settings
+        self.compileRules()
 
-    def highlightBlock(self, text):
-        if len(text) < 1:
-            return
+    def compileRules(self):
+        self._rules = []
+        fusable_patterns = []
+        self._unfusedRules = []
 
         for setting in self._settings:
-            for match in re.finditer(setting.pattern, text):
-                text_format = QTextCharFormat()
-                text_format.setFontItalic(bool(setting.italic))
-                text_format.setFontWeight(bool(setting.bold))
-                text_format.setFontPointSize(int(setting.font_size))
-                text_format.setForeground(QColor(setting.color_foreground))
-                text_format.setBackground(QColor(setting.color_background))
+            try:
+                regex = re.compile(setting.pattern)
+            except re.error:
+                continue  # invalid patterns can be entered in the settings dialog
+
+            text_format = QTextCharFormat()
+            text_format.setFontItalic(bool(setting.italic))
+            text_format.setFontWeight(QFont.Bold if setting.bold else QFont.Normal)
+            text_format.setFontPointSize(int(setting.font_size))
+            text_format.setForeground(QColor(setting.color_foreground))
+            text_format.setBackground(QColor(setting.color_background))
+            self._rules.append((regex, text_format))
+
+            if self._unfusablePattern.search(setting.pattern):
+                self._unfusedRules.append(regex)
+            else:
+                fusable_patterns.append(setting.pattern)
+
+        self._fusedPattern = None
+        if len(fusable_patterns) > 0:
+            try:
+                self._fusedPattern = re.compile('|'.join(f'(?:{p})' for p in fusable_patterns))
+            except re.error:
+                self._unfusedRules = [regex for regex, _ in self._rules]
+
+    def couldMatch(self, text):
+        # one pass over the text with all rules joined into one alternation;
+        # most lines don't match any rule and are done after this
+        if self._fusedPattern and self._fusedPattern.search(text):
+            return True
+        return any(regex.search(text) for regex in self._unfusedRules)
+
+    def highlightBlock(self, text):
+        for start, length, text_format in self.formatRanges(text):
+            self.setFormat(start, length, text_format)
+
+    def formatRanges(self, text):
+        if len(text) < 1 or not self.couldMatch(text):
+            return
 
+        # later rules override earlier ones where matches overlap, as before
+        for regex, text_format in self._rules:
+            for match in regex.finditer(text):
                 start, end = match.span()
-                self.setFormat(start, end - start, text_format)
+                yield start, end - start, text_format
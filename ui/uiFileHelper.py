@@ -1,9 +1,87 @@
+import importlib.util
+import os
+import subprocess
 import sys
-from PySide6.QtUiTools import QUiLoader
-from PySide6.QtCore import QFile
+import xml.etree.ElementTree
+from PySide6 import QtWidgets
+
+# forms are compiled with pyside6-uic into ui/__uicache__ the first time they are used and again whenever
+# the .ui file is newer than its module; QUiLoader is only the fallback when uic can't be run
+cacheDirectory = '__uicache__'
+_formClasses = {}  # ui file name -> (Ui_Form class, root widget class)
+
+
+def uicExecutable():
+    import PySide6
+    name = 'uic.exe' if sys.platform == 'win32' else 'uic'
+    for directory in [os.path.dirname(PySide6.__file__), os.path.join(os.path.dirname(PySide6.__file__), 'Qt', 'libexec')]:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def compileUiFile(ui_file_name, module_file_name):
+    uic = uicExecutable()
+    if uic is None:
+        return False
+    # written next to the target first, a half written module must never be imported
+    temporary_file_name = f'{module_file_name}.{os.getpid()}.tmp'
+    try:
+        # fails e.g. on a read-only install, QUiLoader takes over then
+        os.makedirs(os.path.dirname(module_file_name), exist_ok=True)
+        subprocess.run([uic, '-g', 'python', ui_file_name, '-o', temporary_file_name], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        root_class = xml.etree.ElementTree.parse(ui_file_name).getroot().find('widget').get('class')
+        with open(temporary_file_name, 'a') as f:
+            f.write(f'\nrootClass = {root_class!r}\n')
+        os.replace(temporary_file_name, module_file_name)
+    except (OSError, subprocess.CalledProcessError):
+        if os.path.exists(temporary_file_name):
+            os.remove(temporary_file_name)
+        return False
+    return True
+
+
+def loadFormClass(ui_file_name):
+    directory, base_name = os.path.split(ui_file_name)
+    module_name = os.path.splitext(base_name)[0] + '_ui'
+    module_file_name = os.path.join(directory, cacheDirectory, module_name + '.py')
+    try:
+        up_to_date = os.path.getmtime(module_file_name) >= os.path.getmtime(ui_file_name)
+    except OSError:
+        up_to_date = False
+    if not up_to_date and not compileUiFile(ui_file_name, module_file_name):
+        return None
+
+    spec = importlib.util.spec_from_file_location(module_name, module_file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    form_class = next(value for name, value in vars(module).items() if name.startswith('Ui_'))
+    return form_class, getattr(QtWidgets, module.rootClass)
 
 
 def createWidgetFromUiFile(ui_file_name):
+    if ui_file_name not in _formClasses:
+        _formClasses[ui_file_name] = loadFormClass(ui_file_name)
+    form = _formClasses[ui_file_name]
+    if form is None:
+        return loadUiFile(ui_file_name)
+
+    form_class, root_class = form
+    widget = root_class()
+    ui = form_class()
+    ui.setupUi(widget)
+    # children are attributes of the widget, like with QUiLoader
+    for name, value in vars(ui).items():
+        setattr(widget, name, value)
+    return widget
+
+
+def loadUiFile(ui_file_name):
+    from PySide6.QtUiTools import QUiLoader
+    from PySide6.QtCore import QFile
+
     ui_file = QFile(ui_file_name)
     if not ui_file.open(QFile.ReadOnly):
         print(f"Cannot open {ui_file_name}: {ui_file.errorString()}")
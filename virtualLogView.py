@@ -0,0 +1,358 @@
+from PySide6.QtCore import Qt, QObject, QPointF, QRectF, Signal
+from PySide6.QtGui import QTextLayout, QPalette, QTextOption, QPainter, QKeySequence, QColor
+from PySide6.QtWidgets import QApplication, QAbstractScrollArea, QScrollBar
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import List
+from lineStore import LineStore
+from text_highlighter.textHighlighter import TextHighlighter, TextHighlighterConfig
+
+
+class LogViewport(QAbstractScrollArea):
+    formatCacheSize = 2048
+
+    def __init__(self, store: LineStore, highlighter: TextHighlighter, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.highlighter = highlighter
+        self.formatCache = OrderedDict()
+        self.rowMap = None  # sorted absolute line numbers of the rows when only some lines are shown
+        self.knownRowOffset = self.rowOffset()
+        self.maxLineWidth = 0
+        self.timestampMode = 'none'
+
+        # selected lines as absolute line numbers, they stay valid when lines get evicted
+        self.selectionAnchor = None
+        self.selectionCursor = None
+
+        self.textOption = QTextOption()
+        self.textOption.setWrapMode(QTextOption.NoWrap)
+
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.verticalScrollBar().setSingleStep(1)
+        self.updateScrollBars()
+
+    def rowOffset(self):
+        # rows that were evicted from the front so far
+        if self.rowMap is None:
+            return self.store.evictedLines
+        return bisect_left(self.rowMap, self.store.evictedLines)
+
+    def rowCount(self):
+        if self.rowMap is None:
+            return len(self.store)
+        return len(self.rowMap) - self.rowOffset()
+
+    def lineOfRow(self, row):
+        # absolute line number shown in row
+        if self.rowMap is None:
+            return self.store.evictedLines + row
+        return self.rowMap[self.rowOffset() + row]
+
+    def rowOfLine(self, line):
+        # row of the absolute line, or of the next shown line
+        if self.rowMap is None:
+            return line - self.store.evictedLines
+        return bisect_left(self.rowMap, line) - self.rowOffset()
+
+    def setRowMap(self, rowMap):
+        # None shows all lines
+        self.rowMap = rowMap
+        self.knownRowOffset = self.rowOffset()
+        self.updateScrollBars()
+        self.scrollToBottom()
+        self.viewport().update()
+
+    def dropEvictedRows(self):
+        # the row map keeps pace with the store, rows of evicted lines are cut off the front
+        if self.rowMap is None:
+            return
+        cut = bisect_left(self.rowMap, self.store.evictedLines)
+        if cut < 4096:
+            return
+        del self.rowMap[:cut]
+        self.knownRowOffset -= cut
+
+    def rowTexts(self, first, last):
+        if self.rowMap is None:
+            return self.store.lines(first, last + 1)
+        evicted = self.store.evictedLines
+        return [self.store.line(self.lineOfRow(row) - evicted) for row in range(first, last + 1)]
+
+    def text(self, selectionOnly=False):
+        selection = self.selectedRows()
+        if selection is None:
+            return '' if selectionOnly else '\n'.join(self.rowTexts(0, self.rowCount() - 1))
+        # copy selected lines
+        return '\n'.join(self.rowTexts(selection[0], selection[1]))
+
+    def setTimestampMode(self, mode):
+        self.timestampMode = mode
+        self.updateScrollBars()
+        self.viewport().update()
+
+    def timestampWidth(self):
+        if self.timestampMode == 'none':
+            return 0
+        return self.fontMetrics().horizontalAdvance('00:00:00.000000') + 12
+
+    def sourceWidth(self):
+        if self.store.sources is None:
+            return 0
+        return max(map(self.fontMetrics().horizontalAdvance, self.store.sourceNames), default=0) + 12
+
+    def gutterWidth(self):
+        return self.timestampWidth() + self.sourceWidth()
+
+    @staticmethod
+    def sourceColor(source):
+        # hues spread by the golden angle stay distinct for any number of sources
+        return QColor.fromHsv(source * 137 % 360, 64, 255)
+
+    def rowHeight(self):
+        return self.fontMetrics().lineSpacing()
+
+    def visibleRows(self):
+        return max(1, self.viewport().height() // self.rowHeight())
+
+    def updateScrollBars(self):
+        # one scroll step per line, nothing is laid out beyond the visible rows
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setRange(0, max(0, self.rowCount() - self.visibleRows()))
+        scroll_bar.setPageStep(self.visibleRows())
+
+        scroll_bar = self.horizontalScrollBar()
+        scroll_bar.setRange(0, max(0, int(self.maxLineWidth) + self.gutterWidth() - self.viewport().width()))
+        scroll_bar.setPageStep(self.viewport().width())
+
+    def isAtBottom(self):
+        scroll_bar = self.verticalScrollBar()
+        return scroll_bar.value() >= scroll_bar.maximum()
+
+    def scrollToBottom(self):
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
+
+    def linesChanged(self):
+        # called after lines were appended or evicted from the front
+        at_bottom = self.isAtBottom()
+        row_offset = self.rowOffset()
+        evicted = row_offset - self.knownRowOffset
+        self.knownRowOffset = row_offset
+        value = self.verticalScrollBar().value()
+
+        self.updateScrollBars()
+        if at_bottom:
+            self.scrollToBottom()
+        elif evicted > 0:
+            # keep the lines that are shown in place
+            self.verticalScrollBar().setValue(value - evicted)
+        self.viewport().update()
+
+    def lineChanged(self, line):
+        # absolute line whose text changed
+        self.formatCache.pop(line, None)
+        self.viewport().update()
+
+    def clear(self):
+        self.selectionAnchor = None
+        self.selectionCursor = None
+        self.maxLineWidth = 0
+        self.invalidateFormats()
+        self.linesChanged()
+
+    def invalidateFormats(self):
+        self.formatCache.clear()
+        self.viewport().update()
+
+    def formatRanges(self, row, text):
+        # highlighting runs only for painted rows, results are cached by absolute line number
+        key = self.lineOfRow(row)
+        ranges = self.formatCache.get(key)
+        if ranges is None:
+            ranges = []
+            for start, length, text_format in self.highlighter.formatRanges(text):
+                format_range = QTextLayout.FormatRange()
+                format_range.start = start
+                format_range.length = length
+                format_range.format = text_format
+                ranges.append(format_range)
+            self.formatCache[key] = ranges
+            if len(self.formatCache) > LogViewport.formatCacheSize:
+                self.formatCache.popitem(last=False)
+        else:
+            self.formatCache.move_to_end(key)
+        return ranges
+
+    def selectedRows(self):
+        # (first, last) row of the selection or None
+        if self.selectionAnchor is None:
+            return None
+        first = self.rowOfLine(min(self.selectionAnchor, self.selectionCursor))
+        last = self.rowOfLine(max(self.selectionAnchor, self.selectionCursor) + 1) - 1
+        last = min(last, self.rowCount() - 1)
+        if last < max(0, first):
+            return None
+        return max(0, first), last
+
+    def rowAt(self, y):
+        row = self.verticalScrollBar().value() + int(y) // self.rowHeight()
+        return max(0, min(row, self.rowCount() - 1))
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        row_height = self.rowHeight()
+        width = self.viewport().width()
+        timestamp_width = self.timestampWidth()
+        source_width = self.sourceWidth()
+        gutter_width = timestamp_width + source_width
+        x = gutter_width - self.horizontalScrollBar().value()
+        first = self.verticalScrollBar().value()
+        last = min(self.rowCount(), first + self.visibleRows() + 1)
+        selection = self.selectedRows()
+        max_line_width = self.maxLineWidth
+
+        evicted = self.store.evictedLines
+        for y, row in enumerate(range(first, last)):
+            y *= row_height
+            text = self.store.line(self.lineOfRow(row) - evicted)
+            selected = selection is not None and selection[0] <= row <= selection[1]
+            if selected:
+                painter.fillRect(0, y, width, row_height, palette.highlight())
+            painter.setPen(palette.color(QPalette.HighlightedText if selected else QPalette.Text))
+
+            layout = QTextLayout(text, self.font())
+            layout.setTextOption(self.textOption)
+            layout.setFormats(self.formatRanges(row, text))
+            layout.beginLayout()
+            line = layout.createLine()
+            if line.isValid():
+                line.setLineWidth(1e6)
+                max_line_width = max(max_line_width, line.naturalTextWidth())
+            layout.endLayout()
+            layout.draw(painter, QPointF(x, y))
+
+            # gutter is drawn over the text, it doesn't scroll horizontally
+            if timestamp_width > 0:
+                painter.fillRect(0, y, timestamp_width, row_height, palette.window())
+                painter.setPen(palette.color(QPalette.PlaceholderText))
+                painter.drawText(QRectF(0, y, timestamp_width - 6, row_height), Qt.AlignRight | Qt.AlignVCenter,
+                                 self.store.timestampText(self.lineOfRow(row) - evicted, self.timestampMode))
+            if source_width > 0:
+                source = self.store.sourceIndex(self.lineOfRow(row) - evicted)
+                painter.fillRect(timestamp_width, y, source_width, row_height, self.sourceColor(source))
+                painter.setPen(Qt.black)
+                painter.drawText(QRectF(timestamp_width + 6, y, source_width - 6, row_height),
+                                 Qt.AlignLeft | Qt.AlignVCenter, self.store.sourceNames[source])
+        if gutter_width > 0:
+            painter.fillRect(0, (last - first) * row_height, gutter_width, self.viewport().height(), palette.window())
+        painter.end()
+
+        if max_line_width > self.maxLineWidth:
+            self.maxLineWidth = max_line_width
+            self.updateScrollBars()
+
+    def showLine(self, line):
+        # select absolute line and center it if it is not visible
+        row = self.rowOfLine(line)
+        if row < 0 or row >= self.rowCount():
+            return
+        line = self.lineOfRow(row)
+        self.selectionAnchor = self.selectionCursor = line
+        first = self.verticalScrollBar().value()
+        if row < first or row >= first + self.visibleRows():
+            self.verticalScrollBar().setValue(row - self.visibleRows() // 2)
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        at_bottom = self.isAtBottom()
+        super().resizeEvent(event)
+        self.updateScrollBars()
+        if at_bottom:
+            self.scrollToBottom()
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton or self.rowCount() == 0:
+            return super().mousePressEvent(event)
+        line = self.lineOfRow(self.rowAt(event.position().y()))
+        if not (event.modifiers() & Qt.ShiftModifier) or self.selectionAnchor is None:
+            self.selectionAnchor = line
+        self.selectionCursor = line
+        self.viewport().update()
+
+    def mouseMoveEvent(self, event):
+        if not (event.buttons() & Qt.LeftButton) or self.selectionAnchor is None:
+            return super().mouseMoveEvent(event)
+        y = event.position().y()
+        if y < 0:
+            self.verticalScrollBar().triggerAction(QScrollBar.SliderSingleStepSub)
+        elif y > self.viewport().height():
+            self.verticalScrollBar().triggerAction(QScrollBar.SliderSingleStepAdd)
+        self.selectionCursor = self.lineOfRow(self.rowAt(y))
+        self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.SelectAll) and self.rowCount() > 0:
+            self.selectionAnchor = self.lineOfRow(0)
+            self.selectionCursor = self.lineOfRow(self.rowCount() - 1)
+            self.viewport().update()
+        elif event.matches(QKeySequence.Copy):
+            text = self.text(selectionOnly=True)
+            if len(text) > 0:
+                QApplication.clipboard().setText(text)
+        elif event.matches(QKeySequence.MoveToStartOfDocument):
+            self.verticalScrollBar().setValue(0)
+        elif event.matches(QKeySequence.MoveToEndOfDocument):
+            self.scrollToBottom()
+        else:
+            super().keyPressEvent(event)
+
+
+class VirtualLogView(QObject):
+    rehighlightProgress = Signal(int)  # rows are highlighted lazily, nothing to wait for
+
+    def __init__(self, parent=None, store=None):
+        super().__init__(parent)
+        self.store = store if store is not None else LineStore()
+        self.highlighter = TextHighlighter()
+        self.viewport = LogViewport(self.store, self.highlighter, parent)
+
+    def widget(self):
+        return self.viewport
+
+    def clear(self):
+        self.store.clear()
+        self.viewport.clear()
+
+    def text(self, selectionOnly=False):
+        return self.viewport.text(selectionOnly)
+
+    def showLine(self, line):
+        self.viewport.showLine(line)
+
+    def setHighlighterSettings(self, settings: List[TextHighlighterConfig]):
+        self.highlighter.setSettings(settings)
+        self.viewport.invalidateFormats()
+
+    def setTimestampMode(self, mode):
+        self.viewport.setTimestampMode(mode)
+
+    def setScrollbackLimit(self, limit, unit='lines'):
+        self.store.setLimit(limit, unit)
+        self.store.removeFirst(self.store.excessLines())
+        self.viewport.linesChanged()
+
+    def publishLines(self, count):
+        # for stores that grow on their own, e.g. while a file is indexed
+        self.store.publish(count)
+        self.viewport.linesChanged()
+
+    def replaceLastLine(self, text):
+        self.store.replaceLast(text)
+        self.viewport.lineChanged(self.store.evictedLines + len(self.store) - 1)
+
+    def insertLines(self, lines, timestamps=None, sources=None):
+        self.store.append(lines, timestamps, sources)
+        self.store.removeFirst(self.store.excessLines())
+        self.viewport.linesChanged()
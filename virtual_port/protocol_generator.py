@@ -0,0 +1,61 @@
+import random
+import time
+from virtual_port.ptyPort import PtyPort
+
+# generator://?rate=<lines/s, 0: as fast as possible>&mix=<kind:weight,...>&lines=<count, 0: endless>&seed=<n>
+# every line starts with its sequence number, so lost lines can be found
+
+
+class Serial(PtyPort):
+    # kind -> line for sequence number n and random number r; numbers are padded, so the bytes per line
+    # don't grow with the sequence number and a line rate is a steady byte rate
+    kinds = {
+        'info': lambda n, r: f'{n:010d} INFO  task{r % 8} tick={n:010d} adc={r % 4096:04d} state=RUN\n'.encode(),
+        'warn': lambda n, r: f'{n:010d} WARN  buffer {r % 100:02d}% full, {r % 17:02d} retries\n'.encode(),
+        'error': lambda n, r: f'{n:010d} ERROR code=0x{r % 65536:04X} in module m{r % 12:02d}\n'.encode(),
+        'long': lambda n, r: f'{n:010d} DUMP {r:08x} '.encode() + r.to_bytes(4, 'little').hex().encode() * 80 + b'\n',
+        'utf8': lambda n, r: f'{n:010d} UTF8  Grüße – Temperatur {r % 90:02d} °C ✓\n'.encode(),
+        'binary': lambda n, r: f'{n:010d} BIN   '.encode() + bytes((0x80 | (r >> i) & 0x7f) for i in range(16)) + b'\n',
+    }
+    defaultMix = 'info:90,warn:8,error:2'
+    tick = 0.01  # seconds between writes at a fixed rate
+    burstLines = 2000  # lines per write as fast as possible
+
+    def openSource(self, path, options):
+        self.rate = self.option(options, 'rate', 1000, float)
+        self.lines = self.option(options, 'lines', 0, int)
+        self.random = random.Random(self.option(options, 'seed', 0, int))
+        self.mix = []
+        self.weights = []
+        for entry in self.option(options, 'mix', Serial.defaultMix).split(','):
+            kind, _, weight = entry.partition(':')
+            if kind not in Serial.kinds:
+                raise ValueError(f'unknown line kind {kind}, known: {", ".join(Serial.kinds)}')
+            self.mix.append(Serial.kinds[kind])
+            self.weights.append(float(weight or 1))
+        if self.rate < 0 or self.lines < 0 or sum(self.weights) <= 0:
+            raise ValueError('rate, lines and weights must not be negative')
+
+    def runSource(self):
+        sent = 0
+        start = time.monotonic()
+        while self.lines == 0 or sent < self.lines:
+            if self.rate > 0:
+                # the lines that are due, at most a second of them after the reader stalled the pty
+                if not self.waitUntil(start + (sent + 1) / self.rate):
+                    return
+                count = max(1, min(int((time.monotonic() - start) * self.rate) - sent, int(self.rate)))
+            else:
+                count = Serial.burstLines
+            if self.lines > 0:
+                count = min(count, self.lines - sent)
+            if not self.writeSource(self.generate(sent, count)):
+                return
+            sent += count
+            if self.rate > 0 and not self.waitUntil(time.monotonic() + Serial.tick):
+                return
+
+    def generate(self, first, count):
+        kinds = self.random.choices(self.mix, self.weights, k=count)
+        numbers = [self.random.getrandbits(32) for _ in range(count)]
+        return b''.join(kind(first + i, r) for i, (kind, r) in enumerate(zip(kinds, numbers)))
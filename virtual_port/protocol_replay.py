@@ -0,0 +1,75 @@
+import os
+import time
+from captureWriter import CaptureSettings, CaptureWriter
+from virtual_port.ptyPort import PtyPort
+
+# replay://<capture file>?speed=<factor|max>&loop=<0|1>
+# streams a capture at the timing of its .ts file, without one at the pace of the baudrate
+
+
+class Serial(PtyPort):
+    blockSize = 1 << 16
+
+    def openSource(self, path, options):
+        speed = self.option(options, 'speed', '1')
+        self.speed = None if speed == 'max' else float(speed)
+        if self.speed is not None and self.speed <= 0:
+            raise ValueError(f'invalid value for speed: {speed}')
+        self.loop = self.option(options, 'loop', False, lambda value: int(value) != 0)
+
+        self.fileName = path
+        self.openFunction = open
+        for extension, open_function in CaptureSettings.compressions.values():
+            if extension and path.endswith(extension):
+                self.openFunction = open_function
+                path = path[:-len(extension)]
+        if not os.path.isfile(self.fileName):
+            raise ValueError(f'no capture {self.fileName}')
+
+        # (receive time, offset) of every chunk
+        self.records = []
+        timestamp_file_name = os.path.splitext(path)[0] + '.ts'
+        if os.path.isfile(timestamp_file_name):
+            with open(timestamp_file_name, 'rb') as f:
+                data = f.read()
+            record_size = CaptureWriter.timestampRecord.size
+            self.records = list(CaptureWriter.timestampRecord.iter_unpack(data[:len(data) - len(data) % record_size]))
+
+    def runSource(self):
+        while self.replay() and self.loop:
+            pass
+
+    def replay(self) -> bool:
+        with self.openFunction(self.fileName, 'rb') as f:
+            start = time.monotonic()
+            if self.speed is None:
+                data = f.read(Serial.blockSize)
+                while len(data) > 0:
+                    if not self.writeSource(data):
+                        return False
+                    data = f.read(Serial.blockSize)
+            elif self.records:
+                first_timestamp, offset = self.records[0]
+                f.read(offset)
+                for i, (timestamp, offset) in enumerate(self.records):
+                    end = self.records[i + 1][1] if i + 1 < len(self.records) else None
+                    data = f.read(end - offset) if end is not None else f.read()
+                    if not self.waitUntil(start + (timestamp - first_timestamp) / self.speed):
+                        return False
+                    if not self.writeSource(data):
+                        return False
+            else:
+                # 10 bits per byte on the line; chunks of 10 ms
+                bytes_per_second = self.baudrate / 10 * self.speed
+                chunk_size = max(1, int(bytes_per_second / 100))
+                sent = 0
+                data = f.read(chunk_size)
+                while len(data) > 0:
+                    if not self.waitUntil(start + sent / bytes_per_second):
+                        return False
+                    if not self.writeSource(data):
+                        return False
+                    sent += len(data)
+                    data = f.read(chunk_size)
+            # an empty capture isn't looped
+            return f.tell() > 0
@@ -0,0 +1,92 @@
+import abc
+import os
+import select
+import time
+from threading import Thread, Event
+from urllib.parse import urlparse, parse_qs, unquote
+import serial
+
+
+class PtyPort(serial.Serial):
+    # a source thread writes to the master of a pty pair and the port reads the slave like any serial
+    # port, so the threads, selectors and processes engines need no changes (posix only)
+    def __init__(self, *args, **kwargs):
+        self.master = None
+        self.sourceThread = None
+        self.stopEvent = Event()
+        super().__init__(*args, **kwargs)
+
+    def open(self):
+        if not hasattr(os, 'openpty'):
+            raise serial.SerialException(f'{self.name}: virtual ports need a pty')
+        url = urlparse(self.name)
+        try:
+            self.openSource(unquote(url.netloc + url.path), parse_qs(url.query))
+        except (OSError, ValueError) as e:
+            raise serial.SerialException(f'{self.name}: {e}')
+
+        self.master, slave = os.openpty()
+        os.set_blocking(self.master, False)
+        self.portstr = os.ttyname(slave)
+        os.close(slave)
+        try:
+            super().open()
+        except serial.SerialException:
+            self.closeMaster()
+            raise
+        self.stopEvent.clear()
+        self.sourceThread = Thread(target=self.runSource, daemon=True)
+        self.sourceThread.start()
+
+    def close(self):
+        if self.sourceThread:
+            self.stopEvent.set()
+            self.sourceThread.join()
+            self.sourceThread = None
+        super().close()
+        self.closeMaster()
+
+    def closeMaster(self):
+        if self.master is not None:
+            os.close(self.master)
+            self.master = None
+
+    def reset_input_buffer(self):
+        # the pty is new with every open, flushing it would only lose the first chunks of the source
+        pass
+
+    @abc.abstractmethod
+    def openSource(self, path, options):
+        # raises OSError or ValueError, which fail the open
+        pass
+
+    @abc.abstractmethod
+    def runSource(self):
+        pass
+
+    def writeSource(self, data) -> bool:
+        # the pty buffer slows the source down to the pace of the reader; False once the port closes
+        view = memoryview(data)
+        while len(view) > 0:
+            if self.stopEvent.is_set():
+                return False
+            _, writable, _ = select.select([], [self.master], [], 0.1)
+            if writable:
+                try:
+                    view = view[os.write(self.master, view):]
+                except BlockingIOError:
+                    pass
+        return True
+
+    def waitUntil(self, deadline) -> bool:
+        # deadline in time.monotonic() seconds; False once the port closes
+        return not self.stopEvent.wait(max(0.0, deadline - time.monotonic()))
+
+    @staticmethod
+    def option(options, name, default, convert=str):
+        if name not in options:
+            return default
+        try:
+            return convert(options[name][-1])
+        except ValueError:
+            raise ValueError(f'invalid value for {name}: {options[name][-1]}')